@@ -1,5 +1,5 @@
 import os
-from groq import Groq
+from clients import get_groq_client
 
 # Set the API key
 os.environ['GROQ_API_KEY'] = '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'
@@ -15,7 +15,7 @@ class FinSaathiAI:
             raise ValueError("Groq API key must be provided in the GROQ_API_KEY environment variable.")
 
         # Initialize Groq client with the API key
-        self.client = Groq(api_key=self.api_key)
+        self.client = get_groq_client(self.api_key)
         print("Welcome to FinSaathi AI! Your personalized financial assistant.")
         print("I’m here to answer your finance questions and provide actionable insights.")
         print("Type 'quit' or 'exit' anytime to end the conversation.\n")
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
@@ -9,10 +9,16 @@ import os
 from financial_analyzer import FinancialAnalyzer
 import warnings
 import yfinance as yf
-from financial_narrative_generator import FinancialNarrativeGenerator  # Import the new class
+from financial_narrative_generator import FinancialNarrativeGenerator, ConfidenceScorer  # Import the new class
 from dataclasses import dataclass
 from news_fetcher import NewsFetcher
 from chat import FinSaathiAI  # Import the FinSaathiAI class from chat.py
+from market_data import get_info
+from symbol_search import MAX_SEARCH_LIMIT, get_index as get_symbol_index
+from backtesting import batch_backtest, check_batch_request, summarize_batch
+from llm_stream import sse_event
+from stage_graph import StageGraph, server_timing
+from monte_carlo import check_horizons
 
  # You'll need to use a Python PDF library like reportlab or PyPDF2
 from reportlab.lib import colors
@@ -26,6 +32,7 @@ from io import BytesIO
 import base64
 from PIL import Image as PILImage
 import json
+import math
 import markdown
 import re
 import matplotlib.pyplot as plt
@@ -94,6 +101,24 @@ def create_error_response(message, status_code=400):
         "message": message
     }), status_code
 
+def create_event_stream(events):
+    """
+    Server-Sent Events response for a generator of sse_event strings.
+
+    Buffering is disabled so each token reaches the client as soon as it is
+    generated rather than when the proxy's buffer fills.
+    """
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def relay_tokens(chunks):
+    """One 'token' event per chunk of generated text"""
+    for text in chunks:
+        yield sse_event({'text': text}, event='token')
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({
@@ -134,6 +159,35 @@ def chat():
     except Exception as e:
         return create_error_response(str(e), 500)
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Streaming variant of /api/chat.
+
+    Sends 'token' events with the reply as it is generated, then a 'done'
+    event with the timestamp, or an 'error' event if generation fails.
+    """
+    if ai_assistant is None:
+        return create_error_response("FinSaathi AI is not properly initialized", 500)
+
+    data = request.get_json()
+    if not data or 'message' not in data:
+        return create_error_response("No message provided")
+
+    message = data['message'].strip()
+
+    def generate():
+        try:
+            if message.lower() == 'summarize':
+                yield from relay_tokens(ai_assistant.stream_summary())
+            else:
+                yield from relay_tokens(ai_assistant.stream_response(message))
+            yield sse_event({'timestamp': datetime.now().strftime("%I:%M %p")}, event='done')
+        except Exception as e:
+            yield sse_event({'message': str(e)}, event='error')
+
+    return create_event_stream(generate())
+
 @app.errorhandler(404)
 def not_found(error):
     return create_error_response("Resource not found", 404)
@@ -161,21 +215,8 @@ def analyze_stock():
         # Generate AI analysis
         analysis = analyzer.get_analysis(historical_data)
         
-        # Get company info
-        company_info = yf.Ticker(symbol).info
-        
-        response_data = {
-            'symbol': symbol,
-            'company_name': company_info.get('longName', symbol),
-            'historical_data': historical_data,
-            'narrative': analysis,
-            'metadata': {
-                'sector': company_info.get('sector', 'N/A'),
-                'industry': company_info.get('industry', 'N/A'),
-                'market_cap': company_info.get('marketCap', 'N/A'),
-                'currency': company_info.get('currency', 'USD')
-            }
-        }
+        response_data = company_payload(symbol, historical_data)
+        response_data['narrative'] = analysis
         
         return jsonify({
             "status": "success",
@@ -185,6 +226,48 @@ def analyze_stock():
     except Exception as e:
         return create_error_response(str(e), 500)
 
+@app.route('/api/analyze/stream', methods=['POST'])
+def analyze_stock_stream():
+    """
+    Streaming variant of /api/analyze.
+
+    Sends a 'data' event with everything but the narrative, then 'token'
+    events with the narrative (its <think> section removed) and a final
+    'done' event.
+    """
+    data = request.get_json()
+    if not data or 'symbol' not in data:
+        return create_error_response("No symbol provided")
+    
+    symbol = data.get('symbol')
+    
+    def generate():
+        try:
+            analyzer = FinancialAnalyzer(symbol, os.environ.get('GROQ_API_KEY'))
+            historical_data = analyzer.fetch_historical_data()
+            yield sse_event(company_payload(symbol, historical_data), event='data')
+            yield from relay_tokens(analyzer.stream_analysis(historical_data))
+            yield sse_event({}, event='done')
+        except Exception as e:
+            yield sse_event({'message': str(e)}, event='error')
+    
+    return create_event_stream(generate())
+
+def company_payload(symbol, historical_data):
+    """/api/analyze response fields other than the narrative"""
+    company_info = get_info(symbol, include_prices=False)
+    return {
+        'symbol': symbol,
+        'company_name': company_info.get('longName', symbol),
+        'historical_data': historical_data,
+        'metadata': {
+            'sector': company_info.get('sector', 'N/A'),
+            'industry': company_info.get('industry', 'N/A'),
+            'market_cap': company_info.get('marketCap', 'N/A'),
+            'currency': company_info.get('currency', 'USD')
+        }
+    }
+
 @app.route('/api/symbols/search', methods=['GET'])
 def search_symbols():
     try:
@@ -192,19 +275,11 @@ def search_symbols():
         if len(query) < 2:
             return jsonify([])
             
-        matches = yf.Tickers(query).tickers
-        
-        results = []
-        for symbol, ticker in matches.items():
-            try:
-                info = ticker.info
-                results.append({
-                    'symbol': symbol,
-                    'name': info.get('longName', 'Unknown'),
-                    'exchange': info.get('exchange', 'Unknown')
-                })
-            except:
-                continue
+        # Served from the local symbol index so autocomplete never waits on Yahoo
+        limit = request.args.get('limit', '10')
+        if not limit.isdigit() or int(limit) < 1:
+            return create_error_response(f"limit must be an integer from 1 to {MAX_SEARCH_LIMIT}")
+        results = get_symbol_index().search(query, limit=min(int(limit), MAX_SEARCH_LIMIT))
                 
         return jsonify({
             "status": "success",
@@ -217,7 +292,14 @@ def search_symbols():
 
 @app.route('/api/financial/analyze', methods=['POST'])
 def analyze_stock_detailed():
-    """Endpoint for detailed stock analysis using FinancialNarrativeGenerator"""
+    """
+    Endpoint for detailed stock analysis using FinancialNarrativeGenerator.
+
+    The stages run as a dependency graph: Monte Carlo and the backtest run
+    side by side once the data is in, and the chart is built and serialized
+    while the Groq call is in flight. Per-stage timings are returned under
+    'timings' and in the Server-Timing header.
+    """
     try:
         data = request.get_json()
         if not data or 'symbol' not in data:
@@ -229,57 +311,118 @@ def analyze_stock_detailed():
         # Initialize the generator
         generator = FinancialNarrativeGenerator(symbol, api_key)
         
-        # Fetch historical data
-        historical_data = generator.fetch_historical_data()
-        
-        # Perform Monte Carlo simulation
-        sim_results, risk_metrics = generator.monte_carlo_simulation(historical_data)
-        
-        # Perform backtesting
-        backtest_metrics, historical_data = generator.backtest_strategy(historical_data)
-        
-        # Generate AI insights
-        narrative = generator.get_stock_insights(
-            historical_data,
-            sim_results,
-            risk_metrics,
-            backtest_metrics
-        )
-        
-        # Create visualization
-        fig = generator.plot_advanced_analysis(historical_data)
-        
-        # Convert plotly figure to JSON
-        plot_json = fig.to_json()
+        # Per-horizon Monte Carlo risk if requested (days ahead)
+        horizons = data.get('horizons')
+        if horizons is not None:
+            try:
+                horizons = check_horizons(horizons)
+            except ValueError as e:
+                return create_error_response(str(e))
+        
+        graph = StageGraph()
+        # Fetch historical data with indicators
+        graph.add('fetch', generator.fetch_historical_data)
+        graph.add('monte_carlo', lambda df: generator.monte_carlo_simulation(df, horizons=horizons), deps=['fetch'])
+        # backtest_strategy adds columns in place; give it a copy so Monte Carlo can read concurrently
+        graph.add('backtest', lambda df: generator.backtest_strategy(df.copy()), deps=['fetch'])
+        graph.add('insights', lambda mc, bt: generator.get_stock_insights(bt[1], mc[0], mc[1], bt[0]),
+                  deps=['monte_carlo', 'backtest'])
+        graph.add('plot', lambda bt: generator.plot_advanced_analysis(bt[1]), deps=['backtest'])
+        graph.add('plot_json', lambda fig: fig.to_json(), deps=['plot'])
+        graph.add('records', lambda bt: bt[1].to_dict(orient='records'), deps=['backtest'])
+        results, timings = graph.run()
+        
+        sim_results, risk_metrics = results['monte_carlo']
+        backtest_metrics = results['backtest'][0]
         
         # Prepare the response
-        response_data = {
-            'symbol': symbol,
-            'narrative': narrative,
-            'technical_analysis': {
-                'plot': plot_json,
-                'risk_metrics': {k: float(v) for k, v in risk_metrics.items()},
-                'backtest_metrics': {k: float(v) if isinstance(v, (int, float)) else v 
-                                   for k, v in backtest_metrics.items()}
-            },
-            'monte_carlo': {
-                'expected_price': float(sim_results['mean_path'].iloc[-1]),
-                'confidence_interval': {
-                    'lower': float(sim_results['lower_95'].iloc[-1]),
-                    'upper': float(sim_results['upper_95'].iloc[-1])
-                }
-            },
-            'historical_data': historical_data.to_dict(orient='records')
-        }
+        response_data = {'symbol': symbol, 'narrative': results['insights']}
+        response_data.update(simulation_payload(sim_results, risk_metrics, backtest_metrics))
+        response_data['technical_analysis']['plot'] = results['plot_json']
+        response_data['historical_data'] = results['records']
+        response_data['timings'] = timings
         
-        return jsonify({
+        response = jsonify({
             "status": "success",
             "data": response_data
         })
+        response.headers['Server-Timing'] = server_timing(timings)
+        return response
         
     except Exception as e:
         return create_error_response(str(e), 500)
 
+@app.route('/api/financial/analyze/stream', methods=['POST'])
+def analyze_stock_detailed_stream():
+    """
+    Streaming variant of /api/financial/analyze.
+
+    Events, in order: 'metrics' (risk, backtest and Monte Carlo results),
+    'token' events with the narrative as it is generated (the model's
+    <think> section removed), 'chart' (plot and historical data) and 'done'.
+    The chart is built after the narrative so it does not delay the first
+    token.
+    """
+    data = request.get_json()
+    if not data or 'symbol' not in data:
+        return create_error_response("No symbol provided")
+    
+    symbol = data['symbol']
+    horizons = data.get('horizons')
+    if horizons is not None:
+        try:
+            horizons = check_horizons(horizons)
+        except ValueError as e:
+            return create_error_response(str(e))
+    
+    def generate():
+        try:
+            generator = FinancialNarrativeGenerator(symbol, os.environ.get('GROQ_API_KEY'))
+            historical_data = generator.fetch_historical_data()
+            sim_results, risk_metrics = generator.monte_carlo_simulation(historical_data, horizons=horizons)
+            backtest_metrics, historical_data = generator.backtest_strategy(historical_data)
+            
+            metrics = {'symbol': symbol}
+            metrics.update(simulation_payload(sim_results, risk_metrics, backtest_metrics))
+            yield sse_event(metrics, event='metrics')
+            
+            yield from relay_tokens(generator.stream_stock_insights(
+                historical_data, sim_results, risk_metrics, backtest_metrics
+            ))
+            
+            fig = generator.plot_advanced_analysis(historical_data)
+            yield sse_event({
+                'plot': fig.to_json(),
+                'historical_data': historical_data.to_dict(orient='records')
+            }, event='chart')
+            yield sse_event({}, event='done')
+        except Exception as e:
+            yield sse_event({'message': str(e)}, event='error')
+    
+    return create_event_stream(generate())
+
+def simulation_payload(sim_results, risk_metrics, backtest_metrics):
+    """Risk, backtest and Monte Carlo fields of the /api/financial/analyze response"""
+    payload = {
+        'technical_analysis': {
+            'risk_metrics': {k: float(v) for k, v in risk_metrics.items()},
+            'backtest_metrics': {k: float(v) if isinstance(v, (int, float)) else v 
+                               for k, v in backtest_metrics.items()}
+        },
+        'monte_carlo': {
+            'expected_price': float(sim_results['mean_path'].iloc[-1]),
+            'confidence_interval': {
+                'lower': float(sim_results['lower_95'].iloc[-1]),
+                'upper': float(sim_results['upper_95'].iloc[-1])
+            }
+        }
+    }
+    if 'horizon_risk' in sim_results:
+        payload['monte_carlo']['horizon_risk'] = {
+            k: v.tolist() for k, v in sim_results['horizon_risk'].items()
+        }
+    return payload
+
 @app.route('/api/financial/confidence', methods=['POST'])
 def get_confidence_score():
     """Endpoint to get confidence scores for a stock"""
@@ -294,14 +437,19 @@ def get_confidence_score():
         # Initialize the generator
         generator = FinancialNarrativeGenerator(symbol, api_key)
         
-        # Fetch historical data
-        historical_data = generator.fetch_historical_data()
+        # Fetch historical data with just the columns the scorer and backtest read
+        historical_data = generator.fetch_historical_data(
+            indicators=ConfidenceScorer.REQUIRED_INDICATORS + ['Signal', 'Daily_Return']
+        )
         
         # Perform Monte Carlo simulation
         sim_results, risk_metrics = generator.monte_carlo_simulation(historical_data)
         
-        # Perform backtesting
-        backtest_metrics, historical_data = generator.backtest_strategy(historical_data)
+        # Perform backtesting; walk-forward scores the signal out of sample only
+        if data.get('walk_forward'):
+            backtest_metrics = generator.walk_forward_backtest(historical_data)['out_of_sample']
+        else:
+            backtest_metrics, historical_data = generator.backtest_strategy(historical_data)
         
         # Calculate confidence scores
         confidence_report = generator.confidence_scorer.calculate_overall_confidence(
@@ -324,6 +472,45 @@ def get_confidence_score():
     except Exception as e:
         return create_error_response(str(e), 500)
 
+@app.route('/api/financial/confidence/history', methods=['POST'])
+def get_confidence_history():
+    """Endpoint to get the confidence score of a stock for every trading day"""
+    try:
+        data = request.get_json()
+        if not data or 'symbol' not in data:
+            return create_error_response("No symbol provided")
+        
+        symbol = data['symbol']
+        lookback = data.get('lookback', 126)
+        if isinstance(lookback, bool) or not isinstance(lookback, int) or lookback < ConfidenceScorer.MIN_LOOKBACK:
+            return create_error_response(f"lookback must be an integer of at least {ConfidenceScorer.MIN_LOOKBACK}")
+        
+        generator = FinancialNarrativeGenerator(symbol, os.environ.get('GROQ_API_KEY'))
+        
+        # Two years so the 252-day stability window has history to fill
+        historical_data = generator.fetch_historical_data(
+            period=data.get('period', '2y'),
+            indicators=ConfidenceScorer.REQUIRED_INDICATORS + ['Signal', 'Daily_Return']
+        )
+        if lookback >= len(historical_data):
+            return create_error_response(
+                f"lookback must be less than the {len(historical_data)} rows of history in the period"
+            )
+        series = generator.confidence_scorer.calculate_confidence_series(historical_data, lookback=lookback)
+        series = series.dropna(subset=['overall_confidence'])
+        
+        records = [
+            {'date': index.isoformat(), **{k: None if math.isnan(v) else float(v) for k, v in row.items()}}
+            for index, row in zip(series.index, series.to_dict(orient='records'))
+        ]
+        return jsonify({
+            "status": "success",
+            "data": records
+        })
+        
+    except Exception as e:
+        return create_error_response(str(e), 500)
+
 @app.route('/api/financial/backtest', methods=['POST'])
 def backtest_strategy():
     """Endpoint to backtest trading strategy for a stock"""
@@ -339,8 +526,8 @@ def backtest_strategy():
         # Initialize the generator
         generator = FinancialNarrativeGenerator(symbol, api_key)
         
-        # Fetch historical data
-        historical_data = generator.fetch_historical_data()
+        # Fetch historical data, the backtest only needs the signal and daily returns
+        historical_data = generator.fetch_historical_data(indicators=['Signal', 'Daily_Return'])
         
         # Perform backtesting
         backtest_metrics, historical_data = generator.backtest_strategy(historical_data, initial_capital)
@@ -359,6 +546,37 @@ def backtest_strategy():
     except Exception as e:
         return create_error_response(str(e), 500)
 
+@app.route('/api/financial/backtest/batch', methods=['POST'])
+def batch_backtest_strategy():
+    """
+    Backtest the trading signal over a list of symbols.
+
+    Streams newline-delimited JSON: one line of metrics (or an error) per
+    symbol as it finishes, then a final {"summary": ...} line.
+    """
+    data = request.get_json()
+    if not data or not data.get('symbols'):
+        return create_error_response("No symbols provided")
+    
+    try:
+        symbols, workers = check_batch_request(data['symbols'], data.get('workers'))
+        initial_capital = float(data.get('initial_capital', 100000))
+    except (TypeError, ValueError) as e:
+        return create_error_response(str(e))
+    period = data.get('period', '1y')
+    
+    def generate():
+        results = []
+        try:
+            for result in batch_backtest(symbols, period, initial_capital, workers):
+                results.append(result)
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            yield json.dumps({'error': str(e)}) + "\n"
+        yield json.dumps({'summary': summarize_batch(results)}) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 RSS_FEEDS = [
     {"url": "https://www.livemint.com/rss/companies", "name": "Livemint Companies"},
     {
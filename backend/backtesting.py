@@ -0,0 +1,442 @@
+# backtesting.py
+
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import numpy as np
+import pandas as pd
+
+from concurrency import get_process_pool
+from indicators import TRADING_DAYS, compute_indicators, macd, rsi, rolling_mean, rolling_std
+from market_data import get_history
+from symbol_search import get_index
+
+RISK_FREE_RATE = 0.02
+
+# Default sweep grid around the production rule set (RSI 30/70, 50/200 MA, 2 std bands)
+DEFAULT_GRID = {
+    'rsi_lower': (20, 25, 30, 35, 40),
+    'rsi_upper': (60, 65, 70, 75, 80),
+    'ma_short': (10, 20, 50, 75, 100),
+    'ma_long': (100, 150, 200, 250),
+    'bb_std': (1.5, 2.0, 2.5, 3.0),
+}
+
+METRIC_COLUMNS = ['Sharpe_Ratio', 'Max_Drawdown', 'Win_Rate', 'Excess_Return', 'Total_Return', 'Trades']
+
+MAX_BATCH_WORKERS = 8
+MAX_BATCH_SYMBOLS = 500
+
+
+def _vote(buy, sell):
+    return buy.astype(np.int8) - sell.astype(np.int8)
+
+
+def moving_averages(close, windows):
+    """Trailing means (min_periods=1) for several windows at once, as a T x len(windows) matrix"""
+    close = np.asarray(close, dtype=np.float64)
+    windows = np.asarray(windows)
+    csum = np.concatenate([[0.0], np.cumsum(close)])
+    end = np.arange(1, len(close) + 1)[:, None]
+    start = np.maximum(end - windows[None, :], 0)
+    return (csum[end] - csum[start]) / (end - start)
+
+
+def strategy_returns(positions, daily_return):
+    """Returns of holding `positions` (T or T x C) from the bar after each signal"""
+    positions = np.asarray(positions, dtype=np.float64)
+    daily_return = np.nan_to_num(np.asarray(daily_return, dtype=np.float64))
+    if positions.ndim == 2:
+        daily_return = daily_return[:, None]
+    held = np.zeros_like(positions)
+    held[1:] = positions[:-1]
+    return held * daily_return
+
+
+def return_metrics(returns, daily_return, risk_free_rate=RISK_FREE_RATE):
+    """Metrics of strategy returns (T or T x C) against the market's daily returns"""
+    daily_return = np.nan_to_num(np.asarray(daily_return, dtype=np.float64))
+    if returns.ndim == 2:
+        daily_return = daily_return[:, None]
+
+    growth = np.cumprod(1 + returns, axis=0)
+    total_return = growth[-1] - 1
+    market_return = np.broadcast_to(np.prod(1 + daily_return, axis=0) - 1, total_return.shape)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volatility = returns.std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+        sharpe_ratio = (total_return - risk_free_rate) / volatility
+        drawdowns = growth / np.maximum.accumulate(growth, axis=0) - 1
+        win_rate = (returns > 0).sum(axis=0) / (returns != 0).sum(axis=0)
+
+    return {
+        'Total_Return': total_return,
+        'Market_Return': market_return,
+        'Excess_Return': total_return - market_return,
+        'Sharpe_Ratio': sharpe_ratio,
+        'Max_Drawdown': drawdowns.min(axis=0),
+        'Win_Rate': win_rate
+    }
+
+
+def strategy_metrics(positions, daily_return, risk_free_rate=RISK_FREE_RATE):
+    """
+    Performance metrics of one or many position series, as in backtest_strategy.
+
+    `positions` is T or T x C (-1 short, 0 flat, 1 long, held from the next
+    bar); every metric comes back as a scalar or a length-C array.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    metrics = return_metrics(strategy_returns(positions, daily_return), daily_return, risk_free_rate)
+    metrics['Trades'] = (np.diff(positions, axis=0) != 0).sum(axis=0)
+    return metrics
+
+
+def sweep_signals(close, grid=None):
+    """
+    Trading signals for every combination of a parameter grid, as a T x C matrix.
+
+    The rule set is the one of indicators.trading_signal: RSI thresholds,
+    MACD cross, short/long moving-average cross and Bollinger band breaks.
+    Each rule is evaluated once per distinct parameter value, and the votes
+    of a combination are gathered by column index, so the cost is one array
+    program over the grid rather than one backtest per combination.
+    Combinations with rsi_lower >= rsi_upper or ma_short >= ma_long are skipped.
+
+    Returns (signals, params) where params is a DataFrame with one row per column.
+    """
+    grid = {**DEFAULT_GRID, **(grid or {})}
+    close = np.asarray(close, dtype=np.float64)
+
+    params = pd.DataFrame(
+        [combo for combo in itertools.product(*(grid[key] for key in DEFAULT_GRID))
+         if combo[0] < combo[1] and combo[2] < combo[3]],
+        columns=list(DEFAULT_GRID)
+    )
+    if params.empty:
+        raise ValueError("Parameter grid has no valid combinations")
+
+    rsi_values = rsi(close)
+    line, signal_line, _ = macd(close)
+    mid = rolling_mean(close, 20)
+    std = rolling_std(close, 20, ddof=0)
+
+    windows = np.union1d(params['ma_short'].unique(), params['ma_long'].unique())
+    averages = moving_averages(close, windows)
+    short = averages[:, np.searchsorted(windows, params['ma_short'])]
+    long = averages[:, np.searchsorted(windows, params['ma_long'])]
+
+    rsi_pairs = params[['rsi_lower', 'rsi_upper']].drop_duplicates().to_numpy()
+    rsi_index = pd.MultiIndex.from_arrays(rsi_pairs.T).get_indexer(
+        pd.MultiIndex.from_frame(params[['rsi_lower', 'rsi_upper']]))
+    widths = np.sort(params['bb_std'].unique())
+
+    # Warm-up NaNs compare False and cast no vote, as in trading_signal
+    with np.errstate(invalid='ignore'):
+        rsi_votes = _vote(rsi_values[:, None] < rsi_pairs[:, 0], rsi_values[:, None] > rsi_pairs[:, 1])
+        macd_vote = _vote(line > signal_line, line < signal_line)
+        ma_votes = _vote(short > long, short < long)
+        bb_votes = _vote(close[:, None] < mid[:, None] - widths * std[:, None],
+                         close[:, None] > mid[:, None] + widths * std[:, None])
+
+    votes = (rsi_votes[:, rsi_index] + macd_vote[:, None] + ma_votes
+             + bb_votes[:, np.searchsorted(widths, params['bb_std'])])
+    return np.sign(votes), params
+
+
+def parameter_sweep(df, grid=None, risk_free_rate=RISK_FREE_RATE, top=None):
+    """
+    Backtest every combination of a parameter grid over one price frame.
+
+    Args:
+        df: Frame with 'Close' (and 'Daily_Return', else derived from Close)
+        grid: Overrides for DEFAULT_GRID, e.g. {'rsi_lower': range(15, 45, 5)}
+        top: Keep only the best `top` rows
+
+    Returns:
+        DataFrame of parameters and METRIC_COLUMNS ranked by Sharpe ratio
+    """
+    close = df['Close'].to_numpy(dtype=np.float64)
+    if 'Daily_Return' in df:
+        daily_return = df['Daily_Return'].to_numpy(dtype=np.float64)
+    else:
+        daily_return = np.r_[0.0, close[1:] / close[:-1] - 1]
+
+    signals, params = sweep_signals(close, grid)
+    metrics = strategy_metrics(signals, daily_return, risk_free_rate)
+
+    table = params.assign(**{column: metrics[column] for column in METRIC_COLUMNS})
+    table = table.sort_values(['Sharpe_Ratio', 'Excess_Return'], ascending=False, na_position='last')
+    table = table.reset_index(drop=True)
+    return table.head(top) if top else table
+
+
+def window_metrics(returns, daily_return, starts, length, risk_free_rate=RISK_FREE_RATE, drawdown=True):
+    """
+    Metrics of strategy returns (T or T x C) over many windows [start, start + length).
+
+    Every window is read off prefix sums of log growth, returns, squared
+    returns and win/loss counts built once over the whole series, so the
+    cost does not grow with how much the windows overlap. The risk-free rate
+    is pro-rated to the window length. Returns {metric: W or W x C array}.
+    """
+    daily_return = np.nan_to_num(np.asarray(daily_return, dtype=np.float64))
+    if returns.ndim == 2:
+        daily_return = daily_return[:, None]
+    starts = np.asarray(starts)
+    ends = starts + length
+
+    def prefix(x):
+        return np.concatenate([np.zeros((1,) + x.shape[1:]), np.cumsum(x, axis=0)])
+
+    def window_sum(p):
+        return p[ends] - p[starts]
+
+    log_growth = prefix(np.log1p(returns))
+    total_return = np.expm1(window_sum(log_growth))
+    market_return = np.broadcast_to(np.expm1(window_sum(prefix(np.log1p(daily_return)))), total_return.shape)
+    mean = window_sum(prefix(returns)) / length
+    variance = (window_sum(prefix(returns * returns)) - length * mean * mean) / (length - 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volatility = np.sqrt(np.maximum(variance, 0)) * np.sqrt(TRADING_DAYS)
+        sharpe_ratio = (total_return - risk_free_rate * length / TRADING_DAYS) / volatility
+        win_rate = window_sum(prefix((returns > 0).astype(np.float64))) / \
+            window_sum(prefix((returns != 0).astype(np.float64)))
+
+    metrics = {
+        'Total_Return': total_return,
+        'Market_Return': market_return,
+        'Excess_Return': total_return - market_return,
+        'Sharpe_Ratio': sharpe_ratio,
+        'Win_Rate': win_rate
+    }
+    if drawdown:
+        # Equity inside each window, relative to the window's opening value
+        path = log_growth[starts[:, None] + np.arange(length + 1)] - log_growth[starts][:, None]
+        metrics['Max_Drawdown'] = np.expm1((path - np.maximum.accumulate(path, axis=1)).min(axis=1))
+    return metrics
+
+
+def walk_forward(df, train_days=126, test_days=21, step=None, grid=None, risk_free_rate=RISK_FREE_RATE):
+    """
+    Rolling train/test evaluation of the trading signal.
+
+    Indicators and signals are computed once over the whole frame. They only
+    look backwards, so each window starts with fully warmed-up indicator state
+    instead of recomputing from scratch. Window metrics then come from prefix
+    sums (see window_metrics).
+
+    Without a grid, the production 'Signal' column is scored in each train
+    window and in the test window that follows it. With a grid (see
+    DEFAULT_GRID), every combination is scored on the train window, and the
+    best by Sharpe is traded in the test window.
+
+    Returns:
+        {
+            'test_start', 'test_end': index labels of each test window,
+            'train', 'test': {metric: per-window array},
+            'params': chosen combination per window (DataFrame, grid mode only),
+            'out_of_sample': backtest_strategy-style metrics of the stitched test
+                windows, usable as backtest_metrics for ConfidenceScorer
+        }
+    """
+    step = step or test_days
+    n = len(df)
+    starts = np.arange(train_days, n - test_days + 1, step)
+    if len(starts) == 0:
+        raise ValueError(f"Need at least {train_days + test_days} bars for a {train_days}/{test_days} walk-forward")
+
+    if 'Daily_Return' in df:
+        daily_return = pd.Series(df['Daily_Return'].to_numpy(dtype=np.float64)).ffill().bfill().fillna(0).to_numpy()
+    else:
+        close = df['Close'].to_numpy(dtype=np.float64)
+        daily_return = np.r_[0.0, close[1:] / close[:-1] - 1]
+
+    result = {}
+    if grid is None:
+        returns = strategy_returns(df['Signal'].to_numpy(), daily_return)
+        train = window_metrics(returns, daily_return, starts - train_days, train_days, risk_free_rate)
+        test = window_metrics(returns, daily_return, starts, test_days, risk_free_rate)
+        chosen_returns = returns
+    else:
+        signals, params = sweep_signals(df['Close'].to_numpy(dtype=np.float64), grid)
+        returns = strategy_returns(signals, daily_return)
+        train_all = window_metrics(returns, daily_return, starts - train_days, train_days, risk_free_rate,
+                                   drawdown=False)
+        best = np.nan_to_num(train_all['Sharpe_Ratio'], nan=-np.inf).argmax(axis=1)
+        rows = np.arange(len(starts))
+        train = {key: values[rows, best] for key, values in train_all.items()}
+
+        # Only the chosen combination of each window is traded out of sample
+        test = {key: np.empty(len(starts)) for key in train_all}
+        test['Max_Drawdown'] = np.empty(len(starts))
+        chosen_returns = np.zeros(n)
+        for column in np.unique(best):
+            windows = np.flatnonzero(best == column)
+            metrics = window_metrics(returns[:, column], daily_return, starts[windows], test_days, risk_free_rate)
+            for key, values in metrics.items():
+                test[key][windows] = values
+            for start in starts[windows]:
+                chosen_returns[start:start + test_days] = returns[start:start + test_days, column]
+        result['params'] = params.iloc[best].reset_index(drop=True)
+
+    # Stitch the test windows (non-overlapping ones only, later windows win)
+    tested = np.zeros(n, dtype=bool)
+    for start in starts:
+        tested[start:start + test_days] = True
+    out_of_sample = return_metrics(chosen_returns[tested], daily_return[tested], risk_free_rate)
+
+    result.update({
+        'test_start': df.index[starts],
+        'test_end': df.index[starts + test_days - 1],
+        'train': train,
+        'test': test,
+        'out_of_sample': {key: float(value) for key, value in out_of_sample.items()}
+    })
+    return result
+
+
+def backtest_symbol(symbol, period="1y", initial_capital=100000):
+    """
+    Load one symbol, compute its signals and backtest them, without any LLM client.
+
+    Metrics match FinancialNarrativeGenerator.backtest_strategy. Failures are
+    returned as {'symbol', 'error'} so one bad ticker never sinks a batch.
+    """
+    try:
+        df = get_history(symbol, period=period)
+        df = df[df['Close'].notna()]
+        if df.empty:
+            raise ValueError(f"No data found for symbol {symbol}")
+        bundle = compute_indicators(df, ['Signal', 'Daily_Return'])
+        # Clean returns the way FinancialNarrativeGenerator frames are, so the
+        # numbers equal those of /api/financial/backtest for the same symbol
+        daily_return = pd.Series(bundle['Daily_Return']).ffill().bfill().fillna(0).to_numpy()
+        metrics = strategy_metrics(bundle['Signal'], daily_return)
+        metrics['Final_Portfolio_Value'] = initial_capital * (1 + metrics['Total_Return'])
+        return {'symbol': symbol, 'bars': len(df), **{k: _json_number(v) for k, v in metrics.items()}}
+    except Exception as e:
+        return {'symbol': symbol, 'error': str(e)}
+
+
+def _json_number(value):
+    value = float(value)
+    return None if math.isnan(value) or math.isinf(value) else value
+
+
+def check_batch_request(symbols, workers=None):
+    """
+    Validate a batch backtest request, returning (symbols, workers).
+
+    Symbols must be a list of at most MAX_BATCH_SYMBOLS ticker strings,
+    duplicates are dropped. Workers is None (one per CPU) or an integer
+    from 1 to MAX_BATCH_WORKERS.
+    """
+    if not isinstance(symbols, list) or not all(isinstance(s, str) and s.strip() for s in symbols):
+        raise ValueError("symbols must be a list of ticker symbols")
+    symbols = list(dict.fromkeys(s.strip() for s in symbols))
+    if not symbols:
+        raise ValueError("No symbols provided")
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        raise ValueError(f"At most {MAX_BATCH_SYMBOLS} symbols per batch")
+
+    if workers is None:
+        workers = min(os.cpu_count() or 1, MAX_BATCH_WORKERS)
+    elif isinstance(workers, bool) or not isinstance(workers, int) or not 1 <= workers <= MAX_BATCH_WORKERS:
+        raise ValueError(f"workers must be an integer from 1 to {MAX_BATCH_WORKERS}")
+    return symbols, min(workers, len(symbols))
+
+
+def batch_backtest(symbols, period="1y", initial_capital=100000, workers=None):
+    """
+    Backtest many symbols on the shared process pool, yielding results as they finish.
+
+    At most 2 x workers symbols are queued at a time, so a 500-symbol run
+    holds only a handful of frames in memory and leaves the pool to other
+    callers too. Results arrive in completion order, not input order.
+    Arguments are checked by check_batch_request.
+    """
+    symbols, workers = check_batch_request(symbols, workers)
+    pending = iter(symbols)
+    pool = get_process_pool()
+
+    in_flight = set()
+    try:
+        for symbol in itertools.islice(pending, 2 * workers):
+            in_flight.add(pool.submit(backtest_symbol, symbol, period, initial_capital))
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                for symbol in itertools.islice(pending, 1):
+                    in_flight.add(pool.submit(backtest_symbol, symbol, period, initial_capital))
+    finally:
+        # The consumer went away (client disconnected) or a result raised
+        for future in in_flight:
+            future.cancel()
+
+
+def summarize_batch(results):
+    """Aggregate per-symbol batch results into one summary dict"""
+    ok = [r for r in results if 'error' not in r]
+    summary = {
+        'symbols': len(results),
+        'succeeded': len(ok),
+        'failed': [r['symbol'] for r in results if 'error' in r],
+    }
+    if not ok:
+        return summary
+
+    table = pd.DataFrame(ok).set_index('symbol')
+    for column in ('Total_Return', 'Excess_Return', 'Sharpe_Ratio', 'Max_Drawdown', 'Win_Rate'):
+        values = table[column].astype(float)
+        summary[column] = {'mean': _json_number(values.mean()), 'median': _json_number(values.median())}
+    summary['beat_market'] = _json_number((table['Excess_Return'] > 0).mean())
+    ranked = table['Sharpe_Ratio'].astype(float).dropna().sort_values(ascending=False)
+    summary['best'] = ranked.head(5).index.tolist()
+    summary['worst'] = ranked.tail(5).index[::-1].tolist()
+    return summary
+
+
+def _load_symbols(args):
+    symbols = list(args.symbols)
+    if args.file:
+        with open(args.file) as f:
+            symbols += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if args.exchange:
+        exchanges = {exchange.upper() for exchange in args.exchange}
+        symbols += [r['symbol'] for r in get_index().records if r['exchange'].upper() in exchanges]
+    return symbols
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Backtest the trading signal over many symbols; prints one JSON line per symbol, then a summary")
+    parser.add_argument('symbols', nargs='*', help="Ticker symbols, e.g. TCS.NS INFY.NS")
+    parser.add_argument('--file', help="File with one symbol per line")
+    parser.add_argument('--exchange', nargs='+', help="Every symbol of these exchanges in the symbol master list")
+    parser.add_argument('--period', default='1y')
+    parser.add_argument('--capital', type=float, default=100000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    symbols = _load_symbols(args)
+    if not symbols:
+        parser.error("no symbols given")
+
+    results = []
+    for result in batch_backtest(symbols, args.period, args.capital, args.workers):
+        results.append(result)
+        print(json.dumps(result), flush=True)
+    print(json.dumps({'summary': summarize_batch(results)}), flush=True)
+    return 0 if any('error' not in r for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# bar_store.py
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bars')
+
+# Offsets matching the yfinance `period` strings we use
+PERIOD_OFFSETS = {
+    '1d': pd.DateOffset(days=1),
+    '5d': pd.DateOffset(days=5),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+
+class BarStore:
+    """
+    Persistent per-symbol store of daily OHLCV bars.
+
+    Each symbol is kept as one NumPy structured array on disk (`<SYMBOL>.npy`),
+    opened memory-mapped so reading the last year only touches those pages,
+    plus a small JSON sidecar with the timezone and the last sync time.
+    Syncing only downloads bars from the last stored date onwards.
+    """
+
+    FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits')
+    DTYPE = np.dtype([('Date', 'datetime64[ns]')] + [(field, 'f8') for field in FIELDS])
+
+    def __init__(self, root=None, min_sync_interval=300, initial_period="max"):
+        """
+        Args:
+            root: Directory holding the bar files (default: backend/data/bars)
+            min_sync_interval: Seconds before a symbol is checked upstream again
+            initial_period: yfinance period used the first time a symbol is seen
+        """
+        self.root = root or os.environ.get('BAR_STORE_DIR', DEFAULT_STORE_DIR)
+        self.min_sync_interval = min_sync_interval
+        self.initial_period = initial_period
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _lock_for(self, symbol):
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _paths(self, symbol):
+        name = symbol.upper().replace('/', '_')
+        return (os.path.join(self.root, f"{name}.npy"),
+                os.path.join(self.root, f"{name}.json"))
+
+    def _load(self, symbol):
+        """Return the memory-mapped bars and metadata, or (None, {}) if not stored yet"""
+        data_path, meta_path = self._paths(symbol)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None, {}
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            return np.load(data_path, mmap_mode='r'), meta
+        except (OSError, ValueError) as e:
+            print(f"Discarding unreadable bar file for {symbol}: {str(e)}")
+            return None, {}
+
+    def _write(self, symbol, bars, meta):
+        """Write atomically so readers never see a half-written file"""
+        data_path, meta_path = self._paths(symbol)
+        tmp_data = f"{data_path}.{os.getpid()}.tmp"
+        tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_data, 'wb') as f:
+            np.save(f, bars)
+        with open(tmp_meta, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_data, data_path)
+        os.replace(tmp_meta, meta_path)
+
+    def _to_array(self, df):
+        index = df.index
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+
+        bars = np.empty(len(df), dtype=self.DTYPE)
+        bars['Date'] = index.values
+        for field in self.FIELDS:
+            bars[field] = df[field].values if field in df.columns else 0.0
+        return bars
+
+    def _to_frame(self, bars, tz):
+        index = pd.DatetimeIndex(np.asarray(bars['Date']), name='Date')
+        if tz:
+            index = index.tz_localize('UTC').tz_convert(tz)
+        return pd.DataFrame({field: np.asarray(bars[field]) for field in self.FIELDS}, index=index)
+
+    def _download(self, symbol, **kwargs):
+        return yf.Ticker(symbol).history(interval='1d', **kwargs)
+
+    def sync(self, symbol, force=False):
+        """Bring the stored bars for a symbol up to date and return (bars, meta)"""
+        with self._lock_for(symbol):
+            bars, meta = self._load(symbol)
+            if (bars is not None and not force
+                    and time.time() - meta.get('synced_at', 0) < self.min_sync_interval):
+                return bars, meta
+
+            if bars is None or len(bars) == 0:
+                df = self._download(symbol, period=self.initial_period)
+                if df.empty:
+                    return bars, meta
+                merged = self._to_array(df)
+            else:
+                # The last stored bar may be today's, still forming, so it is always
+                # replaced. Re-request from the bar before it: that one is complete,
+                # and its Close only changes when the series was re-adjusted.
+                tz = meta.get('tz')
+                anchor = max(len(bars) - 2, 0)
+                first = self._to_frame(bars[anchor:anchor + 1], tz).index[0]
+                df = self._download(symbol, start=first.strftime('%Y-%m-%d'))
+                new_bars = self._to_array(df) if not df.empty else np.empty(0, dtype=self.DTYPE)
+
+                # With a single stored bar there is no completed bar to compare
+                overlap = new_bars[new_bars['Date'] == bars['Date'][anchor]] if len(bars) > 1 else new_bars[:0]
+                if len(overlap) and not np.isclose(overlap['Close'][0], bars['Close'][anchor], rtol=1e-4):
+                    # Close prices moved under us: a split or dividend re-adjusted
+                    # the whole series, so the stored history is no longer valid
+                    df = self._download(symbol, period=self.initial_period)
+                    if df.empty:
+                        return bars, meta
+                    merged = self._to_array(df)
+                elif len(new_bars):
+                    kept = bars[bars['Date'] < new_bars['Date'][0]]
+                    merged = np.concatenate([kept, new_bars])
+                else:
+                    merged = np.asarray(bars)
+
+            meta = {
+                'tz': str(df.index.tz) if df.index.tz is not None else meta.get('tz'),
+                'synced_at': time.time()
+            }
+            self._write(symbol, merged, meta)
+            return self._load(symbol)
+
+    def get_history(self, symbol, period="1y"):
+        """Return stored daily bars for the requested yfinance-style period"""
+        bars, meta = self.sync(symbol)
+        if bars is None or len(bars) == 0:
+            return pd.DataFrame(columns=list(self.FIELDS))
+
+        if period == 'max':
+            return self._to_frame(bars, meta.get('tz'))
+
+        # Work out the cut-off in exchange time, then compare in stored UTC
+        last = self._to_frame(bars[-1:], meta.get('tz')).index[-1]
+        if period == 'ytd':
+            start = last.normalize().replace(month=1, day=1)
+        elif period in PERIOD_OFFSETS:
+            start = last.normalize() - PERIOD_OFFSETS[period]
+        else:
+            raise ValueError(f"Unsupported period: {period}")
+        if start.tz is not None:
+            start = start.tz_convert('UTC').tz_localize(None)
+
+        # Only the tail of the memory-mapped file is read here
+        first_row = int(np.searchsorted(bars['Date'], start.to_datetime64(), side='right'))
+        return self._to_frame(bars[first_row:], meta.get('tz'))
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide BarStore"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = BarStore()
+        return _default_store
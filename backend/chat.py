@@ -2,19 +2,27 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 from flask import Flask, request, send_file
 from twilio.rest import Client
 from twilio.twiml.messaging_response import MessagingResponse
-from groq import Groq
 from datetime import datetime
 from dotenv import load_dotenv
 import os
 import warnings
 import PyPDF2
-import requests
-import json
 import tempfile
 from pathlib import Path
 import threading
 import re
 import urllib.request
+from llm_cache import cached_completion, stream_cached_completion
+from llm_stream import stream_completion
+from clients import get_groq_client, get_session
+from context_builder import build_context, context_budget, count_tokens
+
+# Landing.ai extraction of a long PDF can take minutes
+LANDING_AI_TIMEOUT = (10, 300)
+
+CHAT_MODEL = "llama3-70b-8192"
+CHAT_MAX_TOKENS = 1000
+SUMMARY_MAX_TOKENS = 1500
 
 load_dotenv()
 
@@ -34,7 +42,7 @@ class FinSaathiAI:
         if not self.landingai_api_key:
             raise ValueError("Landing.ai API key must be provided in the LANDINGAI_API_KEY environment variable.")
             
-        self.client = Groq(api_key=self.groq_api_key)
+        self.client = get_groq_client(self.groq_api_key)
         self.pdf_contents = ""
         self.document_analysis = {}
         self.current_document_path = None
@@ -63,7 +71,7 @@ class FinSaathiAI:
             }
             
             # Make API request
-            response = requests.post(url, files=files, headers=headers)
+            response = get_session().post(url, files=files, headers=headers, timeout=LANDING_AI_TIMEOUT)
             
             # Store response
             if response.status_code == 200:
@@ -118,97 +126,113 @@ class FinSaathiAI:
         except Exception as e:
             return f"❌ Error uploading document: {str(e)}"
     
+    def _summary_messages(self):
+        """Chat messages asking for a summary of the loaded document, within the model's context budget"""
+        system_content = """You are a Financial Document Analysis Expert. Your task is to analyze and summarize financial documents, 
+        regulatory filings, earnings reports, and extract key insights. Use your expertise in financial terminology and jargon 
+        to generate accurate, concise summaries that highlight the most important information."""
+        prompt = "Please summarize the following financial document. " + \
+                 "Focus on key financial metrics, trends, and important information. " + \
+                 "The document is given as passages labelled with their type and page:\n\n"
+        budget = context_budget(CHAT_MODEL, SUMMARY_MAX_TOKENS, count_tokens(system_content + prompt))
+        prompt += build_context(self.document_analysis, self.pdf_contents, budget=budget)
+        return [
+            {
+                "role": "system",
+                "content": system_content
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+
     def summarize_document(self):
         """Generate a summary of the currently loaded document"""
         if not self.document_analysis and not self.pdf_contents:
             return "❌ No document has been loaded or processed. Please upload a document first."
         
         try:
-            # Prepare prompt for summarization
-            if self.document_analysis:
-                # Use Landing.ai analysis for richer context
-                context = json.dumps(self.document_analysis, indent=2)
-                prompt = "Please summarize the following financial document analysis. " + \
-                         "Focus on key financial metrics, trends, and important information. " + \
-                         "The analysis data is provided in JSON format below:\n\n" + context
-            else:
-                # Fallback to PyPDF2 extraction
-                prompt = "Please summarize the following financial document. " + \
-                         "Focus on key financial metrics, trends, and important information:\n\n" + self.pdf_contents
-            
-            # Generate summary using Groq
-            response = self.client.chat.completions.create(
-                model="llama3-70b-8192",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a Financial Document Analysis Expert. Your task is to analyze and summarize financial documents, 
-                        regulatory filings, earnings reports, and extract key insights. Use your expertise in financial terminology and jargon 
-                        to generate accurate, concise summaries that highlight the most important information."""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+            # Generate summary using Groq, reusing a cached summary of the same document
+            summary = cached_completion(
+                self.client,
+                'document_summary',
+                model=CHAT_MODEL,
+                messages=self._summary_messages(),
                 temperature=0.3,  # Lower temperature for more factual responses
-                max_tokens=1500
+                max_tokens=SUMMARY_MAX_TOKENS
             )
-            return "📝 Document Summary:\n\n" + response.choices[0].message.content.strip()
+            return "📝 Document Summary:\n\n" + summary.strip()
         except Exception as e:
             return f"❌ Error generating document summary: {str(e)}"
+
+    def stream_summary(self):
+        """Yield the document summary as it is generated"""
+        if not self.document_analysis and not self.pdf_contents:
+            yield "❌ No document has been loaded or processed. Please upload a document first."
+            return
+        yield "📝 Document Summary:\n\n"
+        yield from stream_cached_completion(
+            self.client,
+            'document_summary',
+            model=CHAT_MODEL,
+            messages=self._summary_messages(),
+            temperature=0.3,
+            max_tokens=SUMMARY_MAX_TOKENS
+        )
     
+    def _response_messages(self, user_input):
+        """System prompt (with any loaded document as context) followed by the user's message"""
+        system_content = """You are ArthAI, a Market Education and Financial Document Analysis Expert. 
+        You explain financial concepts, investment principles, and economic fundamentals in a clear and engaging way. 
+        You can analyze financial documents, regulatory filings, earnings reports, and extract key insights.
+        You're fluent in financial terminology and jargon. If a user asks an off-topic question, 
+        politely redirect them to market-related topics. Keep responses factual and educational.
+        
+        When responding on WhatsApp, keep responses concise and well-formatted. Use bullet points and headings
+        when appropriate, and use emoji occasionally to make the response engaging.
+        """
+        
+        # Add the passages of any loaded document most relevant to the question
+        budget = context_budget(CHAT_MODEL, CHAT_MAX_TOKENS, count_tokens(system_content + user_input))
+        context = build_context(self.document_analysis, self.pdf_contents, query=user_input, budget=budget)
+        if context:
+            system_content += "\n\nHere are the passages of the user's financial document most relevant to the question:\n"
+            system_content += context
+        
+        return [
+            {
+                "role": "system",
+                "content": system_content
+            },
+            {
+                "role": "user",
+                "content": user_input
+            }
+        ]
+
     def get_response(self, user_input):
         try:
-            # Prepare context with document content if available
-            system_content = """You are ArthAI, a Market Education and Financial Document Analysis Expert. 
-            You explain financial concepts, investment principles, and economic fundamentals in a clear and engaging way. 
-            You can analyze financial documents, regulatory filings, earnings reports, and extract key insights.
-            You're fluent in financial terminology and jargon. If a user asks an off-topic question, 
-            politely redirect them to market-related topics. Keep responses factual and educational.
-            
-            When responding on WhatsApp, keep responses concise and well-formatted. Use bullet points and headings
-            when appropriate, and use emoji occasionally to make the response engaging.
-            """
-            
-            context = ""
-            # Add document analysis to context if available
-            if self.document_analysis:
-                context += "\n\nHere is detailed analysis from a financial document that you can reference:\n"
-                context += json.dumps(self.document_analysis, indent=2)
-            
-            # Add PDF text content if available
-            if self.pdf_contents:
-                context += "\n\nHere is additional text content from the document:\n"
-                # Limit context length to avoid token limits
-                if len(self.pdf_contents) > 6000:
-                    context += self.pdf_contents[:6000] + "...[content truncated]"
-                else:
-                    context += self.pdf_contents
-            
-            # If we have context, add it to the system content
-            if context:
-                system_content += context
-            
             response = self.client.chat.completions.create(
-                model="llama3-70b-8192",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_content
-                    },
-                    {
-                        "role": "user",
-                        "content": user_input
-                    }
-                ],
+                model=CHAT_MODEL,
+                messages=self._response_messages(user_input),
                 temperature=0.7,
-                max_tokens=1000
+                max_tokens=CHAT_MAX_TOKENS
             )
             return response.choices[0].message.content.strip()
         except Exception as e:
             return f"❌ Error getting AI response: {str(e)}"
 
+    def stream_response(self, user_input):
+        """Yield the reply to a user message as it is generated"""
+        return stream_completion(
+            self.client,
+            model=CHAT_MODEL,
+            messages=self._response_messages(user_input),
+            temperature=0.7,
+            max_tokens=CHAT_MAX_TOKENS
+        )
+
 def get_or_create_session(phone_number):
     """Get or create a FinSaathiAI session for a user"""
     if phone_number not in user_sessions:
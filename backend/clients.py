@@ -0,0 +1,77 @@
+# clients.py
+
+import threading
+
+import requests
+from groq import Groq
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connect / read timeouts (seconds) for plain HTTP fetches. The bare
+# requests.get calls these replace had none and could hang a worker forever.
+DEFAULT_TIMEOUT = (5, 20)
+USER_AGENT = "Mozilla/5.0 (compatible; FinSaathi/1.0)"
+
+# Hosts kept in the pool (RSS sources, article sites, Landing.ai) and
+# connections kept open per host (NewsFetcher fetches feeds on 10 threads)
+POOL_HOSTS = 32
+POOL_SIZE = 16
+
+_lock = threading.Lock()
+_groq_clients = {}
+_session = None
+
+
+def get_groq_client(api_key):
+    """
+    Process-wide Groq client for an API key.
+
+    Groq clients own an httpx connection pool and are thread-safe, so one
+    per key lets every request reuse warm TLS connections instead of paying
+    a handshake each time a generator or analyzer is constructed.
+    """
+    with _lock:
+        client = _groq_clients.get(api_key)
+        if client is None:
+            client = _groq_clients[api_key] = Groq(api_key=api_key)
+        return client
+
+
+def get_session():
+    """
+    Process-wide requests.Session with keep-alive pools for RSS, article
+    and Landing.ai requests.
+
+    Idempotent requests are retried on connection errors and gateway
+    failures; POSTs are never retried.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            retry = Retry(
+                total=2,
+                backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset(['GET', 'HEAD']),
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['User-Agent'] = USER_AGENT
+            _session = session
+        return _session
+
+
+def fetch_feed_bytes(url, timeout=DEFAULT_TIMEOUT):
+    """
+    Raw body and headers of an RSS feed, for feedparser.parse(body, response_headers=headers).
+
+    Fetching through the shared session, rather than letting feedparser open
+    its own urllib connection, keeps the feed host's connection alive between
+    refreshes.
+    """
+    response = get_session().get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.content, dict(response.headers)
@@ -0,0 +1,87 @@
+# concurrency.py
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Size of the shared process pool
+MAX_PROCESS_WORKERS = os.cpu_count() or 1
+# Modules the fork server imports once, so forked workers start warm
+PROCESS_PRELOAD = ['monte_carlo', 'backtesting']
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still in flight block and receive the same result (or exception).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+def get_process_pool():
+    """
+    Process-wide ProcessPoolExecutor, started on first use and kept for the life of the process.
+
+    Workers come from a fork server instead of forking the threaded Flask
+    process, whose locks (cache, logging) another thread may hold at fork
+    time. The server is a single-threaded process that imports
+    PROCESS_PRELOAD once, so workers start without re-importing NumPy and
+    pandas. Where there is no fork server (Windows) workers are spawned.
+
+    Like any non-fork worker, each one imports the main module (app.py
+    under Flask) when it starts. The pool lives as long as the process, so
+    that happens once per worker rather than once per call, but a script
+    using the pool must keep its work under `if __name__ == '__main__':`.
+    The pool is shared: callers bound their own share by how many tasks
+    they keep in flight.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        # An executor whose worker died (killed, out of memory) fails every later submit
+        if _process_pool is None or getattr(_process_pool, '_broken', False):
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(PROCESS_PRELOAD)
+            else:
+                context = multiprocessing.get_context('spawn')
+            _process_pool = ProcessPoolExecutor(max_workers=MAX_PROCESS_WORKERS, mp_context=context)
+        return _process_pool
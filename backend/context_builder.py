@@ -0,0 +1,248 @@
+# context_builder.py
+
+import json
+import math
+import re
+from collections import Counter
+
+# Context window of each chat model (tokens), and the most document context
+# to send it. Replies cost time per prompt token, so the budget stays well
+# below the window even when more would fit.
+MODEL_CONTEXT_WINDOWS = {
+    'llama3-70b-8192': 8192,
+    'llama3-8b-8192': 8192,
+    'llama-3.3-70b-versatile': 128000,
+    'deepseek-r1-distill-llama-70b': 128000,
+}
+CONTEXT_BUDGETS = {
+    'llama3-70b-8192': 3000,
+    'llama3-8b-8192': 3000,
+    'llama-3.3-70b-versatile': 6000,
+    'deepseek-r1-distill-llama-70b': 6000,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+DEFAULT_CONTEXT_BUDGET = 3000
+# Headroom for chat-format overhead and error in the token estimate
+SAFETY_TOKENS = 256
+
+# Size of the passages long text is split into before packing
+PASSAGE_TOKENS = 200
+
+# Landing.ai fields that locate a chunk on the page or identify it; the model
+# cannot use them and they can be a third of the JSON
+DROP_FIELDS = {'grounding', 'box', 'bbox', 'chunk_id', 'id', 'ids', 'errors', 'extraction_error'}
+
+# Stands in for a question when summarizing: passages that mention these come first
+SUMMARY_QUERY = (
+    "revenue sales income profit net loss ebitda margin earnings eps dividend growth "
+    "guidance outlook cash flow debt assets liabilities equity capital expenditure "
+    "segment quarter year risk total"
+)
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i in is it its me my "
+    "of on or our so than that the their them there these this to us was we what when "
+    "where which who why will with you your".split()
+)
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+_TERM_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def count_tokens(text):
+    """
+    Estimate the token count of `text` for Llama-3 style BPE vocabularies.
+
+    Words count one token per 5 letters (common words are one token),
+    numbers one per 3 digits and punctuation one each. This slightly
+    overestimates English prose, so budgets built on it are conservative.
+    """
+    return sum(math.ceil(len(piece) / 5) if piece[0].isalpha() else 1
+               for piece in _TOKEN_PATTERN.findall(text))
+
+
+def context_budget(model, max_tokens, prompt_tokens=0):
+    """
+    Tokens of document context that fit a request to `model`.
+
+    The configured budget for the model, reduced if the window minus the
+    reply (`max_tokens`), the rest of the prompt and a safety margin is smaller.
+    """
+    window = MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+    budget = CONTEXT_BUDGETS.get(model, DEFAULT_CONTEXT_BUDGET)
+    return max(0, min(budget, window - max_tokens - prompt_tokens - SAFETY_TOKENS))
+
+
+def strip_fields(value):
+    """Copy of parsed JSON without DROP_FIELDS and empty values"""
+    if isinstance(value, dict):
+        stripped = {key: strip_fields(item) for key, item in value.items() if key not in DROP_FIELDS}
+        return {key: item for key, item in stripped.items() if item not in (None, '', [], {})}
+    if isinstance(value, list):
+        return [item for item in (strip_fields(item) for item in value) if item not in (None, '', [], {})]
+    return value
+
+
+def compact_json(value):
+    """JSON without indentation or spaces after separators"""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def _find_chunks(value):
+    """The first list of {'text': ...} dicts in a document analysis (Landing.ai 'chunks')"""
+    if isinstance(value, list):
+        if value and all(isinstance(item, dict) and 'text' in item for item in value):
+            return value
+        value = {str(i): item for i, item in enumerate(value)}
+    if isinstance(value, dict):
+        for item in value.values():
+            chunks = _find_chunks(item)
+            if chunks:
+                return chunks
+    return None
+
+
+def _chunk_page(chunk):
+    for box in chunk.get('grounding') or []:
+        if isinstance(box, dict) and 'page' in box:
+            return box['page']
+    return None
+
+
+def _split_long(line, max_tokens):
+    """Break a line longer than max_tokens into runs of words that fit"""
+    if count_tokens(line) <= max_tokens:
+        return [line]
+    pieces, current, size = [], [], 0
+    for word in line.split():
+        tokens = count_tokens(word)
+        if current and size + tokens > max_tokens:
+            pieces.append(' '.join(current))
+            current, size = [], 0
+        current.append(word)
+        size += tokens
+    if current:
+        pieces.append(' '.join(current))
+    return pieces
+
+
+def split_passages(text, max_tokens=PASSAGE_TOKENS):
+    """Split text on paragraph breaks, then line breaks, into passages of at most ~max_tokens"""
+    passages, current, size = [], [], 0
+    for block in re.split(r"\n\s*\n", text):
+        lines = [block] if count_tokens(block) <= max_tokens else block.splitlines()
+        for line in (piece for line in lines for piece in _split_long(line, max_tokens)):
+            line = line.strip()
+            if not line:
+                continue
+            tokens = count_tokens(line)
+            if current and size + tokens > max_tokens:
+                passages.append('\n'.join(current))
+                current, size = [], 0
+            current.append(line)
+            size += tokens
+        if current and size >= max_tokens // 2:
+            passages.append('\n'.join(current))
+            current, size = [], 0
+    if current:
+        passages.append('\n'.join(current))
+    return passages
+
+
+def document_passages(document_analysis=None, pdf_text=""):
+    """
+    Passages of a loaded document, in document order.
+
+    Landing.ai chunks are used one per passage, labelled with their type and
+    page, without grounding boxes or ids. The PyPDF2 text of the same file
+    would repeat them, so it is only used when there are no chunks. Any
+    other analysis JSON is compacted and split like plain text.
+    """
+    chunks = _find_chunks(document_analysis) if document_analysis else None
+    if chunks:
+        passages = []
+        for chunk in chunks:
+            text = str(chunk.get('text') or '').strip()
+            if not text:
+                continue
+            label = chunk.get('chunk_type') or 'text'
+            page = _chunk_page(chunk)
+            header = f"[{label}, page {page + 1}]" if isinstance(page, int) else f"[{label}]"
+            for part in split_passages(text):
+                passages.append(f"{header} {part}")
+        return passages
+
+    passages = []
+    if document_analysis:
+        passages.extend(split_passages(compact_json(strip_fields(document_analysis))))
+    if pdf_text:
+        passages.extend(split_passages(pdf_text))
+    return passages
+
+
+def _terms(text):
+    return [term for term in _TERM_PATTERN.findall(text.lower()) if term not in STOPWORDS]
+
+
+def score_passages(passages, query, k1=1.2, b=0.75):
+    """BM25 relevance of each passage to the query"""
+    query_terms = set(_terms(query))
+    if not passages or not query_terms:
+        return [0.0] * len(passages)
+
+    counts = [Counter(_terms(passage)) for passage in passages]
+    lengths = [sum(count.values()) for count in counts]
+    average = sum(lengths) / len(lengths) or 1.0
+    frequency = Counter(term for count in counts for term in query_terms if term in count)
+
+    scores = []
+    for count, length in zip(counts, lengths):
+        score = 0.0
+        for term in query_terms:
+            tf = count.get(term)
+            if tf:
+                idf = math.log(1 + (len(passages) - frequency[term] + 0.5) / (frequency[term] + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average))
+        scores.append(score)
+    return scores
+
+
+def pack_passages(passages, scores, budget):
+    """
+    The best-scoring passages that fit in `budget` tokens, in document order.
+
+    Passages are taken greedily by score (earlier first on ties), skipping
+    any that no longer fit. Returns (text, omitted) where omitted is the
+    number of passages left out.
+    """
+    sizes = [count_tokens(passage) + 1 for passage in passages]
+    order = sorted(range(len(passages)), key=lambda i: (-scores[i], i))
+    chosen, used = [], 0
+    for i in order:
+        if used + sizes[i] <= budget:
+            chosen.append(i)
+            used += sizes[i]
+    chosen.sort()
+    return '\n'.join(passages[i] for i in chosen), len(passages) - len(chosen)
+
+
+def build_context(document_analysis=None, pdf_text="", query="", budget=DEFAULT_CONTEXT_BUDGET):
+    """
+    Document context for a prompt, packed into at most `budget` tokens.
+
+    With a `query` (the user's question), the passages most relevant to it
+    are kept; without one (summaries), those that mention key financial
+    figures. Returns "" when there is no document.
+    """
+    passages = document_passages(document_analysis, pdf_text)
+    if not passages or budget <= 0:
+        return ""
+
+    scores = score_passages(passages, query or SUMMARY_QUERY)
+    text, omitted = pack_passages(passages, scores, budget)
+    if omitted:
+        # Leave room for the note, which must fit the budget too
+        note = f"\n[{len(passages)} less relevant passages omitted]"
+        text, omitted = pack_passages(passages, scores, budget - count_tokens(note))
+        text += f"\n[{omitted} less relevant passages omitted]"
+    return text
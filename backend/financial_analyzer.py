@@ -1,62 +1,48 @@
 # financial_analyzer.py
 
 import yfinance as yf
-import pandas as pd
 import numpy as np
-from ta.trend import MACD, EMAIndicator
-from ta.momentum import RSIIndicator, StochasticOscillator
-from ta.volatility import BollingerBands
-from ta.volume import OnBalanceVolumeIndicator, AccDistIndexIndicator
-from groq import Groq
 import re
+from market_data import get_history
+from indicators import compute_indicators, rolling_std
+from llm_cache import cached_completion, stream_cached_completion
+from llm_stream import filtered
+from clients import get_groq_client
 
 class FinancialAnalyzer:
     def __init__(self, symbol, api_key):
         self.symbol = symbol
         self.stock = yf.Ticker(symbol)
-        self.client = Groq(api_key=api_key)
+        self.client = get_groq_client(api_key)
     
     def fetch_historical_data(self, period="1y"):
         """Fetch and process historical data with technical indicators"""
         try:
-            df = self.stock.history(period=period)
+            df = get_history(self.symbol, period=period)
             
             if df.empty:
                 raise ValueError(f"No data found for symbol {self.symbol}")
             
             # Fill NaN values
-            df = df.fillna(method='ffill').fillna(method='bfill')
+            df = df.ffill().bfill()
             
-            # Calculate technical indicators
-            df['50_MA'] = df['Close'].rolling(window=50, min_periods=1).mean()
-            df['200_MA'] = df['Close'].rolling(window=200, min_periods=1).mean()
-            df['20_EMA'] = EMAIndicator(close=df['Close'], window=20).ema_indicator()
+            # Calculate technical indicators in one pass over NumPy arrays
+            indicators = compute_indicators(df, ['50_MA', '200_MA', '20_EMA', 'MACD', 'RSI', 'Stoch_K',
+                                                 'Bollinger_Upper', 'OBV', 'ADI', 'Daily_Return'])
+            for column in ['50_MA', '200_MA', '20_EMA',
+                           'MACD', 'MACD_Signal', 'MACD_Histogram',
+                           'RSI', 'Stoch_K', 'Stoch_D',
+                           'Bollinger_Upper', 'Bollinger_Lower']:
+                df[column] = indicators[column]
             
-            # MACD
-            macd = MACD(df['Close'])
-            df['MACD'] = macd.macd()
-            df['MACD_Signal'] = macd.macd_signal()
-            df['MACD_Histogram'] = macd.macd_diff()
-            
-            # RSI and Stochastic
-            df['RSI'] = RSIIndicator(df['Close']).rsi()
-            stoch = StochasticOscillator(df['High'], df['Low'], df['Close'])
-            df['Stoch_K'] = stoch.stoch()
-            df['Stoch_D'] = stoch.stoch_signal()
-            
-            # Bollinger Bands
-            bollinger = BollingerBands(df['Close'])
-            df['Bollinger_Upper'] = bollinger.bollinger_hband()
-            df['Bollinger_Lower'] = bollinger.bollinger_lband()
+            # Band width relative to price here, not to the middle band
             df['BB_Width'] = (df['Bollinger_Upper'] - df['Bollinger_Lower']) / df['Close']
             
-            # Volume Indicators
-            df['OBV'] = OnBalanceVolumeIndicator(df['Close'], df['Volume']).on_balance_volume()
-            df['ADI'] = AccDistIndexIndicator(df['High'], df['Low'], df['Close'], df['Volume']).acc_dist_index()
-            
-            # Volatility
-            df['Daily_Return'] = df['Close'].pct_change()
-            df['Volatility'] = df['Daily_Return'].rolling(window=20).std() * np.sqrt(252)
+            df['OBV'] = indicators['OBV']
+            df['ADI'] = indicators['ADI']
+            df['Daily_Return'] = indicators['Daily_Return']
+            # Full 20-day window required before volatility is reported
+            df['Volatility'] = rolling_std(indicators['Daily_Return'], 20) * np.sqrt(252)
             
             # Clean up any remaining NaN values
             df = df.fillna(0)
@@ -70,14 +56,20 @@ class FinancialAnalyzer:
     
 
 
-    def get_analysis(self, data):
-        """Generate AI analysis of the financial data"""
-        try:
-            # Convert list of dicts back to DataFrame for analysis
-            df = pd.DataFrame(data)
-            latest_data = df.iloc[-1]
+    # Groq request parameters shared by get_analysis and stream_analysis
+    ANALYSIS_REQUEST = {
+        'model': "deepseek-r1-distill-llama-70b",
+        'temperature': 0.7,
+        'max_tokens': 2000,
+        'top_p': 0.95
+    }
 
-            prompt = f"""
+    def build_analysis_prompt(self, data):
+        """Prompt for the technical analysis of the records from fetch_historical_data"""
+        # Only the latest row is used; avoid building a DataFrame from the whole list
+        latest_data = data[-1]
+
+        return f"""
             Comprehensive Technical Analysis for {self.symbol}
 
             Current Metrics:
@@ -94,17 +86,18 @@ class FinancialAnalyzer:
             5. Short-term Outlook
             """
 
-            completion = self.client.chat.completions.create(
+    def get_analysis(self, data):
+        """Generate AI analysis of the financial data"""
+        try:
+            prompt = self.build_analysis_prompt(data)
+            response = cached_completion(
+                self.client,
+                'financial_analysis',
                 messages=[{"role": "user", "content": prompt}],
-                model="deepseek-r1-distill-llama-70b",
-                temperature=0.7,
-                max_tokens=2000,
-                top_p=0.95,
-                stream=False
+                stream=False,
+                **self.ANALYSIS_REQUEST
             )
 
-            response = completion.choices[0].message.content
-
             # Remove <think>...</think> using regex
             response = re.sub(r"<think>.*?</think>", "", response, flags=re.DOTALL).strip()
 
@@ -112,3 +105,13 @@ class FinancialAnalyzer:
 
         except Exception as e:
             raise Exception(f"Error generating analysis: {str(e)}")
+
+    def stream_analysis(self, data):
+        """Yield the analysis as it is generated, without the model's <think> section"""
+        chunks = stream_cached_completion(
+            self.client,
+            'financial_analysis',
+            messages=[{"role": "user", "content": self.build_analysis_prompt(data)}],
+            **self.ANALYSIS_REQUEST
+        )
+        return filtered(chunks, strip_think='deepseek' in self.ANALYSIS_REQUEST['model'])
@@ -4,14 +4,17 @@ import numpy as np
 from datetime import datetime, timedelta
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from ta.trend import MACD, EMAIndicator
-from ta.momentum import RSIIndicator, StochasticOscillator
-from ta.volatility import BollingerBands
-from ta.volume import OnBalanceVolumeIndicator, AccDistIndexIndicator
-from groq import Groq
 import warnings
+import hashlib
 from scipy.stats import norm, skew
 from scipy import stats
+from market_data import get_history
+from indicators import INPUT_COLUMNS, TRADING_DAYS, compute_indicators, adx, rolling_max, rolling_mean, trading_signal
+from monte_carlo import FORECAST_DAYS, run_simulation
+from backtesting import RISK_FREE_RATE, parameter_sweep, strategy_returns, walk_forward
+from llm_cache import cached_completion, stream_cached_completion
+from llm_stream import filtered
+from clients import get_groq_client
 
 warnings.filterwarnings('ignore')
 pd.options.mode.chained_assignment = None
@@ -19,7 +22,78 @@ pd.options.mode.chained_assignment = None
 # Suppress the specific RuntimeWarnings
 warnings.filterwarnings('ignore', category=RuntimeWarning)
 
+def _latest(data, column):
+    """Last value of a column from a DataFrame or an IndicatorBundle"""
+    return float(np.asarray(data[column])[-1])
+
+def _trailing(data, column, window):
+    """
+    Last `window` values of a column, or all-NaN when there are fewer (the
+    last row of a pandas `rolling(window)` is NaN in that case too)
+    """
+    values = np.asarray(data[column], dtype=np.float64)
+    if len(values) < window:
+        return np.array([np.nan])
+    return values[-window:]
+
+def _gbm_risk(mu, sigma, forecast_days):
+    """
+    Closed-form values the Monte Carlo estimates for GBM with daily log-return
+    mean `mu` and std `sigma`: VaR_95, VaR_99, return volatility and the width
+    of the 5-95% price band relative to the mean price, `forecast_days` ahead
+    """
+    drift, spread = forecast_days * mu, np.sqrt(forecast_days) * sigma
+    mean_growth = np.exp(drift + spread ** 2 / 2)
+    return {
+        'VaR_95': np.expm1(drift + norm.ppf(0.05) * spread),
+        'VaR_99': np.expm1(drift + norm.ppf(0.01) * spread),
+        'Return_Volatility': mean_growth * np.sqrt(np.expm1(spread ** 2)),
+        'interval_width': (np.exp(drift + norm.ppf(0.95) * spread) -
+                           np.exp(drift + norm.ppf(0.05) * spread)) / mean_growth
+    }
+
+def _skewtest_pvalue(skewness, n):
+    """Two-sided p-value of scipy's skewtest for sample skewness (biased) over n observations"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = skewness * np.sqrt((n + 1.0) * (n + 3) / (6.0 * (n - 2)))
+        beta2 = 3.0 * (n * n + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9))
+        w2 = -1 + np.sqrt(2 * (beta2 - 1))
+        delta = 1 / np.sqrt(0.5 * np.log(w2))
+        alpha = np.sqrt(2.0 / (w2 - 1))
+        y = np.where(y == 0, 1, y)
+        z = delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+    return 2 * norm.sf(np.abs(z))
+
+def _statistical_scores(skew_p, var_95, var_99, return_volatility, interval_width):
+    """Statistical confidence breakdown; works on scalars and on per-row arrays"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            # Higher when the return distribution is closer to normal
+            'skewness': np.minimum(skew_p, 0.05) / 0.05,
+            'volatility': np.maximum(1 - np.minimum(return_volatility, 0.5) / 0.5, 0),
+            'var_confidence': np.minimum(np.abs(var_95 / var_99), 1),
+            # Narrower prediction interval = higher confidence
+            'interval_confidence': np.maximum(1 - interval_width, 0)
+        }
+
+def _market_scores(sharpe_ratio, win_rate, market_stability, excess_return):
+    """Market confidence breakdown; works on scalars and on per-row arrays"""
+    return {
+        'sharpe_ratio': np.maximum(np.minimum(sharpe_ratio / 3, 1), 0),  # Normalized to max of 3
+        'win_rate': win_rate,
+        'market_stability': market_stability,
+        'excess_return': np.maximum(np.minimum(excess_return / 0.2, 1), 0)  # Normalized to 20% excess return
+    }
+
 class ConfidenceScorer:
+    # Indicator columns the technical and market scores read
+    REQUIRED_INDICATORS = ['50_MA', '200_MA', '20_EMA', 'RSI', 'MACD', 'MACD_Histogram', 'ADX', 'Volatility']
+    # Fewest rows of history calculate_confidence_series will score a row on
+    MIN_LOOKBACK = 20
+    STATISTICAL_WEIGHTS = {'skewness': 0.25, 'volatility': 0.25, 'var_confidence': 0.25,
+                           'interval_confidence': 0.25}
+    MARKET_WEIGHTS = {'sharpe_ratio': 0.3, 'win_rate': 0.3, 'market_stability': 0.2, 'excess_return': 0.2}
+    
     def __init__(self):
         self.weight_technical = 0.3
         self.weight_statistical = 0.4
@@ -31,26 +105,26 @@ class ConfidenceScorer:
         
         # Trend Agreement Score (Moving Averages)
         ma_agreement = (
-            (data['50_MA'].iloc[-1] > data['200_MA'].iloc[-1]) == 
-            (data['20_EMA'].iloc[-1] > data['50_MA'].iloc[-1])
+            (_latest(data, '50_MA') > _latest(data, '200_MA')) == 
+            (_latest(data, '20_EMA') > _latest(data, '50_MA'))
         )
         scores['trend_agreement'] = 1 if ma_agreement else 0
         
         # RSI Confidence
-        rsi = data['RSI'].iloc[-1]
+        rsi = _latest(data, 'RSI')
         scores['rsi_confidence'] = 1 - (abs(50 - rsi) / 50)  # Higher when RSI is balanced
         
         # MACD Signal Strength
-        macd_signal_ratio = abs(data['MACD_Histogram'].iloc[-1] / data['MACD'].iloc[-1])
+        macd_signal_ratio = abs(_latest(data, 'MACD_Histogram') / _latest(data, 'MACD'))
         scores['macd_strength'] = min(macd_signal_ratio, 1) if not np.isnan(macd_signal_ratio) else 0.5
         
         # ADX Trend Strength
-        adx = data['ADX'].iloc[-1]
+        adx = _latest(data, 'ADX')
         scores['trend_strength'] = min(adx / 50, 1)  # Normalized ADX
         
-        # Volume Confirmation
-        vol_avg = data['Volume'].rolling(window=20).mean().iloc[-1]
-        vol_current = data['Volume'].iloc[-1]
+        # Volume Confirmation (last value of the 20-day rolling mean)
+        vol_avg = _trailing(data, 'Volume', 20).mean()
+        vol_current = _latest(data, 'Volume')
         scores['volume_confidence'] = min(vol_current / vol_avg, 1.5) / 1.5
         
         # Weight and combine technical scores
@@ -67,69 +141,32 @@ class ConfidenceScorer:
     
     def calculate_statistical_confidence(self, risk_metrics, sim_results):
         """Calculate confidence score based on statistical measures"""
-        scores = {}
-        
         # Distribution Skewness Score (using last year's daily returns for demonstration)
-        returns_distribution = sim_results['mean_path'].pct_change().dropna() 
+        returns_distribution = sim_results['mean_path'].pct_change().dropna()
 
         # Check if enough samples for skew calculation
-        if len(returns_distribution) >= 8:
-            _, p_value = stats.skewtest(returns_distribution)
-            scores['skewness'] = min(p_value, 0.05) / 0.05  # Higher when distribution is closer to normal
-        else:
-            scores['skewness'] = 0.5  # Assign a moderate score if not enough samples
+        skew_p = stats.skewtest(returns_distribution).pvalue if len(returns_distribution) >= 8 else np.nan
 
-        # Volatility Score (inverse relationship)
-        vol_score = 1 - min(risk_metrics['Return_Volatility'], 0.5) / 0.5
-        scores['volatility'] = max(vol_score, 0)
-        
-        # VaR Confidence
-        var_ratio = abs(risk_metrics['VaR_95'] / risk_metrics['VaR_99'])
-        scores['var_confidence'] = min(var_ratio, 1)
-        
         # Prediction Interval Width (smaller width = higher confidence)
         interval_width = (sim_results['upper_95'].iloc[-1] - sim_results['lower_95'].iloc[-1]) / sim_results['mean_path'].iloc[-1]
-        scores['interval_confidence'] = max(1 - interval_width, 0)
-        
-        # Weight and combine statistical scores
-        weights = {
-            'skewness': 0.25,
-            'volatility': 0.25,
-            'var_confidence': 0.25,
-            'interval_confidence': 0.25
-        }
-        
-        statistical_score = sum(score * weights[key] for key, score in scores.items())
+        scores = _statistical_scores(skew_p, risk_metrics['VaR_95'], risk_metrics['VaR_99'],
+                                     risk_metrics['Return_Volatility'], interval_width)
+        scores = {key: float(score) for key, score in scores.items()}
+        if np.isnan(skew_p):
+            scores['skewness'] = 0.5  # Assign a moderate score if not enough samples
+
+        statistical_score = sum(scores[key] * weight for key, weight in self.STATISTICAL_WEIGHTS.items())
         return statistical_score, scores
     
     def calculate_market_confidence(self, data, backtest_metrics):
         """Calculate confidence score based on market conditions and backtest performance"""
-        scores = {}
-        
-        # Sharpe Ratio Score
-        sharpe_score = min(backtest_metrics['Sharpe_Ratio'] / 3, 1)  # Normalized to max of 3
-        scores['sharpe_ratio'] = max(sharpe_score, 0)
-        
-        # Win Rate Score
-        scores['win_rate'] = backtest_metrics['Win_Rate']
-        
-        # Market Trend Stability
-        price_stability = 1 - (data['Volatility'].iloc[-1] / data['Volatility'].rolling(window=252).max().iloc[-1])
-        scores['market_stability'] = price_stability
-        
-        # Excess Return Score
-        excess_return_score = min(backtest_metrics['Excess_Return'] / 0.2, 1)  # Normalized to 20% excess return
-        scores['excess_return'] = max(excess_return_score, 0)
+        # Market trend stability: current volatility against its 252-day high
+        price_stability = 1 - (_latest(data, 'Volatility') / _trailing(data, 'Volatility', 252).max())
+        scores = _market_scores(backtest_metrics['Sharpe_Ratio'], backtest_metrics['Win_Rate'], price_stability,
+                                backtest_metrics['Excess_Return'])
+        scores = {key: float(score) for key, score in scores.items()}
         
-        # Weight and combine market scores
-        weights = {
-            'sharpe_ratio': 0.3,
-            'win_rate': 0.3,
-            'market_stability': 0.2,
-            'excess_return': 0.2
-        }
-        
-        market_score = sum(score * weights[key] for key, score in scores.items())
+        market_score = sum(scores[key] * weight for key, weight in self.MARKET_WEIGHTS.items())
         return market_score, scores
     
     def calculate_overall_confidence(self, data, risk_metrics, sim_results, backtest_metrics):
@@ -165,6 +202,105 @@ class ConfidenceScorer:
         
         return confidence_report
 
+    def calculate_confidence_series(self, data, lookback=126, forecast_days=252):
+        """
+        Overall and component confidence for every row of `data`, in array operations.
+
+        Technical and market scores at row t equal calculate_overall_confidence's
+        for the frame ending at t (given its backtest_strategy metrics). The
+        statistical score cannot rerun the Monte Carlo for every row, so it
+        approximates it: VaR, return volatility and interval width are the
+        closed-form values of the GBM the simulation samples, and the
+        skewness test runs on the daily log returns rather than the simulated
+        mean path. It therefore carries no sampling noise and can differ from
+        the point score's. Moments and the backtest run over expanding
+        windows through cumulative sums. Rows with fewer than `lookback` rows
+        of history are NaN.
+
+        Args:
+            data: Frame with REQUIRED_INDICATORS, 'Close', 'Volume', 'Signal' and 'Daily_Return'
+            lookback: Rows of history a row needs before it is scored (at least MIN_LOOKBACK)
+
+        Returns:
+            DataFrame indexed like `data` with overall_confidence, the three
+            component scores and every breakdown score as columns
+        """
+        if lookback < self.MIN_LOOKBACK:
+            raise ValueError(f"lookback must be at least {self.MIN_LOOKBACK} rows")
+
+        close = data['Close'].to_numpy(dtype=np.float64)
+        n = len(close)
+        col = lambda name: data[name].to_numpy(dtype=np.float64)
+        scored = np.arange(n) >= lookback - 1
+
+        # Technical
+        ma_50, ma_200, ema_20, macd = col('50_MA'), col('200_MA'), col('20_EMA'), col('MACD')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            macd_ratio = np.abs(col('MACD_Histogram') / macd)
+            volume = col('Volume')
+            volume_ratio = volume / rolling_mean(volume, 20)
+        technical = {
+            'trend_agreement': ((ma_50 > ma_200) == (ema_20 > ma_50)).astype(np.float64),
+            'rsi_confidence': 1 - np.abs(50 - col('RSI')) / 50,
+            'macd_strength': np.where(np.isnan(macd_ratio), 0.5, np.minimum(macd_ratio, 1)),
+            'trend_strength': np.minimum(col('ADX') / 50, 1),
+            'volume_confidence': np.minimum(volume_ratio, 1.5) / 1.5
+        }
+        technical_weights = {'trend_agreement': 0.25, 'rsi_confidence': 0.15, 'macd_strength': 0.20,
+                             'trend_strength': 0.25, 'volume_confidence': 0.15}
+
+        # Statistical, closed-form: expanding moments of the daily log returns up to each row.
+        # Centering on the overall mean first keeps the cumulative sums accurate.
+        log_returns = np.log(close[1:] / close[:-1])
+        shift = log_returns.mean() if n > 1 else 0.0
+        centered = np.concatenate([[0.0], log_returns - shift])
+        count = np.arange(n, dtype=np.float64)  # returns available at row t
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s1, s2, s3 = (np.cumsum(centered ** k) for k in (1, 2, 3))
+            mean = s1 / count
+            m2 = s2 / count - mean ** 2
+            m3 = s3 / count - 3 * mean * s2 / count + 2 * mean ** 3
+            mu = mean + shift
+            sigma = np.sqrt(np.maximum(m2, 0) * count / (count - 1))
+            skew_p = np.where(count >= 8, _skewtest_pvalue(m3 / m2 ** 1.5, count), np.nan)
+        risk = _gbm_risk(mu, sigma, forecast_days)
+        statistical = _statistical_scores(skew_p, risk['VaR_95'], risk['VaR_99'], risk['Return_Volatility'],
+                                          risk['interval_width'])
+        statistical['skewness'] = np.where(count >= 8, statistical['skewness'], 0.5)
+
+        # Market: backtest_strategy metrics of every prefix of the data
+        daily_return = col('Daily_Return')
+        returns = strategy_returns(col('Signal'), daily_return)
+        days = np.arange(1, n + 1, dtype=np.float64)
+        total_return = np.cumprod(1 + returns) - 1
+        market_return = np.cumprod(1 + daily_return) - 1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r1, r2 = np.cumsum(returns), np.cumsum(returns ** 2)
+            std = np.sqrt(np.maximum(r2 - r1 * r1 / days, 0) / (days - 1))
+            sharpe = (total_return - RISK_FREE_RATE) / (std * np.sqrt(TRADING_DAYS))
+            win_rate = np.cumsum(returns > 0) / np.cumsum(returns != 0)
+        volatility = col('Volatility')
+        market = _market_scores(sharpe, win_rate, 1 - volatility / rolling_max(volatility, 252),
+                                total_return - market_return)
+
+        def combine(scores, weights):
+            return sum(scores[key] * weight for key, weight in weights.items())
+
+        technical_score = combine(technical, technical_weights)
+        statistical_score = combine(statistical, self.STATISTICAL_WEIGHTS)
+        market_score = combine(market, self.MARKET_WEIGHTS)
+        frame = pd.DataFrame({
+            'overall_confidence': (technical_score * self.weight_technical +
+                                   statistical_score * self.weight_statistical +
+                                   market_score * self.weight_market),
+            'technical_confidence': technical_score,
+            'statistical_confidence': statistical_score,
+            'market_confidence': market_score,
+            **technical, **statistical, **market
+        }, index=data.index)
+        frame[~scored] = np.nan
+        return frame
+
     def get_confidence_interpretation(self, confidence_score):
         """Provide interpretation of confidence scores"""
         if confidence_score >= 0.8:
@@ -182,148 +318,82 @@ class FinancialNarrativeGenerator:
     def __init__(self, symbol, api_key):
         self.symbol = symbol
         self.stock = yf.Ticker(symbol)
-        self.client = Groq(api_key=api_key)
+        self.client = get_groq_client(api_key)
         self.confidence_scorer = ConfidenceScorer()
+        self.indicators = None
+        
+    def fetch_historical_data(self, period="1y", indicators=None):
+        """
+        Fetch historical data and calculate comprehensive technical indicators.
         
-    def fetch_historical_data(self, period="1y"):
-        """Fetch historical data and calculate comprehensive technical indicators"""
+        Pass `indicators` (e.g. ['Signal', 'Daily_Return']) to compute only
+        those columns and whatever they depend on; the default is all of them.
+        """
         # Get base data
-        df = self.stock.history(period=period)
+        df = get_history(self.symbol, period=period)
         
         # Handle empty dataframes
         if df.empty:
             raise ValueError(f"No data found for symbol {self.symbol}")
             
-        # Create a dictionary to store all indicators
-        indicators = {}
-        
-        # Basic Moving Averages
-        indicators['50_MA'] = df['Close'].rolling(window=50, min_periods=1).mean()
-        indicators['200_MA'] = df['Close'].rolling(window=200, min_periods=1).mean()
-        indicators['20_EMA'] = EMAIndicator(close=df['Close'], window=20).ema_indicator()
-        
-        # MACD
-        macd = MACD(df['Close'])
-        indicators['MACD'] = macd.macd()
-        indicators['MACD_Signal'] = macd.macd_signal()
-        indicators['MACD_Histogram'] = macd.macd_diff()
-        
-        # RSI and Stochastic
-        indicators['RSI'] = RSIIndicator(df['Close']).rsi()
-        stoch = StochasticOscillator(df['High'], df['Low'], df['Close'])
-        indicators['Stoch_K'] = stoch.stoch()
-        indicators['Stoch_D'] = stoch.stoch_signal()
-        
-        # Bollinger Bands
-        bollinger = BollingerBands(df['Close'])
-        indicators['Bollinger_Upper'] = bollinger.bollinger_hband()
-        indicators['Bollinger_Lower'] = bollinger.bollinger_lband()
-        indicators['Bollinger_Mid'] = bollinger.bollinger_mavg()
-        indicators['BB_Width'] = (bollinger.bollinger_hband() - bollinger.bollinger_lband()) / bollinger.bollinger_mavg()
-        
-        # Volume Indicators
-        indicators['OBV'] = OnBalanceVolumeIndicator(df['Close'], df['Volume']).on_balance_volume()
-        indicators['ADI'] = AccDistIndexIndicator(df['High'], df['Low'], df['Close'], df['Volume']).acc_dist_index()
-        
-        # Price Channels
-        indicators['Upper_Channel'] = df['High'].rolling(window=20, min_periods=1).max()
-        indicators['Lower_Channel'] = df['Low'].rolling(window=20, min_periods=1).min()
-        
-        # Support and Resistance Levels
-        indicators['Support'] = df['Low'].rolling(window=20, min_periods=1).min()
-        indicators['Resistance'] = df['High'].rolling(window=20, min_periods=1).max()
-        
-        # Volatility Indicators
-        indicators['Daily_Return'] = df['Close'].pct_change()
-        indicators['Volatility'] = indicators['Daily_Return'].rolling(window=20, min_periods=1).std() * np.sqrt(252)
-        
-        # Calculate ADX
-        adx_data = self.calculate_adx(df)
-        indicators['ADX'] = adx_data
-        
-        # Trend Strength
-        indicators['Trend_Strength'] = np.abs(indicators['50_MA'] - indicators['200_MA']) / indicators['200_MA']
-        
-        # Generate trading signals
-        indicators['Signal'] = self.generate_trading_signals(df, indicators)
+        # Compute the requested indicators in one pass over NumPy arrays
+        self.indicators = compute_indicators(df, indicators)
         
+        return self._build_frame(df)
+    
+    def use_indicators(self, bundle):
+        """
+        Build the historical data frame from indicators computed elsewhere,
+        e.g. this symbol's slice of an IndicatorPanel, without fetching again
+        """
+        self.indicators = bundle
+        df = pd.DataFrame({column: bundle[column] for column in INPUT_COLUMNS if column in bundle},
+                          index=bundle.index)
+        return self._build_frame(df)
+    
+    def _build_frame(self, df):
         # Combine all indicators with original data efficiently
-        result_df = pd.concat([df, pd.DataFrame(indicators)], axis=1)
+        result_df = pd.concat([df, self.indicators.to_frame()], axis=1)
+        
+        # Panel rows where this symbol did not trade carry no price at all
+        result_df = result_df[result_df['Close'].notna()]
+        if result_df.empty:
+            raise ValueError(f"No data found for symbol {self.symbol}")
         
         # Final NaN cleanup
-        result_df = result_df.fillna(method='ffill').fillna(method='bfill').fillna(0)
+        result_df = result_df.ffill().bfill().fillna(0)
         
         return result_df
     
     def generate_trading_signals(self, df, indicators):
         """Generate trading signals based on technical indicators"""
-        signals = pd.Series(index=df.index, data=0)
-        
-        # RSI signals
-        signals += np.where(indicators['RSI'] < 30, 1, 0)  # Oversold
-        signals += np.where(indicators['RSI'] > 70, -1, 0)  # Overbought
-        
-        # MACD signals
-        signals += np.where(indicators['MACD'] > indicators['MACD_Signal'], 1, 0)
-        signals += np.where(indicators['MACD'] < indicators['MACD_Signal'], -1, 0)
-        
-        # Moving Average signals
-        signals += np.where(indicators['50_MA'] > indicators['200_MA'], 1, 0)
-        signals += np.where(indicators['50_MA'] < indicators['200_MA'], -1, 0)
-        
-        # Bollinger Bands signals
-        signals += np.where(df['Close'] < indicators['Bollinger_Lower'], 1, 0)
-        signals += np.where(df['Close'] > indicators['Bollinger_Upper'], -1, 0)
-        
-        return signals.apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0))
-    
-    def monte_carlo_simulation(self, df, num_simulations=1000, forecast_days=252):
-        """Perform Monte Carlo simulation for price forecasting with optimized DataFrame creation"""
-        returns = np.log(df['Close'] / df['Close'].shift(1))
-        mu = returns.mean()
-        sigma = returns.std()
-    
-        last_price = df['Close'].iloc[-1]
-    
-        # Pre-allocate a numpy array for all simulations
-        all_simulations = np.zeros((forecast_days + 1, num_simulations))
-        all_simulations[0] = last_price
-    
-        # Perform all simulations using numpy operations
-        for day in range(1, forecast_days + 1):
-            random_returns = np.random.normal(mu, sigma, num_simulations)
-            all_simulations[day] = all_simulations[day-1] * np.exp(random_returns)
-    
-        # Convert to DataFrame efficiently
-        simulation_df = pd.DataFrame(
-            all_simulations,
-            columns=[f'Sim_{i}' for i in range(num_simulations)]
+        signals = trading_signal(
+            df['Close'], indicators['RSI'], indicators['MACD'], indicators['MACD_Signal'],
+            indicators['50_MA'], indicators['200_MA'],
+            indicators['Bollinger_Upper'], indicators['Bollinger_Lower']
         )
+        return pd.Series(signals, index=df.index)
     
-        # Calculate confidence intervals
-        sim_results = {
-            'mean_path': simulation_df.mean(axis=1),
-            'upper_95': simulation_df.apply(lambda x: np.percentile(x, 95), axis=1),
-            'lower_95': simulation_df.apply(lambda x: np.percentile(x, 5), axis=1),
-            'max_path': simulation_df.max(axis=1),
-            'min_path': simulation_df.min(axis=1)
-        }
-    
-        # Calculate risk metrics
-        returns_distribution = ((simulation_df.iloc[-1] - last_price) / last_price)
-        var_95 = np.percentile(returns_distribution, 5)
-        var_99 = np.percentile(returns_distribution, 1)
-        expected_shortfall = returns_distribution[returns_distribution <= var_95].mean()
-    
-        risk_metrics = {
-            'VaR_95': var_95,
-            'VaR_99': var_99,
-            'Expected_Shortfall': expected_shortfall,
-            'Expected_Return': returns_distribution.mean(),
-            'Return_Volatility': returns_distribution.std()
-        }
-        
-        return sim_results, risk_metrics
+    def monte_carlo_simulation(self, df, num_simulations=1000, forecast_days=FORECAST_DAYS, rng=None, dtype=np.float64,
+                               chunk_size=None, workers=None, scheme='plain', horizons=None):
+        """
+        Perform Monte Carlo simulation for price forecasting.
+
+        Runs are reproducible: without an explicit `rng` (numpy Generator or
+        seed) the seed is derived from the symbol and the last bar, so the
+        same data gives the same paths and the narrative prompt can hit the
+        completion cache. dtype=np.float32 halves the memory of large runs.
+        Runs above `chunk_size` paths are streamed in chunks with bounded
+        memory, spread over `workers` processes when given. `scheme` selects variance
+        reduction: 'plain', 'antithetic', 'moment_matching' or 'sobol'.
+        `horizons` (days ahead) adds sim_results['horizon_risk'] with VaR,
+        ES and price bands per horizon as arrays.
+        """
+        if rng is None:
+            fingerprint = f"{self.symbol}|{df.index[-1]}|{df['Close'].iloc[-1]!r}"
+            rng = int.from_bytes(hashlib.sha256(fingerprint.encode()).digest()[:8], 'little')
+        return run_simulation(df['Close'], num_simulations, forecast_days, rng=rng, dtype=dtype,
+                              chunk_size=chunk_size, workers=workers, scheme=scheme, horizons=horizons)
 
     def backtest_strategy(self, df, initial_capital=100000):
         """Backtest the trading strategy"""
@@ -371,161 +441,169 @@ class FinancialNarrativeGenerator:
         
         return metrics, df
     
+    def sweep_strategy(self, df, grid=None, top=None):
+        """
+        Backtest a grid of RSI thresholds, MA windows and Bollinger widths in one pass.
+
+        Returns a DataFrame of parameter combinations ranked by Sharpe ratio,
+        see backtesting.parameter_sweep.
+        """
+        return parameter_sweep(df, grid=grid, top=top)
+    
+    def walk_forward_backtest(self, df, train_days=126, test_days=21, grid=None):
+        """
+        Rolling train/test backtest, see backtesting.walk_forward.
+
+        result['out_of_sample'] has the backtest_strategy metric keys and can
+        stand in for backtest_metrics when scoring confidence.
+        """
+        return walk_forward(df, train_days=train_days, test_days=test_days, grid=grid)
+    
     def calculate_adx(self, df, period=14):
         """Calculate Average Directional Index (ADX)"""
-        df = df.copy()
-        df['TR'] = np.maximum(
-            df['High'] - df['Low'],
-            np.maximum(
-                abs(df['High'] - df['Close'].shift(1)),
-                abs(df['Low'] - df['Close'].shift(1))
-            )
-        )
-        df['+DM'] = np.where(
-            (df['High'] - df['High'].shift(1)) > (df['Low'].shift(1) - df['Low']),
-            np.maximum(df['High'] - df['High'].shift(1), 0),
-            0
-        )
-        df['-DM'] = np.where(
-            (df['Low'].shift(1) - df['Low']) > (df['High'] - df['High'].shift(1)),
-            np.maximum(df['Low'].shift(1) - df['Low'], 0),
-            0
+        return pd.Series(adx(df['High'], df['Low'], df['Close'], period), index=df.index)
+    
+    # Groq request parameters shared by get_stock_insights and stream_stock_insights
+    INSIGHTS_REQUEST = {
+        'model': "deepseek-r1-distill-llama-70b",
+        'temperature': 0.7,
+        'max_tokens': 4096,
+        'top_p': 0.95
+    }
+
+    def build_insights_prompt(self, data, sim_results=None, risk_metrics=None, backtest_metrics=None):
+        """Prompt for the stock insights narrative, with confidence scores"""
+        # Calculate confidence scores
+        confidence_report = self.confidence_scorer.calculate_overall_confidence(
+            data, risk_metrics, sim_results, backtest_metrics
         )
-        
-        df['TR' + str(period)] = df['TR'].rolling(window=period, min_periods=1).mean()
-        df['+DM' + str(period)] = df['+DM'].rolling(window=period, min_periods=1).mean()
-        df['-DM' + str(period)] = df['-DM'].rolling(window=period, min_periods=1).mean()
-        
-        df['+DI' + str(period)] = 100 * df['+DM' + str(period)] / df['TR' + str(period)].replace(0, np.nan)
-        df['-DI' + str(period)] = 100 * df['-DM' + str(period)] / df['TR' + str(period)].replace(0, np.nan)
-        
-        denominator = (df['+DI' + str(period)] + df['-DI' + str(period)])
-        df['DX'] = 100 * abs(df['+DI' + str(period)] - df['-DI' + str(period)]) / denominator.replace(0, np.nan)
-        
-        df['DX'] = df['DX'].fillna(method='ffill').fillna(method='bfill').fillna(0)
-        return df['DX'].rolling(window=period, min_periods=1).mean()
     
-    def get_stock_insights(self, data, sim_results=None, risk_metrics=None, backtest_metrics=None):
-        """Generate comprehensive stock insights using Groq LLM with confidence scoring"""
-        try:
-            # Calculate confidence scores
-            confidence_report = self.confidence_scorer.calculate_overall_confidence(
-                data, risk_metrics, sim_results, backtest_metrics
-            )
-        
-            latest_data = {
-                'price': data['Close'].iloc[-1],
-                'volume': data['Volume'].iloc[-1],
-                'daily_return': data['Daily_Return'].iloc[-1] * 100,
-                'volatility': data['Volatility'].iloc[-1] * 100,
-                'trend_strength': data['Trend_Strength'].iloc[-1],
-                'adx': data['ADX'].iloc[-1],
-                'bb_width': data['BB_Width'].iloc[-1]
-            }
-        
-            # Base prompt with technical analysis and confidence scores
-            prompt = f"""
-            Comprehensive Technical Analysis for {self.symbol}
-            
-            Confidence Assessment:
-            - Overall Analysis Confidence: {confidence_report['overall_confidence']:.2f} ({self.confidence_scorer.get_confidence_interpretation(confidence_report['overall_confidence'])})
-            - Technical Analysis Confidence: {confidence_report['technical_confidence']['score']:.2f}
-            - Statistical Analysis Confidence: {confidence_report['statistical_confidence']['score']:.2f}
-            - Market Analysis Confidence: {confidence_report['market_confidence']['score']:.2f}
-            
-            Key Confidence Factors:
-            - Trend Agreement: {confidence_report['technical_confidence']['breakdown']['trend_agreement']:.2f}
-            - Volume Confirmation: {confidence_report['technical_confidence']['breakdown']['volume_confidence']:.2f}
-            - Statistical Reliability: {confidence_report['statistical_confidence']['breakdown']['skewness']:.2f}
-            - Market Stability: {confidence_report['market_confidence']['breakdown']['market_stability']:.2f}
-            
-            Price Metrics:
-            - Current Price: ${latest_data['price']:.2f}
-            - Daily Return: {latest_data['daily_return']:.2f}%
-            - Volume: {latest_data['volume']:,.0f}
-            
-            Moving Averages:
-            - 50-day MA: ${data['50_MA'].iloc[-1]:.2f}
-            - 200-day MA: ${data['200_MA'].iloc[-1]:.2f}
-            - 20-day EMA: ${data['20_EMA'].iloc[-1]:.2f}
-            
-            Momentum Indicators:
-            - RSI: {data['RSI'].iloc[-1]:.2f}
-            - Stochastic K: {data['Stoch_K'].iloc[-1]:.2f}
-            - Stochastic D: {data['Stoch_D'].iloc[-1]:.2f}
+        latest_data = {
+            'price': data['Close'].iloc[-1],
+            'volume': data['Volume'].iloc[-1],
+            'daily_return': data['Daily_Return'].iloc[-1] * 100,
+            'volatility': data['Volatility'].iloc[-1] * 100,
+            'trend_strength': data['Trend_Strength'].iloc[-1],
+            'adx': data['ADX'].iloc[-1],
+            'bb_width': data['BB_Width'].iloc[-1]
+        }
+    
+        # Base prompt with technical analysis and confidence scores
+        prompt = f"""
+        Comprehensive Technical Analysis for {self.symbol}
+        
+        Confidence Assessment:
+        - Overall Analysis Confidence: {confidence_report['overall_confidence']:.2f} ({self.confidence_scorer.get_confidence_interpretation(confidence_report['overall_confidence'])})
+        - Technical Analysis Confidence: {confidence_report['technical_confidence']['score']:.2f}
+        - Statistical Analysis Confidence: {confidence_report['statistical_confidence']['score']:.2f}
+        - Market Analysis Confidence: {confidence_report['market_confidence']['score']:.2f}
+        
+        Key Confidence Factors:
+        - Trend Agreement: {confidence_report['technical_confidence']['breakdown']['trend_agreement']:.2f}
+        - Volume Confirmation: {confidence_report['technical_confidence']['breakdown']['volume_confidence']:.2f}
+        - Statistical Reliability: {confidence_report['statistical_confidence']['breakdown']['skewness']:.2f}
+        - Market Stability: {confidence_report['market_confidence']['breakdown']['market_stability']:.2f}
+        
+        Price Metrics:
+        - Current Price: ${latest_data['price']:.2f}
+        - Daily Return: {latest_data['daily_return']:.2f}%
+        - Volume: {latest_data['volume']:,.0f}
+        
+        Moving Averages:
+        - 50-day MA: ${data['50_MA'].iloc[-1]:.2f}
+        - 200-day MA: ${data['200_MA'].iloc[-1]:.2f}
+        - 20-day EMA: ${data['20_EMA'].iloc[-1]:.2f}
+        
+        Momentum Indicators:
+        - RSI: {data['RSI'].iloc[-1]:.2f}
+        - Stochastic K: {data['Stoch_K'].iloc[-1]:.2f}
+        - Stochastic D: {data['Stoch_D'].iloc[-1]:.2f}
+        
+        Trend Indicators:
+        - MACD: {data['MACD'].iloc[-1]:.2f}
+        - MACD Signal: {data['MACD_Signal'].iloc[-1]:.2f}
+        - MACD Histogram: {data['MACD_Histogram'].iloc[-1]:.2f}
+        - ADX: {latest_data['adx']:.2f}
+        - Trend Strength: {latest_data['trend_strength']:.2f}
+        
+        Volatility Metrics:
+        - Current Volatility: {latest_data['volatility']:.2f}%
+        - Bollinger Width: {latest_data['bb_width']:.2f}
+        - Upper BB: ${data['Bollinger_Upper'].iloc[-1]:.2f}
+        - Lower BB: ${data['Bollinger_Lower'].iloc[-1]:.2f}
+        """
+    
+        # Add Monte Carlo simulation results if available
+        if sim_results and risk_metrics:
+            prompt += f"""
             
-            Trend Indicators:
-            - MACD: {data['MACD'].iloc[-1]:.2f}
-            - MACD Signal: {data['MACD_Signal'].iloc[-1]:.2f}
-            - MACD Histogram: {data['MACD_Histogram'].iloc[-1]:.2f}
-            - ADX: {latest_data['adx']:.2f}
-            - Trend Strength: {latest_data['trend_strength']:.2f}
+            Monte Carlo Simulation Results:
+            - Expected Price (1 year): ${sim_results['mean_path'].iloc[-1]:.2f}
+            - 95% Confidence Interval: ${sim_results['lower_95'].iloc[-1]:.2f} to ${sim_results['upper_95'].iloc[-1]:.2f}
             
-            Volatility Metrics:
-            - Current Volatility: {latest_data['volatility']:.2f}%
-            - Bollinger Width: {latest_data['bb_width']:.2f}
-            - Upper BB: ${data['Bollinger_Upper'].iloc[-1]:.2f}
-            - Lower BB: ${data['Bollinger_Lower'].iloc[-1]:.2f}
+            Risk Metrics (Confidence: {confidence_report['statistical_confidence']['score']:.2f}):
+            - 95% VaR: {risk_metrics['VaR_95']*100:.2f}%
+            - 99% VaR: {risk_metrics['VaR_99']*100:.2f}%
+            - Expected Shortfall: {risk_metrics['Expected_Shortfall']*100:.2f}%
+            - Expected Return: {risk_metrics['Expected_Return']*100:.2f}%
+            - Return Volatility: {risk_metrics['Return_Volatility']*100:.2f}%
             """
-        
-            # Add Monte Carlo simulation results if available
-            if sim_results and risk_metrics:
-                prompt += f"""
-                
-                Monte Carlo Simulation Results:
-                - Expected Price (1 year): ${sim_results['mean_path'].iloc[-1]:.2f}
-                - 95% Confidence Interval: ${sim_results['lower_95'].iloc[-1]:.2f} to ${sim_results['upper_95'].iloc[-1]:.2f}
-                
-                Risk Metrics (Confidence: {confidence_report['statistical_confidence']['score']:.2f}):
-                - 95% VaR: {risk_metrics['VaR_95']*100:.2f}%
-                - 99% VaR: {risk_metrics['VaR_99']*100:.2f}%
-                - Expected Shortfall: {risk_metrics['Expected_Shortfall']*100:.2f}%
-                - Expected Return: {risk_metrics['Expected_Return']*100:.2f}%
-                - Return Volatility: {risk_metrics['Return_Volatility']*100:.2f}%
-                """
-        
-            # Add backtesting results if available
-            if backtest_metrics:
-                prompt += f"""
-                
-                Backtesting Results (Confidence: {confidence_report['market_confidence']['score']:.2f}):
-                - Total Strategy Return: {backtest_metrics['Total_Return']*100:.2f}%
-                - Market Return: {backtest_metrics['Market_Return']*100:.2f}%
-                - Excess Return: {backtest_metrics['Excess_Return']*100:.2f}%
-                - Sharpe Ratio: {backtest_metrics['Sharpe_Ratio']:.2f}
-                - Maximum Drawdown: {backtest_metrics['Max_Drawdown']*100:.2f}%
-                - Win Rate: {backtest_metrics['Win_Rate']*100:.2f}%
-                """
-        
-            prompt += """
-            
-            Please provide a comprehensive analysis including:
-            1. Overall Trend Analysis and Strength (with confidence assessment)
-            2. Momentum Analysis (RSI, Stochastic, MACD) and reliability
-            3. Volatility Assessment and Risk Levels
-            4. Monte Carlo Simulation Insights and Prediction Confidence
-            5. Backtesting Performance Analysis and Strategy Reliability
-            6. Support/Resistance Levels and Potential Breakouts
-            7. Short-term and Medium-term Technical Outlook
-            8. Trading Strategy Recommendations with Confidence Levels
+    
+        # Add backtesting results if available
+        if backtest_metrics:
+            prompt += f"""
             
-            For each analysis component, please indicate the confidence level and explain the factors contributing to that confidence assessment.
+            Backtesting Results (Confidence: {confidence_report['market_confidence']['score']:.2f}):
+            - Total Strategy Return: {backtest_metrics['Total_Return']*100:.2f}%
+            - Market Return: {backtest_metrics['Market_Return']*100:.2f}%
+            - Excess Return: {backtest_metrics['Excess_Return']*100:.2f}%
+            - Sharpe Ratio: {backtest_metrics['Sharpe_Ratio']:.2f}
+            - Maximum Drawdown: {backtest_metrics['Max_Drawdown']*100:.2f}%
+            - Win Rate: {backtest_metrics['Win_Rate']*100:.2f}%
             """
-        
-            completion = self.client.chat.completions.create(
+    
+        prompt += """
+        
+        Please provide a comprehensive analysis including:
+        1. Overall Trend Analysis and Strength (with confidence assessment)
+        2. Momentum Analysis (RSI, Stochastic, MACD) and reliability
+        3. Volatility Assessment and Risk Levels
+        4. Monte Carlo Simulation Insights and Prediction Confidence
+        5. Backtesting Performance Analysis and Strategy Reliability
+        6. Support/Resistance Levels and Potential Breakouts
+        7. Short-term and Medium-term Technical Outlook
+        8. Trading Strategy Recommendations with Confidence Levels
+        
+        For each analysis component, please indicate the confidence level and explain the factors contributing to that confidence assessment.
+        """
+        return prompt
+
+    def get_stock_insights(self, data, sim_results=None, risk_metrics=None, backtest_metrics=None):
+        """Generate comprehensive stock insights using Groq LLM with confidence scoring"""
+        try:
+            prompt = self.build_insights_prompt(data, sim_results, risk_metrics, backtest_metrics)
+            return cached_completion(
+                self.client,
+                'stock_insights',
                 messages=[{"role": "user", "content": prompt}],
-                model="deepseek-r1-distill-llama-70b",
-                temperature=0.7,
-                max_tokens=4096,
-                top_p=0.95,
-                stream=False
+                stream=False,
+                **self.INSIGHTS_REQUEST
             )
         
-            return completion.choices[0].message.content
-        
         except Exception as e:
             return f"Error generating insights: {str(e)}"
 
+    def stream_stock_insights(self, data, sim_results=None, risk_metrics=None, backtest_metrics=None):
+        """Yield the insights narrative as it is generated, without the model's <think> section"""
+        prompt = self.build_insights_prompt(data, sim_results, risk_metrics, backtest_metrics)
+        chunks = stream_cached_completion(
+            self.client,
+            'stock_insights',
+            messages=[{"role": "user", "content": prompt}],
+            **self.INSIGHTS_REQUEST
+        )
+        return filtered(chunks, strip_think='deepseek' in self.INSIGHTS_REQUEST['model'])
+
     def plot_advanced_analysis(self, df):
         """Create comprehensive technical analysis plots without Monte Carlo simulation"""
         fig = make_subplots(rows=4, cols=1, 
@@ -0,0 +1,508 @@
+# indicators.py
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+TRADING_DAYS = 252
+
+# Columns produced by compute_indicators, in the order they are added to frames
+INDICATOR_COLUMNS = [
+    '50_MA', '200_MA', '20_EMA',
+    'MACD', 'MACD_Signal', 'MACD_Histogram',
+    'RSI', 'Stoch_K', 'Stoch_D',
+    'Bollinger_Upper', 'Bollinger_Lower', 'Bollinger_Mid', 'BB_Width',
+    'OBV', 'ADI',
+    'Upper_Channel', 'Lower_Channel', 'Support', 'Resistance',
+    'Daily_Return', 'Volatility',
+    'ADX', 'Trend_Strength', 'Signal'
+]
+
+
+# ---------------------------------------------------------------------------
+# Array primitives
+#
+# Every helper works along axis 0, so the same code handles one symbol (1-D)
+# or a dates x symbols matrix (2-D). NaN handling mirrors the pandas
+# equivalents the `ta` library is built on.
+# ---------------------------------------------------------------------------
+
+def _as_float(x):
+    return np.asarray(x, dtype=np.float64)
+
+
+def shift(x, periods=1):
+    """pandas `Series.shift` along axis 0"""
+    x = _as_float(x)
+    out = np.full_like(x, np.nan)
+    if periods > 0:
+        out[periods:] = x[:-periods]
+    elif periods < 0:
+        out[:periods] = x[-periods:]
+    else:
+        out[:] = x
+    return out
+
+
+def pct_change(x):
+    x = _as_float(x)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return x / shift(x) - 1
+
+
+def _window_sums(x, window):
+    """Sum of the last `window` values (NaN counted as 0) and count of non-NaN values"""
+    valid = ~np.isnan(x)
+    filled = np.where(valid, x, 0.0)
+
+    def trailing(values):
+        csum = np.cumsum(values, axis=0)
+        out = csum.copy()
+        out[window:] -= csum[:-window]
+        return out
+
+    return trailing(filled), trailing(valid.astype(np.float64)), trailing(filled * filled)
+
+
+def rolling_mean(x, window, min_periods=None):
+    """pandas `rolling(window, min_periods).mean()` in O(n) via cumulative sums"""
+    x = _as_float(x)
+    min_periods = window if min_periods is None else min_periods
+    total, count, _ = _window_sums(x, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = total / count
+    out[count < max(min_periods, 1)] = np.nan
+    return out
+
+
+def rolling_std(x, window, min_periods=None, ddof=1):
+    """pandas `rolling(window, min_periods).std(ddof)` in O(n) via cumulative sums"""
+    x = _as_float(x)
+    min_periods = window if min_periods is None else min_periods
+    total, count, total_sq = _window_sums(x, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+        var = (total_sq - count * mean * mean) / (count - ddof)
+    # Cumulative sums leave tiny negative residues on flat windows
+    out = np.sqrt(np.maximum(var, 0.0))
+    out[(count < max(min_periods, 1)) | (count - ddof <= 0)] = np.nan
+    return out
+
+
+def _rolling_extreme(x, window, min_periods, reducer, fill):
+    x = _as_float(x)
+    min_periods = window if min_periods is None else min_periods
+    pad_shape = (window - 1,) + x.shape[1:]
+    padded = np.concatenate([np.full(pad_shape, fill), np.where(np.isnan(x), fill, x)], axis=0)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)
+    out = reducer(windows, axis=-1)
+    _, count, _ = _window_sums(x, window)
+    out[count < max(min_periods, 1)] = np.nan
+    return out
+
+
+def rolling_max(x, window, min_periods=None):
+    return _rolling_extreme(x, window, min_periods, np.max, -np.inf)
+
+
+def rolling_min(x, window, min_periods=None):
+    return _rolling_extreme(x, window, min_periods, np.min, np.inf)
+
+
+def ewm_mean(x, span=None, alpha=None, min_periods=0):
+    """
+    pandas `ewm(span|alpha, min_periods, adjust=False).mean()` as one linear filter.
+
+    Leading NaNs are skipped the way pandas skips them; interior NaNs are
+    carried forward.
+    """
+    x = _as_float(x)
+    if alpha is None:
+        alpha = 2.0 / (span + 1.0)
+
+    valid = ~np.isnan(x)
+    first_valid = np.where(valid.any(axis=0), valid.argmax(axis=0), x.shape[0])
+    filled = pd.DataFrame(x).ffill().bfill().to_numpy().reshape(x.shape)
+    filled = np.where(np.isnan(filled), 0.0, filled)
+
+    # y[t] = alpha * x[t] + (1 - alpha) * y[t-1], seeded so that y[0] = x[0]
+    zi = ((1 - alpha) * filled[:1])
+    out = lfilter([alpha], [1.0, alpha - 1.0], filled, axis=0, zi=zi)[0]
+
+    rows = np.arange(x.shape[0]).reshape((-1,) + (1,) * (x.ndim - 1))
+    out[rows < first_valid + max(min_periods, 1) - 1] = np.nan
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Indicators (default windows match the `ta` library defaults we used)
+# ---------------------------------------------------------------------------
+
+def ema(close, window=20):
+    return ewm_mean(close, span=window, min_periods=window)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def rsi(close, window=14):
+    diff = _as_float(close) - shift(close)
+    diff[0] = 0.0
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    avg_up = ewm_mean(up, alpha=1.0 / window, min_periods=window)
+    avg_down = ewm_mean(down, alpha=1.0 / window, min_periods=window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(avg_down == 0, 100.0, 100 - 100 / (1 + avg_up / avg_down))
+
+
+def stochastic(high, low, close, window=14, smooth_window=3):
+    lowest = rolling_min(low, window)
+    highest = rolling_max(high, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = 100 * (_as_float(close) - lowest) / (highest - lowest)
+    return k, rolling_mean(k, smooth_window)
+
+
+def bollinger(close, window=20, num_std=2):
+    mid = rolling_mean(close, window)
+    std = rolling_std(close, window, ddof=0)
+    return mid + num_std * std, mid - num_std * std, mid
+
+
+def on_balance_volume(close, volume):
+    volume = _as_float(volume)
+    signed = np.where(_as_float(close) < shift(close), -volume, volume)
+    # nancumsum so a panel column with missing days keeps accumulating
+    return np.nancumsum(signed, axis=0)
+
+
+def accumulation_distribution(high, low, close, volume):
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        clv = ((close - low) - (high - close)) / (high - low)
+    clv = np.where(np.isnan(clv), 0.0, clv)
+    return np.nancumsum(clv * _as_float(volume), axis=0)
+
+
+def adx(high, low, close, period=14):
+    """Simple-average ADX, same construction as FinancialNarrativeGenerator.calculate_adx"""
+    high, low = _as_float(high), _as_float(low)
+    prev_close, prev_high, prev_low = shift(close), shift(high), shift(low)
+
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    up_move = high - prev_high
+    down_move = prev_low - low
+    with np.errstate(invalid='ignore'):
+        plus_dm = np.where(up_move > down_move, np.maximum(up_move, 0), 0.0)
+        minus_dm = np.where(down_move > up_move, np.maximum(down_move, 0), 0.0)
+
+    tr_avg = rolling_mean(true_range, period, min_periods=1)
+    tr_avg = np.where(tr_avg == 0, np.nan, tr_avg)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100 * rolling_mean(plus_dm, period, min_periods=1) / tr_avg
+        minus_di = 100 * rolling_mean(minus_dm, period, min_periods=1) / tr_avg
+        denominator = plus_di + minus_di
+        dx = 100 * np.abs(plus_di - minus_di) / np.where(denominator == 0, np.nan, denominator)
+
+    dx = pd.DataFrame(dx).ffill().bfill().fillna(0).to_numpy().reshape(dx.shape)
+    return rolling_mean(dx, period, min_periods=1)
+
+
+def trading_signal(close, rsi_values, macd_line, macd_signal, ma_short, ma_long, bb_upper, bb_lower):
+    """Net vote of the RSI, MACD, moving-average and Bollinger rules, clipped to -1/0/1"""
+    close = _as_float(close)
+    with np.errstate(invalid='ignore'):
+        votes = (
+            (rsi_values < 30).astype(np.int64) - (rsi_values > 70)
+            + (macd_line > macd_signal) - (macd_line < macd_signal)
+            + (ma_short > ma_long) - (ma_short < ma_long)
+            + (close < bb_lower) - (close > bb_upper)
+        )
+    return np.sign(votes)
+
+
+# ---------------------------------------------------------------------------
+# Column registry
+#
+# Each producer computes one group of columns from columns it declares as
+# requirements. compute_indicators resolves the requirements of whatever the
+# caller asks for and runs only those producers, so unused indicators cost
+# nothing. Producers are registered in dependency order.
+# ---------------------------------------------------------------------------
+
+INPUT_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+_PRODUCERS = []  # (outputs, requires, fn)
+_PRODUCER_OF = {}  # column -> index into _PRODUCERS
+
+
+def _produces(outputs, requires):
+    def register(fn):
+        for column in outputs:
+            _PRODUCER_OF[column] = len(_PRODUCERS)
+        _PRODUCERS.append((outputs, requires, fn))
+        return fn
+    return register
+
+
+@_produces(('50_MA',), ('Close',))
+def _ma_50(c):
+    return rolling_mean(c['Close'], 50, min_periods=1),
+
+
+@_produces(('200_MA',), ('Close',))
+def _ma_200(c):
+    return rolling_mean(c['Close'], 200, min_periods=1),
+
+
+@_produces(('20_EMA',), ('Close',))
+def _ema_20(c):
+    return ema(c['Close'], 20),
+
+
+@_produces(('MACD', 'MACD_Signal', 'MACD_Histogram'), ('Close',))
+def _macd(c):
+    return macd(c['Close'])
+
+
+@_produces(('RSI',), ('Close',))
+def _rsi(c):
+    return rsi(c['Close']),
+
+
+@_produces(('Stoch_K', 'Stoch_D'), ('High', 'Low', 'Close'))
+def _stochastic(c):
+    return stochastic(c['High'], c['Low'], c['Close'])
+
+
+@_produces(('Bollinger_Upper', 'Bollinger_Lower', 'Bollinger_Mid'), ('Close',))
+def _bollinger(c):
+    return bollinger(c['Close'])
+
+
+@_produces(('BB_Width',), ('Bollinger_Upper', 'Bollinger_Lower', 'Bollinger_Mid'))
+def _bb_width(c):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (c['Bollinger_Upper'] - c['Bollinger_Lower']) / c['Bollinger_Mid'],
+
+
+@_produces(('OBV',), ('Close', 'Volume'))
+def _obv(c):
+    return on_balance_volume(c['Close'], c['Volume']),
+
+
+@_produces(('ADI',), ('High', 'Low', 'Close', 'Volume'))
+def _adi(c):
+    return accumulation_distribution(c['High'], c['Low'], c['Close'], c['Volume']),
+
+
+@_produces(('Upper_Channel', 'Resistance'), ('High',))
+def _upper_channel(c):
+    channel = rolling_max(c['High'], 20, min_periods=1)
+    return channel, channel
+
+
+@_produces(('Lower_Channel', 'Support'), ('Low',))
+def _lower_channel(c):
+    channel = rolling_min(c['Low'], 20, min_periods=1)
+    return channel, channel
+
+
+@_produces(('Daily_Return',), ('Close',))
+def _daily_return(c):
+    return pct_change(c['Close']),
+
+
+@_produces(('Volatility',), ('Daily_Return',))
+def _volatility(c):
+    return rolling_std(c['Daily_Return'], 20, min_periods=1) * np.sqrt(TRADING_DAYS),
+
+
+@_produces(('ADX',), ('High', 'Low', 'Close'))
+def _adx(c):
+    return adx(c['High'], c['Low'], c['Close']),
+
+
+@_produces(('Trend_Strength',), ('50_MA', '200_MA'))
+def _trend_strength(c):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.abs(c['50_MA'] - c['200_MA']) / c['200_MA'],
+
+
+@_produces(('Signal',), ('Close', 'RSI', 'MACD', 'MACD_Signal', '50_MA', '200_MA',
+                         'Bollinger_Upper', 'Bollinger_Lower'))
+def _signal(c):
+    return trading_signal(c['Close'], c['RSI'], c['MACD'], c['MACD_Signal'],
+                          c['50_MA'], c['200_MA'], c['Bollinger_Upper'], c['Bollinger_Lower']),
+
+
+def resolve_columns(columns):
+    """
+    Return the producer indices needed for `columns`, dependencies included,
+    in the order they must run.
+    """
+    needed = set()
+    pending = list(columns)
+    while pending:
+        column = pending.pop()
+        if column in INPUT_COLUMNS:
+            continue
+        if column not in _PRODUCER_OF:
+            raise ValueError(f"Unknown indicator: {column}")
+        idx = _PRODUCER_OF[column]
+        if idx not in needed:
+            needed.add(idx)
+            pending.extend(_PRODUCERS[idx][1])
+    return sorted(needed)
+
+
+# ---------------------------------------------------------------------------
+# Bundle
+# ---------------------------------------------------------------------------
+
+class IndicatorBundle:
+    """
+    Column bundle of OHLCV inputs and computed indicator arrays sharing one index.
+
+    Supports `bundle['RSI']` like a DataFrame so ConfidenceScorer can read
+    either, and converts to a DataFrame only when a caller needs one.
+    """
+
+    def __init__(self, index, columns):
+        self.index = index
+        self.columns = columns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def indicator_names(self):
+        """Computed indicator columns, in INDICATOR_COLUMNS order"""
+        return [name for name in INDICATOR_COLUMNS if name in self.columns]
+
+    def latest(self, name):
+        return float(self.columns[name][-1])
+
+    def to_frame(self, names=None):
+        names = self.indicator_names if names is None else names
+        return pd.DataFrame({name: self.columns[name] for name in names}, index=self.index)
+
+
+def _compute(index, get_input, columns):
+    producers = resolve_columns(INDICATOR_COLUMNS if columns is None else columns)
+
+    cols = {}
+    for idx in producers:
+        outputs, requires, fn = _PRODUCERS[idx]
+        for name in requires:
+            if name in INPUT_COLUMNS and name not in cols:
+                cols[name] = get_input(name)
+        cols.update(zip(outputs, fn(cols)))
+    return cols
+
+
+def compute_indicators(df, columns=None):
+    """
+    Compute indicators for an OHLCV frame.
+
+    Args:
+        df: Frame with Open/High/Low/Close/Volume columns
+        columns: Indicator names wanted (default: all of INDICATOR_COLUMNS).
+                 Anything they depend on is computed too, nothing else is.
+
+    Input columns are pulled out as NumPy arrays once, and every series is
+    computed exactly once; shared intermediates (moving averages, MACD,
+    Bollinger bands) feed later columns without being recomputed.
+    """
+    cols = _compute(df.index, lambda name: df[name].to_numpy(dtype=np.float64), columns)
+    return IndicatorBundle(df.index, cols)
+
+
+class IndicatorPanel:
+    """
+    Indicators for many symbols at once, as groups of symbols sharing a calendar.
+
+    Each group holds its own dates and, per column, a dates x symbols matrix.
+    for_symbol() hands out an IndicatorBundle whose arrays are column views
+    into its group's matrices, so splitting the panel per symbol copies nothing.
+    """
+
+    def __init__(self, groups):
+        # groups: list of (index, symbols, {column: dates x symbols matrix})
+        self.groups = groups
+        self.symbols = [symbol for _, symbols, _ in groups for symbol in symbols]
+        self._position = {symbol: (g, j) for g, (_, symbols, _) in enumerate(groups)
+                          for j, symbol in enumerate(symbols)}
+
+    def __contains__(self, symbol):
+        return symbol in self._position
+
+    def for_symbol(self, symbol):
+        g, j = self._position[symbol]
+        index, _, columns = self.groups[g]
+        return IndicatorBundle(index, {name: matrix[:, j] for name, matrix in columns.items()})
+
+    def latest(self, names=None):
+        """One row per symbol with the last value of each indicator, on that symbol's last trading day"""
+        frames = []
+        for _, symbols, columns in self.groups:
+            group_names = [n for n in INDICATOR_COLUMNS if n in columns] if names is None else names
+            frames.append(pd.DataFrame({name: columns[name][-1] for name in group_names}, index=symbols))
+        return pd.concat(frames).loc[self.symbols]
+
+
+def compute_panel(index, symbols, close, high=None, low=None, volume=None, open_=None, columns=None):
+    """
+    Compute indicators column-wise for a whole universe in vectorized passes.
+
+    Symbols are batched by calendar: those with prices on exactly the same
+    rows form one group, computed on those rows only. Windows and averages
+    therefore never see a gap where another symbol's exchange traded and
+    this one did not, and every symbol's values equal compute_indicators on
+    its own history. A universe from one exchange is a single group.
+
+    Args:
+        index: Dates shared by every row of the matrices
+        symbols: Column labels of the matrices
+        close, high, low, volume, open_: Aligned dates x symbols arrays;
+            close, which defines each symbol's calendar, and the ones the
+            requested columns need have to be given. Missing days should be NaN.
+        columns: Indicator names wanted (default: all of INDICATOR_COLUMNS)
+    """
+    inputs = {name: _as_float(matrix) for name, matrix in
+              {'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}.items()
+              if matrix is not None}
+    traded = ~np.isnan(inputs['Close'])
+
+    calendars = {}
+    for j in range(traded.shape[1]):
+        calendars.setdefault(traded[:, j].tobytes(), []).append(j)
+
+    groups = []
+    for members in calendars.values():
+        rows = traded[:, members[0]]
+        if not rows.any():
+            continue
+        group = {name: matrix[np.ix_(rows, members)] for name, matrix in inputs.items()}
+
+        def get_input(name):
+            if name not in group:
+                raise ValueError(f"{name} matrix is required for the requested indicators")
+            return group[name]
+
+        cols = _compute(index[rows], get_input, columns)
+        # Keep every price matrix handed in, per-symbol views need them for frames and charts
+        for name, matrix in group.items():
+            cols.setdefault(name, matrix)
+        groups.append((index[rows], [symbols[j] for j in members], cols))
+    return IndicatorPanel(groups)
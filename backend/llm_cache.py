@@ -0,0 +1,184 @@
+# llm_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from concurrency import SingleFlight
+from llm_stream import stream_completion
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'llm_cache.db')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# How long a completion stays valid, per call site (seconds). Narratives go
+# stale with the market; article and document summaries never change.
+CACHE_TTLS = {
+    'stock_insights': 6 * 3600,
+    'financial_analysis': 6 * 3600,
+    'news_analysis': 7 * 24 * 3600,
+    'document_summary': 30 * 24 * 3600,
+}
+DEFAULT_TTL = 3600
+
+
+def completion_key(model, messages, temperature=None, max_tokens=None):
+    """Content address of a request: SHA-256 over its canonical JSON"""
+    payload = json.dumps(
+        {'model': model, 'messages': messages, 'temperature': temperature, 'max_tokens': max_tokens},
+        sort_keys=True, separators=(',', ':'), ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CompletionCache:
+    """
+    SQLite-backed cache of LLM completion texts, keyed by completion_key.
+
+    Entries expire after their own TTL. When the stored text exceeds
+    `max_bytes`, the least recently used entries are evicted.
+    """
+
+    def __init__(self, db_path=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            db_path: SQLite file (default: backend/data/llm_cache.db)
+            max_bytes: Upper bound on the total size of cached texts
+        """
+        self.db_path = db_path or os.environ.get('LLM_CACHE_DB', DEFAULT_DB_PATH)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, model TEXT, content TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        """Connection for one transaction, committed (or rolled back) and closed on exit"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Return the cached text for a key, or None if missing or expired"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT content, expires_at FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key, content, ttl=DEFAULT_TTL, model=None):
+        now = time.time()
+        size = len(content.encode('utf-8'))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, model, content, size, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, content, size, now + ttl, now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM completions WHERE expires_at < ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Walk from least recently used, dropping rows until under budget
+        excess = total - self.max_bytes
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM completions ORDER BY last_used"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM completions WHERE key = ?", doomed)
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM completions")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_flights = SingleFlight()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CompletionCache()
+        return _cache
+
+
+def cached_completion(client, call_site, model, messages, temperature=None, max_tokens=None, **kwargs):
+    """
+    Text of a chat completion, served from the persistent cache when possible.
+
+    `call_site` picks the TTL from CACHE_TTLS. Identical requests in flight
+    at the same time share one API call. Only non-empty responses are
+    cached, so errors are retried on the next request. An empty response
+    is returned as '' (never None), so callers can strip it safely.
+    """
+    key = completion_key(model, messages, temperature, max_tokens)
+    cache = get_cache()
+    content = cache.get(key)
+    if content is not None:
+        return content
+
+    def load():
+        content = cache.get(key)
+        if content is not None:
+            return content
+        completion = client.chat.completions.create(
+            model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, **kwargs
+        )
+        content = completion.choices[0].message.content or ''
+        if content:
+            cache.put(key, content, ttl=CACHE_TTLS.get(call_site, DEFAULT_TTL), model=model)
+        return content
+
+    return _flights.do(key, load)
+
+
+def stream_cached_completion(client, call_site, model, messages, temperature=None, max_tokens=None, **kwargs):
+    """
+    Yield the text of a chat completion as it is generated.
+
+    A cached completion is replayed as a single chunk. Otherwise the request
+    is made with stream=True and each delta is yielded as it arrives; the
+    assembled text is cached once the stream finishes, so a later identical
+    request (streamed or not) is served from disk.
+    """
+    key = completion_key(model, messages, temperature, max_tokens)
+    cache = get_cache()
+    content = cache.get(key)
+    if content is not None:
+        yield content
+        return
+
+    parts = []
+    for delta in stream_completion(client, model=model, messages=messages, temperature=temperature,
+                                   max_tokens=max_tokens, **kwargs):
+        parts.append(delta)
+        yield delta
+
+    content = ''.join(parts)
+    if content:
+        cache.put(key, content, ttl=CACHE_TTLS.get(call_site, DEFAULT_TTL), model=model)
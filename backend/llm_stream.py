@@ -0,0 +1,103 @@
+# llm_stream.py
+
+import json
+
+THINK_OPEN = '<think>'
+THINK_CLOSE = '</think>'
+
+
+def _partial_tag(text, tag):
+    """Length of the longest suffix of `text` that is a proper prefix of `tag`"""
+    for size in range(min(len(text), len(tag) - 1), 0, -1):
+        if text.endswith(tag[:size]):
+            return size
+    return 0
+
+
+class ThinkFilter:
+    """
+    Drop <think>...</think> sections from a token stream as it arrives.
+
+    Tags may be split across chunks, so text that could be the start of a
+    tag is held back until the next chunk decides it. Leading whitespace of
+    the visible text is dropped, as the non-streaming path's .strip() does.
+    """
+
+    def __init__(self):
+        self.inside = False
+        self.buffer = ''
+        self.started = False
+
+    def _emit(self, text):
+        if not self.started:
+            text = text.lstrip()
+            self.started = bool(text)
+        return text
+
+    def feed(self, text):
+        """Add a chunk and return the visible text it completes"""
+        self.buffer += text
+        out = []
+        while self.buffer:
+            if self.inside:
+                end = self.buffer.find(THINK_CLOSE)
+                if end < 0:
+                    keep = _partial_tag(self.buffer, THINK_CLOSE)
+                    self.buffer = self.buffer[len(self.buffer) - keep:]
+                    break
+                self.buffer = self.buffer[end + len(THINK_CLOSE):]
+                self.inside = False
+            else:
+                start = self.buffer.find(THINK_OPEN)
+                if start < 0:
+                    keep = _partial_tag(self.buffer, THINK_OPEN)
+                    out.append(self.buffer[:len(self.buffer) - keep])
+                    self.buffer = self.buffer[len(self.buffer) - keep:]
+                    break
+                out.append(self.buffer[:start])
+                self.buffer = self.buffer[start + len(THINK_OPEN):]
+                self.inside = True
+        return self._emit(''.join(out))
+
+    def flush(self):
+        """Visible text still held back at the end of the stream"""
+        text, self.buffer = ('' if self.inside else self.buffer), ''
+        return self._emit(text)
+
+
+def completion_deltas(stream):
+    """Text deltas of a streamed chat completion, skipping empty and role-only chunks"""
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+def stream_completion(client, **kwargs):
+    """Yield the text of an uncached chat completion as it is generated"""
+    kwargs['stream'] = True
+    yield from completion_deltas(client.chat.completions.create(**kwargs))
+
+
+def filtered(chunks, strip_think=True):
+    """Pass a stream of text chunks through a ThinkFilter, skipping empty output"""
+    if not strip_think:
+        yield from chunks
+        return
+    think = ThinkFilter()
+    for chunk in chunks:
+        text = think.feed(chunk)
+        if text:
+            yield text
+    text = think.flush()
+    if text:
+        yield text
+
+
+def sse_event(data, event=None):
+    """Format one Server-Sent Event with a JSON payload"""
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,347 @@
+# market_data.py
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import yfinance as yf
+
+from bar_store import PERIOD_OFFSETS, get_store
+from concurrency import SingleFlight
+from metadata_store import MetadataStore
+
+# How long cached bars stay fresh, by bar interval (seconds)
+HISTORY_TTL = {
+    '1m': 15,
+    '2m': 30,
+    '5m': 60,
+    '15m': 120,
+    '30m': 300,
+    '60m': 300,
+    '1h': 300,
+    '90m': 600,
+}
+DEFAULT_HISTORY_TTL = 900  # Daily and longer bars
+QUOTE_TTL = 1  # Bulk quotes are refreshed at most once per broadcast tick
+LIVE_TTL = 1  # Intraday bars pushed to live subscribers, once per tick
+PANEL_FETCH_WORKERS = 8  # Concurrent history fetches for get_history_panel
+METADATA_TTL = 24 * 3600  # Names, sector, market cap, ...
+PRICE_TTL = 15  # Price-like fields of Ticker.info
+MISSING_INFO_TTL = 600  # Failed metadata lookups, retried after this
+
+# Ticker.info fields that move with the market and must not share the long metadata TTL
+PRICE_FIELDS = {
+    'currentPrice', 'regularMarketPrice', 'regularMarketOpen', 'regularMarketDayHigh',
+    'regularMarketDayLow', 'regularMarketVolume', 'regularMarketChange',
+    'regularMarketChangePercent', 'regularMarketPreviousClose', 'previousClose',
+    'open', 'dayHigh', 'dayLow', 'volume', 'bid', 'ask', 'bidSize', 'askSize'
+}
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a per-entry time-to-live"""
+
+    def __init__(self, maxsize=256, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (hit, value) for a key, dropping it if it has expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return False, None
+
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entry when full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+_history_cache = TTLCache(maxsize=512, ttl=DEFAULT_HISTORY_TTL)
+_flights = SingleFlight()
+_metadata_cache = TTLCache(maxsize=2048, ttl=METADATA_TTL)
+_price_cache = TTLCache(maxsize=2048, ttl=PRICE_TTL)
+_metadata_store = None
+_metadata_store_lock = threading.Lock()
+
+
+def get_history(symbol, period="1y", interval="1d"):
+    """
+    Fetch OHLCV bars for a symbol, served from the shared in-process cache when fresh.
+
+    Daily bars are read from the local bar store, which only goes to Yahoo
+    for bars newer than the last stored one. Concurrent misses for the same
+    key share a single upstream fetch. Returns a copy so callers are free to
+    add columns to the frame.
+    """
+    key = (symbol.upper(), period, interval)
+
+    def load():
+        # A flight that finished just before ours may have filled the cache
+        hit, df = _history_cache.get(key)
+        if hit:
+            return df
+        if interval == '1d' and (period in PERIOD_OFFSETS or period in ('ytd', 'max')):
+            df = get_store().get_history(symbol, period=period)
+        else:
+            df = yf.Ticker(symbol).history(period=period, interval=interval)
+        # Don't pin empty responses, a retry may well succeed
+        if not df.empty:
+            _history_cache.set(key, df, ttl=HISTORY_TTL.get(interval, DEFAULT_HISTORY_TTL))
+        return df
+
+    hit, df = _history_cache.get(key)
+    if not hit:
+        df = _flights.do(('history',) + key, load)
+    return df.copy()
+
+
+_live_cache = TTLCache(maxsize=256, ttl=LIVE_TTL)
+
+
+def get_live_bars(symbol, interval='1m'):
+    """
+    Today's intraday bars for a symbol, at most LIVE_TTL seconds old.
+
+    Meant for per-subscriber update loops: however many clients follow a
+    symbol, they share one Yahoo fetch per tick. Kept apart from
+    get_history, whose intraday TTL is too long for a live feed.
+    """
+    key = (symbol.upper(), interval)
+
+    def load():
+        hit, df = _live_cache.get(key)
+        if hit:
+            return df
+        df = yf.Ticker(symbol).history(period='1d', interval=interval)
+        if not df.empty:
+            _live_cache.set(key, df)
+        return df
+
+    hit, df = _live_cache.get(key)
+    if not hit:
+        df = _flights.do(('live',) + key, load)
+    return df.copy()
+
+
+def get_history_panel(symbols, period="1y", interval="1d"):
+    """
+    Aligned dates x symbols OHLCV matrices for a universe, built from get_history.
+
+    Dates are aligned on the exchange-local calendar day, so symbols listed in
+    different timezones share rows; days a symbol did not trade are NaN.
+    Returns (index, symbols_with_data, {'Open': matrix, ..., 'Volume': matrix}),
+    or None when no symbol had data. Symbols are fetched PANEL_FETCH_WORKERS
+    at a time.
+    """
+    def fetch(symbol):
+        try:
+            return get_history(symbol, period=period, interval=interval)
+        except Exception as e:
+            print(f"Error fetching history for {symbol}: {str(e)}")
+            return None
+
+    symbols = list(dict.fromkeys(symbols))
+    with ThreadPoolExecutor(max_workers=PANEL_FETCH_WORKERS) as executor:
+        histories = list(executor.map(fetch, symbols))
+
+    frames = {}
+    for symbol, df in zip(symbols, histories):
+        if df is None or df.empty:
+            continue
+        if df.index.tz is not None:
+            df.index = df.index.tz_localize(None)
+        if interval == '1d':
+            df.index = df.index.normalize()
+        frames[symbol] = df[~df.index.duplicated(keep='last')]
+
+    if not frames:
+        return None
+
+    fields = {}
+    for field in ('Open', 'High', 'Low', 'Close', 'Volume'):
+        aligned = pd.concat({symbol: df[field] for symbol, df in frames.items()}, axis=1).sort_index()
+        fields[field] = aligned.to_numpy(dtype='float64')
+    return aligned.index, list(frames), fields
+
+
+def get_info(symbol, include_prices=True):
+    """
+    Fetch `Ticker.info` for a symbol.
+
+    Slow-moving metadata is cached in memory and in SQLite for METADATA_TTL;
+    price-like fields (PRICE_FIELDS) get their own PRICE_TTL. Pass
+    include_prices=False when only metadata is needed so a stale price
+    never forces a Yahoo round-trip. Identical requests in flight are shared.
+    A lookup that fails is remembered for MISSING_INFO_TTL, during which
+    metadata-only calls get an empty dict instead of asking Yahoo again.
+    """
+    key = symbol.upper()
+
+    metadata = _cached_metadata(key)
+    prices = None
+    if include_prices:
+        _, prices = _price_cache.get(key)
+
+    if metadata is None or (include_prices and prices is None):
+        metadata, prices = _flights.do(('info', key), lambda: _fetch_info(symbol, key))
+
+    info = dict(metadata)
+    if include_prices:
+        info.update(prices)
+    return info
+
+
+def _cached_metadata(key):
+    hit, metadata = _metadata_cache.get(key)
+    if hit:
+        return metadata
+    metadata = _get_metadata_store().get(key)
+    if metadata is not None:
+        _metadata_cache.set(key, metadata)
+    return metadata
+
+
+def _fetch_info(symbol, key):
+    try:
+        info = yf.Ticker(symbol).info or {}
+    except Exception:
+        _metadata_cache.set(key, {}, ttl=MISSING_INFO_TTL)
+        raise
+    metadata = {k: v for k, v in info.items() if k not in PRICE_FIELDS}
+    prices = {k: v for k, v in info.items() if k in PRICE_FIELDS}
+
+    _price_cache.set(key, prices)
+    # Don't persist failed lookups, Yahoo returns a near-empty dict for those.
+    # They are kept in memory for a while so callers don't retry every tick.
+    if len(metadata) > 1:
+        _metadata_cache.set(key, metadata)
+        _get_metadata_store().put(key, metadata)
+    else:
+        _metadata_cache.set(key, metadata, ttl=MISSING_INFO_TTL)
+    return metadata, prices
+
+
+def _get_metadata_store():
+    global _metadata_store
+    with _metadata_store_lock:
+        if _metadata_store is None:
+            _metadata_store = MetadataStore(ttl=METADATA_TTL)
+        return _metadata_store
+
+
+def _last_quote(bars):
+    """Reduce one symbol's intraday bars to a quote dict, or None if it has no data"""
+    bars = bars.dropna(subset=['Close'])
+    if bars.empty:
+        return None
+
+    last = bars.iloc[-1]
+    session = bars[bars.index.normalize() == bars.index[-1].normalize()]
+    previous = bars[bars.index.normalize() < bars.index[-1].normalize()]
+    prev_close = previous['Close'].iloc[-1] if not previous.empty else session['Open'].iloc[0]
+
+    return {
+        'price': float(last['Close']),
+        'open': float(last['Open']),
+        'high': float(last['High']),
+        'low': float(last['Low']),
+        'volume': float(last['Volume']),
+        'prev_close': float(prev_close),
+        'change_percent': float((last['Close'] - prev_close) / prev_close * 100) if prev_close else 0.0,
+        'timestamp': str(bars.index[-1])
+    }
+
+
+def _download_quotes(symbols, interval):
+    # Two sessions so the previous close is available for the day's change
+    frame = yf.download(
+        tickers=list(symbols),
+        period='2d',
+        interval=interval,
+        group_by='ticker',
+        threads=True,
+        progress=False
+    )
+
+    quotes = {}
+    for symbol in symbols:
+        try:
+            if isinstance(frame.columns, pd.MultiIndex):
+                if symbol not in frame.columns.get_level_values(0):
+                    continue
+                bars = frame[symbol]
+            else:
+                bars = frame
+            quote = _last_quote(bars)
+            if quote is not None:
+                quotes[symbol] = quote
+        except Exception as e:
+            print(f"Error reading quote for {symbol}: {str(e)}")
+    return quotes
+
+
+_quote_cache = TTLCache(maxsize=64, ttl=QUOTE_TTL)
+
+
+def get_quotes(symbols, interval='1m'):
+    """
+    Fetch the latest quote for many symbols with one bulk download.
+
+    Returns {symbol: quote} for every symbol that had data; callers that tick
+    faster than QUOTE_TTL, or ask for the same universe concurrently, share
+    the same download.
+    """
+    symbols = tuple(dict.fromkeys(symbols))
+    key = (symbols, interval)
+
+    def load():
+        hit, quotes = _quote_cache.get(key)
+        if hit:
+            return quotes
+        quotes = _download_quotes(symbols, interval)
+        _quote_cache.set(key, quotes)
+        return quotes
+
+    hit, quotes = _quote_cache.get(key)
+    if not hit:
+        quotes = _flights.do(('quotes',) + key, load)
+    return {symbol: dict(quote) for symbol, quote in quotes.items()}
+
+
+def clear_cache():
+    """Drop every in-memory cached history frame, quote and info record"""
+    _history_cache.clear()
+    _live_cache.clear()
+    _quote_cache.clear()
+    _metadata_cache.clear()
+    _price_cache.clear()
@@ -0,0 +1,78 @@
+# mc_benchmark.py
+
+import argparse
+import time
+
+import numpy as np
+
+from monte_carlo import SCHEMES, log_return_params, simulate_paths, summarize_paths
+
+# Replicate each configuration with independent seeds and report the spread of
+# the estimates across replications, i.e. the standard error of one run.
+# Usage: python mc_benchmark.py [--symbol TCS.NS] [--paths 250 1000 4000] [--reps 50]
+
+DEFAULT_PATHS = (256, 1024, 4096)
+DEFAULT_MU = 0.10 / 252  # 10% a year
+DEFAULT_SIGMA = 0.25 / np.sqrt(252)  # 25% annual volatility
+
+
+def benchmark(mu, sigma, last_price=100.0, paths=DEFAULT_PATHS, reps=50, forecast_days=252,
+              schemes=SCHEMES, seed=0):
+    """Return one row per (scheme, path count) with standard errors and mean runtime"""
+    rows = []
+    for scheme in schemes:
+        for n in paths:
+            seeds = np.random.SeedSequence(seed).spawn(reps)
+            estimates = np.empty((reps, 3))
+            start = time.perf_counter()
+            for i, child in enumerate(seeds):
+                sim = simulate_paths(last_price, mu, sigma, n, forecast_days, rng=child, scheme=scheme)
+                sim_results, risk_metrics = summarize_paths(sim, last_price)
+                estimates[i] = (risk_metrics['VaR_95'], sim_results['lower_95'].iloc[-1],
+                                sim_results['upper_95'].iloc[-1])
+            elapsed = (time.perf_counter() - start) / reps
+            se_var, se_lower, se_upper = estimates.std(axis=0, ddof=1)
+            rows.append({
+                'scheme': scheme,
+                'paths': n,
+                'se_var_95': se_var,
+                'se_lower_95': se_lower,
+                'se_upper_95': se_upper,
+                'ms_per_run': elapsed * 1000
+            })
+    return rows
+
+
+def print_report(rows):
+    baseline = {row['paths']: row['se_var_95'] for row in rows if row['scheme'] == 'plain'}
+    print(f"{'scheme':<16}{'paths':>7}{'SE VaR95':>12}{'SE lower':>12}{'SE upper':>12}"
+          f"{'var ratio':>11}{'ms/run':>9}")
+    for row in rows:
+        # Variance ratio vs plain: how many times more plain paths the same precision needs
+        ratio = (baseline.get(row['paths'], np.nan) / row['se_var_95']) ** 2 if row['se_var_95'] else np.inf
+        print(f"{row['scheme']:<16}{row['paths']:>7}{row['se_var_95']:>12.5f}{row['se_lower_95']:>12.4f}"
+              f"{row['se_upper_95']:>12.4f}{ratio:>11.1f}{row['ms_per_run']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Standard error of Monte Carlo risk estimates per scheme")
+    parser.add_argument('--symbol', help="Fit mu/sigma to this symbol's last year instead of the defaults")
+    parser.add_argument('--paths', type=int, nargs='+', default=list(DEFAULT_PATHS))
+    parser.add_argument('--reps', type=int, default=50)
+    parser.add_argument('--days', type=int, default=252)
+    parser.add_argument('--schemes', nargs='+', choices=SCHEMES, default=list(SCHEMES))
+    args = parser.parse_args()
+
+    mu, sigma, last_price = DEFAULT_MU, DEFAULT_SIGMA, 100.0
+    if args.symbol:
+        from market_data import get_history
+        close = get_history(args.symbol, period="1y")['Close'].to_numpy()
+        mu, sigma = log_return_params(close)
+        last_price = close[-1]
+
+    print(f"mu={mu:.6f} sigma={sigma:.6f} days={args.days} reps={args.reps}")
+    print_report(benchmark(mu, sigma, last_price, args.paths, args.reps, args.days, args.schemes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# metadata_store.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'ticker_info.db')
+
+
+class MetadataStore:
+    """
+    SQLite-backed store of slow-moving `Ticker.info` fields (names, sector,
+    market cap, ...) so they survive restarts.
+    """
+
+    def __init__(self, db_path=None, ttl=24 * 3600):
+        """
+        Args:
+            db_path: SQLite file (default: backend/data/ticker_info.db)
+            ttl: Seconds a stored record is considered fresh (default: 1 day)
+        """
+        self.db_path = db_path or os.environ.get('METADATA_DB', DEFAULT_DB_PATH)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ticker_info ("
+                "symbol TEXT PRIMARY KEY, info TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Connection for one transaction, committed (or rolled back) and closed on exit"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, symbol):
+        """Return the stored record for a symbol if it is still fresh, else None"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT info, fetched_at FROM ticker_info WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def put(self, symbol, info):
+        # default=str keeps odd values (timestamps, numpy scalars) from failing the write
+        payload = json.dumps(info, default=str)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ticker_info (symbol, info, fetched_at) VALUES (?, ?, ?)",
+                (symbol, payload, time.time())
+            )
@@ -0,0 +1,438 @@
+# monte_carlo.py
+
+import itertools
+import warnings
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtri
+from scipy.stats import qmc
+
+from concurrency import get_process_pool
+
+# Percentiles reported per forecast day (lower_95, upper_95) and on the final
+# return distribution (VaR_99, VaR_95)
+BAND_PERCENTILES = (5, 95)
+VAR_PERCENTILES = (1, 5)
+
+# Default forecast length, one trading year
+FORECAST_DAYS = 252
+
+# Runs above this many paths are simulated in chunks of this size and
+# summarised with a PathSketch instead of holding every path in memory
+CHUNK_SIZE = 20000
+
+# Variance-reduction schemes understood by standard_normals
+SCHEMES = ('plain', 'antithetic', 'moment_matching', 'sobol')
+
+
+def log_return_params(close):
+    """Mean and sample std of daily log returns of a close series"""
+    close = np.asarray(close, dtype=np.float64)
+    returns = np.log(close[1:] / close[:-1])
+    returns = returns[np.isfinite(returns)]
+    return float(returns.mean()), float(returns.std(ddof=1))
+
+
+def simulate_paths(last_price, mu, sigma, num_simulations=1000, forecast_days=252,
+                   rng=None, dtype=np.float64, scheme='plain'):
+    """
+    Geometric Brownian price paths as a (forecast_days + 1) x num_simulations array.
+
+    All shocks are drawn in one call straight into the output buffer, which is
+    then turned into prices in place with a cumulative log-sum, so the only
+    allocation is the result itself. Row 0 is last_price.
+
+    Args:
+        rng: numpy Generator, or a seed for one (default: fresh entropy)
+        dtype: np.float64, or np.float32 to halve memory and bandwidth
+        scheme: Variance-reduction scheme, one of SCHEMES
+    """
+    rng = np.random.default_rng(rng)
+    paths = np.empty((forecast_days + 1, num_simulations), dtype=dtype)
+    paths[0] = 0
+    _fill_log_paths(paths[1:], rng, mu, sigma, scheme)
+    np.exp(paths, out=paths)
+    paths *= last_price
+    return paths
+
+
+def standard_normals(out, rng, scheme='plain'):
+    """
+    Fill a days x sims buffer with N(0, 1) shocks drawn with a variance-reduction scheme.
+
+    plain            independent pseudo-random draws
+    antithetic       the second half of the paths mirror the first (z, -z)
+    moment_matching  each day's shocks rescaled to exactly mean 0, std 1
+    sobol            scrambled Sobol points (one dimension per day) through
+                     the inverse normal CDF, laid out along the path with a
+                     Brownian bridge; power-of-two path counts keep the
+                     point set balanced
+    """
+    days, n = out.shape
+    if scheme == 'plain':
+        rng.standard_normal(out=out, dtype=out.dtype)
+    elif scheme == 'antithetic':
+        half = n // 2
+        z = rng.standard_normal((days, half), dtype=out.dtype)
+        out[:, :half] = z
+        np.negative(z, out=out[:, half:2 * half])
+        if n % 2:
+            out[:, -1] = rng.standard_normal(days)
+    elif scheme == 'moment_matching':
+        rng.standard_normal(out=out, dtype=out.dtype)
+        if n > 1:
+            out -= out.mean(axis=1, keepdims=True)
+            out /= out.std(axis=1, keepdims=True)
+    elif scheme == 'sobol':
+        sampler = qmc.Sobol(days, scramble=True, seed=rng)
+        with warnings.catch_warnings():
+            # Non power-of-two counts are still valid, only less balanced
+            warnings.simplefilter('ignore', UserWarning)
+            points = sampler.random(n)
+        np.clip(points, 1e-12, 1 - 1e-12, out=points)
+        out[:] = _brownian_bridge(ndtri(points).T)
+    else:
+        raise ValueError(f"Unknown variance reduction scheme '{scheme}', expected one of {SCHEMES}")
+    return out
+
+
+def _bridge_schedule(days):
+    """(point, left, right) fill order for a Brownian bridge over days 1..days, 0 = start"""
+    schedule = [(days, 0, None)]
+    queue = [(0, days)]
+    while queue:
+        left, right = queue.pop(0)
+        if right - left < 2:
+            continue
+        mid = (left + right) // 2
+        schedule.append((mid, left, right))
+        queue += [(left, mid), (mid, right)]
+    # Days the bisection never reaches when days is not a power of two
+    filled = {point for point, _, _ in schedule}
+    return schedule + [(day, day - 1, None) for day in range(1, days + 1) if day not in filled]
+
+
+def _brownian_bridge(z):
+    """
+    Turn days x sims normals into daily increments, spending z[0] on the final
+    value, z[1] on the midpoint and so on. Low-discrepancy dimensions are
+    best early, so this puts them where the risk numbers are decided.
+    """
+    days = z.shape[0]
+    w = np.zeros((days + 1, z.shape[1]))
+    for k, (point, left, right) in enumerate(_bridge_schedule(days)):
+        if right is None:
+            # Plain Brownian step from `left`
+            w[point] = w[left] + np.sqrt(point - left) * z[k]
+        else:
+            span = right - left
+            w[point] = ((right - point) * w[left] + (point - left) * w[right]) / span \
+                + np.sqrt((point - left) * (right - point) / span) * z[k]
+    return np.diff(w, axis=0)
+
+
+def _fill_log_paths(out, rng, mu, sigma, scheme='plain'):
+    """Fill a days x sims buffer with cumulative GBM log returns"""
+    standard_normals(out, rng, scheme)
+    out *= sigma
+    out += mu
+    np.cumsum(out, axis=0, out=out)
+    return out
+
+
+class PathSketch:
+    """
+    Bounded-memory summary of simulated paths, fed one chunk at a time.
+
+    Keeps exact per-day sums, minima and maxima, plus a fixed-bin histogram of
+    log returns per day with the return sum of each bin. Bin edges are set
+    from the model itself (mu * t +/- BIN_SIGMAS * sigma * sqrt(t)), so every
+    chunk lands in the same bins and sketches from separate runs merge by
+    addition. Quantiles are read off the histogram with linear interpolation
+    inside a bin; with the default 2048 bins a bin is under 1% of a standard
+    deviation wide, well inside Monte Carlo noise. Memory is
+    O(forecast_days * bins) regardless of the number of paths.
+    """
+
+    BIN_SIGMAS = 8.0
+
+    def __init__(self, last_price, mu, sigma, forecast_days=252, bins=2048):
+        self.last_price = float(last_price)
+        self.forecast_days = forecast_days
+        self.bins = bins
+
+        t = np.arange(1, forecast_days + 1, dtype=np.float64)
+        half_width = self.BIN_SIGMAS * max(sigma, 1e-12) * np.sqrt(t)
+        self.lo = mu * t - half_width
+        self.bin_width = 2 * half_width / bins
+
+        self.count = 0
+        self.day_return_sum = np.zeros(forecast_days)
+        self.log_min = np.full(forecast_days, np.inf)
+        self.log_max = np.full(forecast_days, -np.inf)
+        self.hist = np.zeros((forecast_days, bins), dtype=np.int64)
+        self.return_sum = np.zeros((forecast_days, bins))
+        self.final_sum_sq = 0.0
+
+    def add(self, log_paths):
+        """Fold in a days x sims block of cumulative log returns (day 1 onwards)"""
+        n = log_paths.shape[1]
+        self.count += n
+        self.log_min = np.minimum(self.log_min, log_paths.min(axis=1))
+        self.log_max = np.maximum(self.log_max, log_paths.max(axis=1))
+
+        idx = ((log_paths - self.lo[:, None]) / self.bin_width[:, None]).astype(np.int64)
+        np.clip(idx, 0, self.bins - 1, out=idx)
+        idx += np.arange(self.forecast_days)[:, None] * self.bins
+
+        returns = np.expm1(log_paths, dtype=np.float64)
+        self.day_return_sum += returns.sum(axis=1)
+        size = self.forecast_days * self.bins
+        self.hist += np.bincount(idx.ravel(), minlength=size).reshape(self.hist.shape)
+        self.return_sum += np.bincount(idx.ravel(), weights=returns.ravel(), minlength=size).reshape(self.hist.shape)
+        self.final_sum_sq += np.dot(returns[-1], returns[-1])
+        return self
+
+    def merge(self, other):
+        """Add another sketch built with the same model and bins"""
+        self.count += other.count
+        self.day_return_sum += other.day_return_sum
+        self.log_min = np.minimum(self.log_min, other.log_min)
+        self.log_max = np.maximum(self.log_max, other.log_max)
+        self.hist += other.hist
+        self.return_sum += other.return_sum
+        self.final_sum_sq += other.final_sum_sq
+        return self
+
+    def log_quantiles(self, q, days=None):
+        """Log-return quantiles (q in [0, 1]) as a len(days) x len(q) array"""
+        days = np.arange(self.forecast_days) if days is None else np.asarray(days)
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        cum = np.cumsum(self.hist[days], axis=1)
+        target = q[None, :] * self.count
+        k = (cum[:, None, :] < target[:, :, None]).sum(axis=2)
+        k = np.minimum(k, self.bins - 1)
+        rows = np.arange(len(days))[:, None]
+        in_bin = self.hist[days][rows, k]
+        before = cum[rows, k] - in_bin
+        frac = np.clip((target - before) / np.maximum(in_bin, 1), 0, 1)
+        x = self.lo[days][:, None] + (k + frac) * self.bin_width[days][:, None]
+        # Never report a quantile outside what was actually simulated
+        return np.clip(x, self.log_min[days][:, None], self.log_max[days][:, None])
+
+    def expected_shortfall(self, var_return, day=-1):
+        """
+        Mean return of the paths at or below `var_return` on a forecast day.
+
+        `var_return` and `day` may be matching arrays, giving one value per day.
+        """
+        day = np.asarray(day) % self.forecast_days
+        var_return = np.asarray(var_return, dtype=np.float64)
+        x = np.log1p(var_return)
+        position = np.clip((x - self.lo[day]) / self.bin_width[day], 0, self.bins)
+        k = np.minimum(position.astype(np.int64), self.bins - 1)
+        # Full bins below the VaR, plus a pro-rata share of the bin holding it
+        frac = np.clip(position - k, 0, 1)
+        below = np.arange(self.bins) < k[..., None]
+        count = (self.hist[day] * below).sum(axis=-1) + frac * self.hist[day, k]
+        total = (self.return_sum[day] * below).sum(axis=-1) + frac * self.return_sum[day, k]
+        return np.where(count > 0, total / np.maximum(count, 1e-300), var_return)[()]
+
+    def horizon_risk(self, horizons):
+        """Risk at each horizon (days ahead), see horizon_risk_from_paths"""
+        days = np.asarray(horizons) - 1
+        var_99, var_95, upper = np.expm1(self.log_quantiles((0.01, 0.05, 0.95), days=days)).T
+        return _horizon_table(
+            horizons, self.last_price, var_95, var_99,
+            self.expected_shortfall(var_95, days), self.expected_shortfall(var_99, days),
+            upper, self.day_return_sum[days] / self.count
+        )
+
+    def summarize(self):
+        """(sim_results, risk_metrics) shaped like summarize_paths output"""
+        p0 = self.last_price
+        lower, upper = np.exp(self.log_quantiles(np.array(BAND_PERCENTILES) / 100)).T * p0
+        sim_results = {
+            'mean_path': pd.Series(np.r_[p0, p0 * (1 + self.day_return_sum / self.count)]),
+            'upper_95': pd.Series(np.r_[p0, upper]),
+            'lower_95': pd.Series(np.r_[p0, lower]),
+            'max_path': pd.Series(np.r_[p0, p0 * np.exp(self.log_max)]),
+            'min_path': pd.Series(np.r_[p0, p0 * np.exp(self.log_min)])
+        }
+
+        var_99, var_95 = np.expm1(self.log_quantiles(np.array(VAR_PERCENTILES) / 100, days=[-1]))[0]
+        mean = self.day_return_sum[-1] / self.count
+        variance = (self.final_sum_sq - self.count * mean ** 2) / max(self.count - 1, 1)
+        risk_metrics = {
+            'VaR_95': var_95,
+            'VaR_99': var_99,
+            'Expected_Shortfall': self.expected_shortfall(var_95),
+            'Expected_Return': mean,
+            'Return_Volatility': np.sqrt(max(variance, 0.0))
+        }
+        return sim_results, risk_metrics
+
+
+def _chunk_seeds(rng, num_chunks):
+    """One independent SeedSequence per chunk, derived from a seed or Generator"""
+    if isinstance(rng, np.random.Generator):
+        return rng.bit_generator.seed_seq.spawn(num_chunks)
+    if isinstance(rng, np.random.SeedSequence):
+        return rng.spawn(num_chunks)
+    return np.random.SeedSequence(rng).spawn(num_chunks)
+
+
+def _simulate_chunk(task):
+    """Worker entry point: one chunk of paths from its own stream, as a PathSketch"""
+    last_price, mu, sigma, size, forecast_days, seed, dtype, bins, scheme = task
+    sketch = PathSketch(last_price, mu, sigma, forecast_days, bins=bins)
+    block = np.empty((forecast_days, size), dtype=dtype)
+    return sketch.add(_fill_log_paths(block, np.random.default_rng(seed), mu, sigma, scheme))
+
+
+def simulate_sketch(last_price, mu, sigma, num_simulations, forecast_days=252, rng=None,
+                    dtype=np.float64, chunk_size=CHUNK_SIZE, bins=2048, workers=None, scheme='plain'):
+    """
+    Simulate paths chunk by chunk into a PathSketch, never holding more than one chunk.
+
+    Each chunk draws from its own SeedSequence child of `rng`, so for a given
+    seed and chunk_size the result is the same whether the chunks run in this
+    process or across `workers` processes of the shared pool (see
+    get_process_pool). Worker sketches are merged here in chunk order.
+    """
+    sizes = [min(chunk_size, num_simulations - start) for start in range(0, num_simulations, chunk_size)]
+    tasks = [(last_price, mu, sigma, size, forecast_days, seed, dtype, bins, scheme)
+             for size, seed in zip(sizes, _chunk_seeds(rng, len(sizes)))]
+
+    sketch = PathSketch(last_price, mu, sigma, forecast_days, bins=bins)
+    if workers and workers > 1 and len(tasks) > 1:
+        pool = get_process_pool()
+        pending = iter(tasks)
+        in_flight = deque(pool.submit(_simulate_chunk, task) for task in itertools.islice(pending, workers))
+        try:
+            while in_flight:
+                sketch.merge(in_flight.popleft().result())
+                for task in itertools.islice(pending, 1):
+                    in_flight.append(pool.submit(_simulate_chunk, task))
+        finally:
+            for future in in_flight:
+                future.cancel()
+    else:
+        # Adding into one sketch gives the same sums as merging per-chunk ones
+        buffer = np.empty(forecast_days * max(sizes), dtype=dtype)
+        for _, _, _, size, _, seed, _, _, _ in tasks:
+            # Contiguous view for a short last chunk too, Generator fills need one
+            block = buffer[:forecast_days * size].reshape(forecast_days, size)
+            block = _fill_log_paths(block, np.random.default_rng(seed), mu, sigma, scheme)
+            sketch.add(block)
+    return sketch
+
+
+def summarize_paths(paths, last_price):
+    """Reduce simulated paths to (sim_results, risk_metrics)"""
+    lower, upper = np.percentile(paths, BAND_PERCENTILES, axis=1)
+    sim_results = {
+        'mean_path': pd.Series(paths.mean(axis=1, dtype=np.float64)),
+        'upper_95': pd.Series(upper, dtype=np.float64),
+        'lower_95': pd.Series(lower, dtype=np.float64),
+        'max_path': pd.Series(paths.max(axis=1), dtype=np.float64),
+        'min_path': pd.Series(paths.min(axis=1), dtype=np.float64)
+    }
+
+    returns_distribution = paths[-1].astype(np.float64) / last_price - 1
+    var_99, var_95 = np.percentile(returns_distribution, VAR_PERCENTILES)
+    risk_metrics = {
+        'VaR_95': var_95,
+        'VaR_99': var_99,
+        'Expected_Shortfall': returns_distribution[returns_distribution <= var_95].mean(),
+        'Expected_Return': returns_distribution.mean(),
+        'Return_Volatility': returns_distribution.std(ddof=1)
+    }
+    return sim_results, risk_metrics
+
+
+def check_horizons(horizons, forecast_days=FORECAST_DAYS):
+    """Sorted, de-duplicated horizons; ValueError unless they are whole days from 1 to forecast_days"""
+    try:
+        values = list(horizons)
+    except TypeError:
+        values = []
+    if not values or isinstance(horizons, str) or not all(
+            isinstance(h, (int, np.integer)) and not isinstance(h, bool) for h in values):
+        raise ValueError("Horizons must be a non-empty list of whole days")
+    horizons = np.unique(np.asarray(values, dtype=np.int64))
+    if horizons[0] < 1 or horizons[-1] > forecast_days:
+        raise ValueError(f"Horizons must be between 1 and forecast_days ({forecast_days}) days")
+    return horizons
+
+
+def _horizon_table(horizons, last_price, var_95, var_99, es_95, es_99, upper_return, mean_return):
+    # Bands share the VaR_95 quantile: the lower band is the 5th percentile price
+    return {
+        'horizons': np.asarray(horizons),
+        'VaR_95': var_95,
+        'VaR_99': var_99,
+        'Expected_Shortfall_95': es_95,
+        'Expected_Shortfall_99': es_99,
+        'lower_95': last_price * (1 + var_95),
+        'upper_95': last_price * (1 + upper_return),
+        'mean_price': last_price * (1 + mean_return)
+    }
+
+
+def horizon_risk_from_paths(paths, last_price, horizons):
+    """
+    VaR, Expected Shortfall and 5/95 price bands at several horizons at once.
+
+    Returns a dict of arrays aligned with the sorted, de-duplicated
+    `horizons` (days ahead): every quantile for every horizon comes from one
+    np.percentile call over the selected rows of the path matrix.
+    """
+    returns = paths[np.asarray(horizons)].astype(np.float64) / last_price - 1
+    var_99, var_95, upper = np.percentile(returns, (1, 5, 95), axis=1)
+
+    def shortfall(var):
+        tail = returns <= var[:, None]
+        return (returns * tail).sum(axis=1) / np.maximum(tail.sum(axis=1), 1)
+
+    return _horizon_table(horizons, last_price, var_95, var_99, shortfall(var_95), shortfall(var_99),
+                          upper, returns.mean(axis=1))
+
+
+def run_simulation(close, num_simulations=1000, forecast_days=FORECAST_DAYS, rng=None, dtype=np.float64,
+                   chunk_size=None, workers=None, scheme='plain', horizons=None):
+    """
+    Fit GBM to a close series and simulate it, returning (sim_results, risk_metrics).
+
+    Runs of up to `chunk_size` paths (default CHUNK_SIZE) keep every path and
+    compute exact statistics; larger runs stream through a PathSketch in
+    chunks, so memory stays bounded for million-path runs. `workers` > 1
+    spreads the chunks over that many processes. `scheme` picks the
+    variance-reduction scheme (see standard_normals). With `horizons` (days
+    ahead, e.g. (1, 10, 21, 63)), sim_results also carries 'horizon_risk',
+    the arrays from horizon_risk_from_paths for the same set of paths.
+    """
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown variance reduction scheme '{scheme}', expected one of {SCHEMES}")
+    if horizons is not None:
+        horizons = check_horizons(horizons, forecast_days)
+    close = np.asarray(close, dtype=np.float64)
+    mu, sigma = log_return_params(close)
+    last_price = close[-1]
+    chunk_size = chunk_size or CHUNK_SIZE
+    if num_simulations > chunk_size:
+        sketch = simulate_sketch(last_price, mu, sigma, num_simulations, forecast_days, rng=rng, dtype=dtype,
+                                 chunk_size=chunk_size, workers=workers, scheme=scheme)
+        sim_results, risk_metrics = sketch.summarize()
+        if horizons is not None:
+            sim_results['horizon_risk'] = sketch.horizon_risk(horizons)
+        return sim_results, risk_metrics
+
+    paths = simulate_paths(last_price, mu, sigma, num_simulations, forecast_days, rng=rng, dtype=dtype,
+                           scheme=scheme)
+    sim_results, risk_metrics = summarize_paths(paths, last_price)
+    if horizons is not None:
+        sim_results['horizon_risk'] = horizon_risk_from_paths(paths, last_price, horizons)
+    return sim_results, risk_metrics
@@ -1,11 +1,11 @@
 from flask import Flask, render_template
 import feedparser
-import requests
 from bs4 import BeautifulSoup
-from groq import Groq
 import warnings
 import torch
 from flask_cors import CORS
+from llm_cache import cached_completion
+from clients import DEFAULT_TIMEOUT, fetch_feed_bytes, get_groq_client, get_session
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}})
@@ -13,7 +13,7 @@ CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}})
 warnings.simplefilter("ignore")
 
 # Initialize Groq client
-client = Groq(api_key="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")
+client = get_groq_client("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")
 
 # Use GPU if available
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -27,7 +27,8 @@ RSS_FEEDS = {
 
 def fetch_news(rss_url, source_name):
     """Fetches news articles from an RSS feed."""
-    news = feedparser.parse(rss_url)
+    body, headers = fetch_feed_bytes(rss_url)
+    news = feedparser.parse(body, response_headers=headers)
     news_items = []
     for entry in news.entries:
         title = entry.title
@@ -65,7 +66,7 @@ def fetch_news(rss_url, source_name):
 def extract_text_from_url(url):
     """Extracts the main text content from a news article URL."""
     try:
-        response = requests.get(url)
+        response = get_session().get(url, timeout=DEFAULT_TIMEOUT)
         response.raise_for_status()
         soup = BeautifulSoup(response.content, "html.parser")
 
@@ -97,7 +98,9 @@ def analyze_text(text):
 
         # Use Groq API with GPU if possible
         with torch.no_grad():
-            completion = client.chat.completions.create(
+            response = cached_completion(
+                client,
+                "news_analysis",
                 messages=[{"role": "user", "content": prompt}],
                 model="llama3-70b-8192",
                 temperature=0.3,
@@ -106,7 +109,7 @@ def analyze_text(text):
                 stream=False,
             )
 
-        response = completion.choices[0].message.content.strip()
+        response = response.strip()
         return parse_analysis_response(response)
     except Exception as e:
         print(f"Error analyzing text via Groq API: {e}")
@@ -2,12 +2,13 @@ import feedparser
 from datetime import datetime
 from typing import List, Dict, Optional
 import xml.etree.ElementTree as ET
-import requests
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from functools import lru_cache
 import time
 
+from clients import fetch_feed_bytes
+
 
 @dataclass
 class NewsItem:
@@ -83,7 +84,8 @@ class NewsFetcher:
     def _fetch_single_feed(self, feed_info: Dict[str, str]) -> List[NewsItem]:
         """Fetch and parse a single RSS feed."""
         try:
-            feed = feedparser.parse(feed_info["url"])
+            body, headers = fetch_feed_bytes(feed_info["url"])
+            feed = feedparser.parse(body, response_headers=headers)
             news_items = []
 
             for entry in feed.entries:
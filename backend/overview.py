@@ -2,7 +2,6 @@ from flask import Flask, jsonify, request, copy_current_request_context
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 from datetime import datetime
-import yfinance as yf
 import pandas as pd
 from flask_sqlalchemy import SQLAlchemy
 from threading import Thread
@@ -10,6 +9,9 @@ import time
 import asyncio
 import os
 from stock_rec import StockAnalyzer
+from market_data import get_history, get_info, get_live_bars, get_quotes
+from streaming_indicators import IndicatorStream
+from portfolio_risk import MAX_SIMULATIONS, portfolio_risk
 
 analyzer = StockAnalyzer(os.getenv('GROQ_API_KEY'))
 
@@ -40,43 +42,52 @@ def emit_with_context(event, data):
     with app.app_context():
         socketio.emit(event, data)
 
+# Symbols broadcast on the dashboard, by category
+MARKET_CATEGORIES = {
+    'large-cap': ['AAPL', 'MSFT', 'GOOGL', 'AMZN'],
+    'mid-cap': ['AMD', 'UBER', 'SNAP', 'DASH'],
+    'small-cap': ['PLTR', 'RBLX', 'HOOD', 'COIN']
+}
+
+def get_company_name(symbol):
+    """Company name from the long-lived metadata cache"""
+    try:
+        return get_info(symbol, include_prices=False).get('longName', '')
+    except Exception as e:
+        print(f"Error fetching name for {symbol}: {str(e)}")
+        return ''
+
 def background_task():
     """Background task to fetch and broadcast real-time stock data"""
+    universe = [symbol for symbols in MARKET_CATEGORIES.values() for symbol in symbols]
     with app.app_context():
         while True:
+            tick_started = time.monotonic()
             try:
-                # Fetch market data
-                categories = {
-                    'large-cap': ['AAPL', 'MSFT', 'GOOGL', 'AMZN'],
-                    'mid-cap': ['AMD', 'UBER', 'SNAP', 'DASH'],
-                    'small-cap': ['PLTR', 'RBLX', 'HOOD', 'COIN']
-                }
+                # One bulk download for the whole universe, fanned out per category
+                quotes = get_quotes(universe)
                 
-                for category, symbols in categories.items():
+                for category, symbols in MARKET_CATEGORIES.items():
                     stocks_data = []
                     for symbol in symbols:
-                        try:
-                            stock = yf.Ticker(symbol)
-                            info = stock.info
-                            real_time_data = stock.history(period='1d', interval='1m').iloc[-1]
-                            
-                            stocks_data.append({
-                                'symbol': symbol,
-                                'name': info.get('longName', ''),
-                                'price': real_time_data['Close'],
-                                'change': ((real_time_data['Close'] - real_time_data['Open']) / real_time_data['Open']) * 100,
-                                'volume': real_time_data['Volume'],
-                                'high': real_time_data['High'],
-                                'low': real_time_data['Low']
-                            })
-                        except Exception as e:
-                            print(f"Error fetching {symbol}: {str(e)}")
+                        quote = quotes.get(symbol)
+                        if quote is None:
                             continue
+                        
+                        stocks_data.append({
+                            'symbol': symbol,
+                            'name': get_company_name(symbol),
+                            'price': quote['price'],
+                            'change': ((quote['price'] - quote['open']) / quote['open']) * 100,
+                            'volume': quote['volume'],
+                            'high': quote['high'],
+                            'low': quote['low']
+                        })
                     
                     emit_with_context(f'market_data_{category}', {'stocks': stocks_data})
                 
-                # Sleep for 1 second before next update
-                time.sleep(1)
+                # Keep a 1 second cadence regardless of how long the fetch took
+                time.sleep(max(0, 1 - (time.monotonic() - tick_started)))
                 
             except Exception as e:
                 print(f"Background task error: {str(e)}")
@@ -87,33 +98,34 @@ def get_stock_info_safely(symbol):
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            stock = yf.Ticker(symbol)
-            info = stock.info
+            info = get_info(symbol)
             
             if not info or 'regularMarketPrice' not in info:
                 raise ValueError(f"No data available for {symbol}")
                 
-            return stock, info
+            return info
         except Exception as e:
             if attempt == max_retries - 1:
                 print(f"Failed to fetch data for {symbol} after {max_retries} attempts: {str(e)}")
-                return None, None
+                return None
             time.sleep(1)  # Wait before retry
 
 @app.route('/api/stock/<symbol>')
 def get_stock_data(symbol):
     try:
-        stock, info = get_stock_info_safely(symbol)
-        if not stock or not info:
+        info = get_stock_info_safely(symbol)
+        if not info:
             return jsonify({'error': f'Unable to fetch data for {symbol}'}), 404
             
-        # Try to get historical data with fallback
+        # Try to get historical data with fallback. The fallback is today's daily
+        # bar straight from Yahoo: the bar store would download the full history
+        # of a symbol it has not seen just to return it.
         try:
-            hist = stock.history(period='1d', interval='1m')
+            hist = get_history(symbol, period='1d', interval='1m')
             if hist.empty:
-                hist = stock.history(period='1d')
+                hist = get_live_bars(symbol, interval='1d')
         except:
-            hist = stock.history(period='1d')
+            hist = get_live_bars(symbol, interval='1d')
         
         if hist.empty:
             return jsonify({'error': f'No historical data available for {symbol}'}), 404
@@ -141,27 +153,22 @@ def get_stock_data(symbol):
 
 @app.route('/api/market-data')
 def get_market_data():
-    categories = {
-        'large-cap': ['AAPL', 'MSFT', 'GOOGL', 'AMZN'],
-        'mid-cap': ['AMD', 'UBER', 'SNAP', 'DASH'],
-        'small-cap': ['PLTR', 'RBLX', 'HOOD', 'COIN']
-    }
+    universe = [symbol for symbols in MARKET_CATEGORIES.values() for symbol in symbols]
+    quotes = get_quotes(universe)
     
     result = {}
-    for category, symbols in categories.items():
+    for category, symbols in MARKET_CATEGORIES.items():
         stocks = []
         for symbol in symbols:
-            try:
-                stock = yf.Ticker(symbol)
-                info = stock.info
-                stocks.append({
-                    'symbol': symbol,
-                    'name': info.get('longName', ''),
-                    'price': info.get('currentPrice', 0),
-                    'change': info.get('regularMarketChangePercent', 0)
-                })
-            except:
+            quote = quotes.get(symbol)
+            if quote is None:
                 continue
+            stocks.append({
+                'symbol': symbol,
+                'name': get_company_name(symbol),
+                'price': quote['price'],
+                'change': quote['change_percent']
+            })
         result[category] = stocks
     
     return jsonify(result)
@@ -179,8 +186,7 @@ def get_portfolio(user_id):
     
     for position in positions:
         try:
-            stock = yf.Ticker(position.symbol)
-            current_price = stock.info.get('currentPrice', 0)
+            current_price = get_info(position.symbol).get('currentPrice', 0)
             positions_data.append({
                 'symbol': position.symbol,
                 'quantity': position.quantity,
@@ -196,6 +202,25 @@ def get_portfolio(user_id):
         'positions': positions_data
     })
 
+@app.route('/api/portfolio/<user_id>/risk')
+def get_portfolio_risk(user_id):
+    positions = Position.query.filter_by(user_id=user_id).all()
+    holdings = {}
+    for position in positions:
+        holdings[position.symbol] = holdings.get(position.symbol, 0) + position.quantity
+    
+    try:
+        result = portfolio_risk(
+            holdings,
+            horizon_days=request.args.get('horizon', 21, type=int),
+            num_simulations=min(request.args.get('simulations', 10000, type=int), MAX_SIMULATIONS)
+        )
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/trade', methods=['POST'])
 def execute_trade():
     data = request.json
@@ -209,8 +234,7 @@ def execute_trade():
         return jsonify({'error': 'Portfolio not found'}), 404
     
     try:
-        stock = yf.Ticker(symbol)
-        current_price = stock.info['currentPrice']
+        current_price = get_info(symbol)['currentPrice']
         total_cost = current_price * quantity
         
         if action == 'buy':
@@ -283,16 +307,31 @@ def handle_subscribe(symbol):
     """Handle subscription to real-time stock updates"""
     @copy_current_request_context
     def send_updates():
+        # Indicators advance one completed 1-minute bar at a time instead of
+        # being recomputed over the whole session on every tick
+        stream = IndicatorStream()
+        last_fed = None
         with app.app_context():
             while True:
                 try:
-                    stock = yf.Ticker(symbol)
-                    data = stock.history(period='1d', interval='1m').iloc[-1]
+                    # Shared with every other subscriber to this symbol
+                    bars = get_live_bars(symbol)
+                    data = bars.iloc[-1]
+                    
+                    # The last bar is still forming, only feed the ones before it
+                    completed = bars.iloc[:-1]
+                    if last_fed is not None:
+                        completed = completed[completed.index > last_fed]
+                    for timestamp, bar in completed.iterrows():
+                        stream.update(bar['High'], bar['Low'], bar['Close'], bar['Volume'], timestamp)
+                        last_fed = timestamp
+                    
                     emit('stock_update', {
                         'symbol': symbol,
                         'price': data['Close'],
                         'volume': data['Volume'],
-                        'timestamp': str(data.name)
+                        'timestamp': str(data.name),
+                        'indicators': stream.snapshot()
                     })
                     time.sleep(1)
                 except Exception as e:
@@ -0,0 +1,217 @@
+# portfolio_risk.py
+
+import numpy as np
+
+from market_data import get_history_panel, get_info
+
+DISTRIBUTION_PERCENTILES = (1, 5, 10, 25, 50, 75, 90, 95, 99)
+HISTOGRAM_BINS = 50
+
+MAX_SIMULATIONS = 200000
+# Bound on simulations x assets: the per-holding P&L matrix is kept for the
+# ES contributions, 8 bytes a value, so this caps it at about 80 MB
+MAX_SCENARIO_VALUES = 10_000_000
+# Scenarios drawn per matrix product, bounding the normals held at once
+SIMULATION_CHUNK = 20000
+
+# Currency of a Yahoo symbol by exchange suffix, for when its metadata has
+# none; symbols without a suffix are US listings
+SUFFIX_CURRENCIES = {'.NS': 'INR', '.BO': 'INR', '': 'USD'}
+
+
+def forward_fill(close):
+    """Carry prices forward over days an asset did not trade (holidays differ between exchanges)"""
+    close = np.array(close, dtype=np.float64)
+    rows = np.arange(len(close))[:, None]
+    # Index of the last row with a price, per asset; leading gaps stay NaN
+    last_seen = np.maximum.accumulate(np.where(np.isnan(close), 0, rows), axis=0)
+    return close[last_seen, np.arange(close.shape[1])]
+
+
+def check_simulation_size(horizon_days, num_simulations, num_assets):
+    """Reject horizons and simulation counts that are meaningless or too costly"""
+    for name, value in (('horizon_days', horizon_days), ('num_simulations', num_simulations)):
+        if isinstance(value, bool) or not isinstance(value, (int, np.integer)) or value < 1:
+            raise ValueError(f"{name} must be a positive integer")
+    if num_simulations > MAX_SIMULATIONS:
+        raise ValueError(f"num_simulations must be at most {MAX_SIMULATIONS}")
+    if num_simulations * num_assets > MAX_SCENARIO_VALUES:
+        raise ValueError(
+            f"{num_simulations} simulations of {num_assets} holdings is too large; "
+            f"use at most {MAX_SCENARIO_VALUES // num_assets} simulations"
+        )
+
+
+def holding_currency(symbol):
+    """Trading currency of a symbol from its metadata, else from its exchange suffix (None if unknown)"""
+    try:
+        currency = get_info(symbol, include_prices=False).get('currency')
+    except Exception as e:
+        print(f"Error fetching currency for {symbol}: {str(e)}")
+        currency = None
+    if currency:
+        return currency.upper()
+    suffix = symbol[symbol.rfind('.'):].upper() if '.' in symbol else ''
+    return SUFFIX_CURRENCIES.get(suffix)
+
+
+def portfolio_currency(symbols):
+    """
+    The one currency all holdings trade in.
+
+    Prices are added up as they are, so a portfolio mixing currencies (say
+    .NS and US listings) would give meaningless VaR; it is rejected instead.
+    """
+    currencies = {symbol: holding_currency(symbol) for symbol in symbols}
+    unknown = [symbol for symbol, currency in currencies.items() if currency is None]
+    if unknown:
+        raise ValueError(f"Could not determine the currency of {', '.join(unknown)}")
+    distinct = sorted(set(currencies.values()))
+    if len(distinct) > 1:
+        by_currency = '; '.join(
+            f"{currency}: {', '.join(s for s, c in currencies.items() if c == currency)}" for currency in distinct
+        )
+        raise ValueError(f"Holdings trade in different currencies ({by_currency}); "
+                         f"risk can only be computed for a single-currency portfolio")
+    return distinct[0]
+
+
+def log_returns(close):
+    """
+    Daily log returns of a forward-filled dates x assets close matrix.
+
+    Leading rows before every asset has a price are dropped, so the result
+    has no NaN.
+    """
+    complete = ~np.isnan(close).any(axis=1)
+    if complete.sum() < 3:
+        raise ValueError("Not enough overlapping price history across holdings")
+    return np.diff(np.log(close[complete.argmax():]), axis=0)
+
+
+def covariance_factor(cov):
+    """
+    Factor L with L @ L.T == cov, the lower-triangular Cholesky factor when it exists.
+
+    Falls back to a symmetric eigen factor when cov is only positive
+    semi-definite, which is the norm once a portfolio holds more assets than
+    there are days of history.
+    """
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(cov)
+        return vectors * np.sqrt(np.clip(values, 0, None))
+
+
+def simulate_portfolio(last_prices, quantities, returns, horizon_days=21, num_simulations=10000, rng=None,
+                       dtype=np.float64):
+    """
+    Correlated Monte Carlo of a portfolio's P&L over a horizon.
+
+    Daily log returns are modelled as multivariate normal with the sample
+    mean and covariance of `returns` (dates x assets). The horizon log return
+    of every asset in every scenario comes from one matrix product of
+    standard normals with the covariance factor, so cost grows with the
+    number of assets through BLAS, not a Python loop. Under this model the
+    sum of daily returns over the horizon is itself normal, so the horizon
+    is drawn in one step rather than day by day. Scenarios are drawn
+    SIMULATION_CHUNK at a time, and check_simulation_size bounds the total.
+
+    Returns (pnl, asset_pnl): scenario P&L of the portfolio and the
+    scenarios x assets P&L by holding.
+    """
+    rng = np.random.default_rng(rng)
+    mu = returns.mean(axis=0)
+    check_simulation_size(horizon_days, num_simulations, len(mu))
+    factor = covariance_factor(np.atleast_2d(np.cov(returns, rowvar=False))).T.astype(dtype)
+    exposure = np.asarray(last_prices, dtype=np.float64) * np.asarray(quantities, dtype=np.float64)
+
+    asset_pnl = np.empty((num_simulations, len(mu)))
+    for start in range(0, num_simulations, SIMULATION_CHUNK):
+        stop = min(start + SIMULATION_CHUNK, num_simulations)
+        z = rng.standard_normal((stop - start, len(mu)), dtype=dtype)
+        horizon_returns = z @ factor
+        horizon_returns *= np.sqrt(horizon_days)
+        horizon_returns += horizon_days * mu
+        np.expm1(horizon_returns, out=horizon_returns)
+        np.multiply(horizon_returns, exposure, out=asset_pnl[start:stop])
+    return asset_pnl.sum(axis=1), asset_pnl
+
+
+def summarize_pnl(pnl, asset_pnl, value, symbols):
+    """VaR, Expected Shortfall and P&L distribution for simulated scenarios"""
+    var_99, var_95 = np.percentile(pnl, (1, 5))
+    tail_95 = pnl <= var_95
+    tail_99 = pnl <= var_99
+    counts, edges = np.histogram(pnl, bins=HISTOGRAM_BINS)
+
+    return {
+        'portfolio_value': float(value),
+        'expected_pnl': float(pnl.mean()),
+        'pnl_volatility': float(pnl.std(ddof=1)),
+        'VaR_95': float(var_95),
+        'VaR_99': float(var_99),
+        'Expected_Shortfall_95': float(pnl[tail_95].mean()),
+        'Expected_Shortfall_99': float(pnl[tail_99].mean()),
+        'VaR_95_pct': float(var_95 / value) if value else 0.0,
+        'VaR_99_pct': float(var_99 / value) if value else 0.0,
+        # Each holding's average P&L in the worst 5% of scenarios, summing to ES_95
+        'es_contributions': {
+            symbol: float(contribution)
+            for symbol, contribution in zip(symbols, asset_pnl[tail_95].mean(axis=0))
+        },
+        'distribution': {
+            'percentiles': {str(p): float(v) for p, v in
+                            zip(DISTRIBUTION_PERCENTILES, np.percentile(pnl, DISTRIBUTION_PERCENTILES))},
+            'histogram': {'counts': counts.tolist(), 'edges': edges.tolist()}
+        }
+    }
+
+
+def portfolio_risk(holdings, period="1y", horizon_days=21, num_simulations=10000, rng=None):
+    """
+    Simulate the P&L of a set of holdings over `horizon_days` trading days.
+
+    Args:
+        holdings: {symbol: quantity}; repeated positions should already be summed
+        period: History used to estimate mean returns and covariance
+        horizon_days, num_simulations: Positive integers, see check_simulation_size
+
+    Returns:
+        Dict of portfolio VaR/ES (negative numbers are losses, in the
+        portfolio's currency),
+        the P&L distribution, per-holding ES contributions and any symbols
+        that had to be left out for lack of data. Raises ValueError when the
+        holdings trade in more than one currency.
+    """
+    holdings = {symbol: quantity for symbol, quantity in holdings.items() if quantity}
+    if not holdings:
+        raise ValueError("Portfolio has no open positions")
+    # Fail fast, before the history download; simulate_portfolio checks again with the final asset count
+    check_simulation_size(horizon_days, num_simulations, len(holdings))
+
+    panel = get_history_panel(list(holdings), period=period)
+    if panel is None:
+        raise ValueError("No price history available for any holding")
+    _, symbols, fields = panel
+    currency = portfolio_currency(symbols)
+
+    close = forward_fill(fields['Close'])
+    returns = log_returns(close)
+    last_prices = close[-1]
+    quantities = np.array([holdings[symbol] for symbol in symbols], dtype=np.float64)
+
+    pnl, asset_pnl = simulate_portfolio(last_prices, quantities, returns, horizon_days, num_simulations, rng=rng)
+    result = summarize_pnl(pnl, asset_pnl, np.dot(last_prices, quantities), symbols)
+    result.update({
+        'currency': currency,
+        'horizon_days': horizon_days,
+        'num_simulations': num_simulations,
+        'holdings': [
+            {'symbol': symbol, 'quantity': float(q), 'price': float(p), 'value': float(p * q)}
+            for symbol, q, p in zip(symbols, quantities, last_prices)
+        ],
+        'missing': [symbol for symbol in holdings if symbol not in symbols]
+    })
+    return result
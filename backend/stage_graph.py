@@ -0,0 +1,116 @@
+# stage_graph.py
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class StageGraph:
+    """
+    Run named stages on a thread pool, each as soon as the stages it depends on finish.
+
+    A stage is called with the results of its dependencies as positional
+    arguments, in the order they were listed. Dependencies must be added
+    before the stages that use them, which keeps the graph acyclic.
+    Threads pay off for stages that block on I/O (an LLM call) or release
+    the GIL (NumPy), overlapping them with the rest of the work.
+    """
+
+    def __init__(self):
+        self._stages = {}
+
+    def add(self, name, fn, deps=()):
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        missing = [dep for dep in deps if dep not in self._stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages: {missing}")
+        self._stages[name] = (fn, tuple(deps))
+        return self
+
+    def run(self, pool=None):
+        """
+        Execute every stage and return (results, timings).
+
+        results maps stage name to return value. The first stage to raise
+        aborts the run: stages not yet started are cancelled and the
+        exception propagates. See timing_report for the timings.
+
+        Without a `pool`, the run gets its own executor with a thread per
+        stage, so a stage blocked on I/O (the Groq call) never queues
+        another request's stages behind it.
+        """
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=max(len(self._stages), 1), thread_name_prefix='stage')
+            try:
+                return self.run(pool)
+            finally:
+                # Stages still running after a failure finish in the background
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        origin = time.perf_counter()
+        results, timings = {}, {}
+        in_flight = {}
+
+        def timed(name, fn, args):
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                timings[name] = (start - origin, time.perf_counter() - origin)
+
+        def submit_ready():
+            started = set(results) | set(in_flight.values())
+            for name, (fn, deps) in self._stages.items():
+                if name not in started and all(dep in results for dep in deps):
+                    args = [results[dep] for dep in deps]
+                    in_flight[pool.submit(timed, name, fn, args)] = name
+
+        submit_ready()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = in_flight.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception:
+                    for pending in in_flight:
+                        pending.cancel()
+                    raise
+            submit_ready()
+
+        return results, self.timing_report(timings, time.perf_counter() - origin)
+
+    def timing_report(self, timings, total):
+        """
+        Per-stage start/duration (ms from the start of the run) and the critical path.
+
+        The critical path is traced back from the last stage to finish
+        through whichever dependency finished last at each step: the chain
+        that shortening would make the whole run faster.
+        """
+        stages = {
+            name: {
+                'start_ms': round(start * 1000, 2),
+                'duration_ms': round((end - start) * 1000, 2),
+                'deps': list(self._stages[name][1])
+            }
+            for name, (start, end) in timings.items()
+        }
+
+        path = []
+        name = max(timings, key=lambda stage: timings[stage][1]) if timings else None
+        while name is not None:
+            path.append(name)
+            deps = self._stages[name][1]
+            name = max(deps, key=lambda dep: timings[dep][1]) if deps else None
+
+        return {
+            'total_ms': round(total * 1000, 2),
+            'stages': stages,
+            'critical_path': path[::-1]
+        }
+
+
+def server_timing(report):
+    """Server-Timing header value for a timing report, shown by browser dev tools"""
+    return ', '.join(f"{name};dur={stage['duration_ms']}" for name, stage in report['stages'].items())
@@ -4,6 +4,8 @@ import feedparser
 from yahooquery import Screener
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from financial_narrative_generator import FinancialNarrativeGenerator
+from market_data import get_history_panel, get_info
+from indicators import compute_panel
 import re
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
@@ -25,8 +27,7 @@ class StockAnalyzer:
         valid_stocks = []
         for symbol in symbols:
             try:
-                stock = yf.Ticker(f"{symbol}.NS")
-                info = stock.info
+                info = get_info(f"{symbol}.NS", include_prices=False)
                 if info and 'longName' in info:
                     valid_stocks.append({
                         'symbol': f"{symbol}.NS",
@@ -124,7 +125,22 @@ class StockAnalyzer:
             sentiments.append((title, sentiment, link))
         return sentiments
 
-    def analyze_stock(self, stock_info):
+    def compute_indicator_panel(self, symbols, period="1y", indicators=None):
+        """Indicators for many symbols as one batched computation, or None if no data"""
+        history = get_history_panel(symbols, period=period)
+        if history is None:
+            return None
+        index, symbols, fields = history
+        return compute_panel(index, symbols, close=fields['Close'], high=fields['High'],
+                             low=fields['Low'], volume=fields['Volume'], open_=fields['Open'],
+                             columns=indicators)
+
+    def screen_symbols(self, symbols, indicators=None, period="1y"):
+        """Latest indicator values for a universe, one row per symbol"""
+        panel = self.compute_indicator_panel(symbols, period=period, indicators=indicators)
+        return panel.latest() if panel is not None else pd.DataFrame()
+
+    def analyze_stock(self, stock_info, panel=None):
         """Analyze a single stock with both technical and sentiment analysis"""
         symbol, company_name = stock_info
         try:
@@ -145,7 +161,10 @@ class StockAnalyzer:
 
             # Get technical analysis
             narrator = FinancialNarrativeGenerator(symbol, self.api_key)
-            historical_data = narrator.fetch_historical_data()
+            if panel is not None and symbol in panel:
+                historical_data = narrator.use_indicators(panel.for_symbol(symbol))
+            else:
+                historical_data = narrator.fetch_historical_data()
             sim_results, risk_metrics = narrator.monte_carlo_simulation(historical_data)
             backtest_metrics, historical_data = narrator.backtest_strategy(historical_data)
             
@@ -224,9 +243,12 @@ class StockAnalyzer:
         """Get recommendations for top active stocks"""
         top_stocks = self.get_top_active_stocks(market)
         
+        # Indicators for every candidate in one batched computation
+        panel = self.compute_indicator_panel([symbol for symbol, _ in top_stocks])
+        
         recommendations = []
         with ThreadPoolExecutor(max_workers=5) as executor:
-            results = list(executor.map(self.analyze_stock, top_stocks))
+            results = list(executor.map(lambda stock: self.analyze_stock(stock, panel), top_stocks))
         
         recommendations = [r for r in results if r is not None]
         recommendations.sort(key=lambda x: x['confidence_metrics']['technical_score'], reverse=True)
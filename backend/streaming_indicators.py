@@ -0,0 +1,359 @@
+# streaming_indicators.py
+
+import math
+from collections import deque
+
+# Bar-at-a-time versions of the indicators in indicators.py. Each update is
+# (amortized) constant work regardless of how much history has been seen,
+# and the full state round-trips through plain dicts (to_state/from_state)
+# so a live feed can be checkpointed or handed to another worker. After
+# warm-up the values equal the batch engine's; the batch ADX back-fills its
+# first bars, which a stream cannot do, so ADX only matches once its first
+# window is complete.
+
+NAN = float('nan')
+
+
+class StreamingEMA:
+    """EMA with pandas `adjust=False` semantics, NaN until `min_periods` values are seen"""
+
+    def __init__(self, span=None, alpha=None, min_periods=None):
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1.0)
+        self.span = span
+        self.min_periods = min_periods if min_periods is not None else (span or 1)
+        self.count = 0
+        self.mean = NAN
+
+    def update(self, value):
+        if math.isnan(value):
+            return self.value
+        self.count += 1
+        self.mean = value if self.count == 1 else self.alpha * value + (1 - self.alpha) * self.mean
+        return self.value
+
+    @property
+    def value(self):
+        return self.mean if self.count >= self.min_periods else NAN
+
+    def to_state(self):
+        return {'alpha': self.alpha, 'span': self.span, 'min_periods': self.min_periods,
+                'count': self.count, 'mean': self.mean}
+
+    @classmethod
+    def from_state(cls, state):
+        ema = cls(alpha=state['alpha'], span=state['span'], min_periods=state['min_periods'])
+        ema.count = state['count']
+        ema.mean = state['mean']
+        return ema
+
+
+class RollingWindow:
+    """
+    Fixed-size window of the last `size` values with mean and population/sample std.
+
+    The mean and sum of squared deviations are updated as values enter and
+    leave the window (Welford's update, run forwards and backwards), so
+    updates and queries are constant work. Every `size` updates they are
+    recomputed exactly, which bounds rounding drift at amortized O(1) cost.
+    While a NaN or infinity is in the window, mean and std are NaN.
+    """
+
+    def __init__(self, size, min_periods=None, values=()):
+        self.size = size
+        self.min_periods = size if min_periods is None else min_periods
+        self.values = deque(values, maxlen=size)
+        self._recompute()
+
+    def _recompute(self):
+        finite = [v for v in self.values if math.isfinite(v)]
+        self._count = len(finite)
+        self._non_finite = len(self.values) - self._count
+        self._mean = math.fsum(finite) / self._count if finite else 0.0
+        self._m2 = math.fsum((v - self._mean) ** 2 for v in finite)
+        self._updates = 0
+
+    def _add(self, value):
+        if not math.isfinite(value):
+            self._non_finite += 1
+            return
+        self._count += 1
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+
+    def _remove(self, value):
+        if not math.isfinite(value):
+            self._non_finite -= 1
+            return
+        self._count -= 1
+        if self._count == 0:
+            self._mean = self._m2 = 0.0
+            return
+        delta = value - self._mean
+        self._mean -= delta / self._count
+        self._m2 -= delta * (value - self._mean)
+
+    def update(self, value):
+        if len(self.values) == self.size:
+            self._remove(self.values[0])
+        self.values.append(value)
+        self._add(value)
+        self._updates += 1
+        if self._updates >= self.size:
+            self._recompute()
+
+    def mean(self):
+        if len(self.values) < max(self.min_periods, 1) or self._non_finite:
+            return NAN
+        return self._mean
+
+    def std(self, ddof=1):
+        n = len(self.values)
+        if n < max(self.min_periods, 1) or n - ddof <= 0 or self._non_finite:
+            return NAN
+        return math.sqrt(max(self._m2, 0.0) / (n - ddof))
+
+    def to_state(self):
+        return {'size': self.size, 'min_periods': self.min_periods, 'values': list(self.values)}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state['size'], state['min_periods'], state['values'])
+
+
+class StreamingRSI:
+    """Wilder RSI (EMA with alpha = 1/window)"""
+
+    def __init__(self, window=14):
+        self.window = window
+        self.prev_close = None
+        self.avg_up = StreamingEMA(alpha=1.0 / window, min_periods=window)
+        self.avg_down = StreamingEMA(alpha=1.0 / window, min_periods=window)
+
+    def update(self, close):
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        up = self.avg_up.update(max(diff, 0.0))
+        down = self.avg_down.update(max(-diff, 0.0))
+        if math.isnan(down):
+            return NAN
+        return 100.0 if down == 0 else 100 - 100 / (1 + up / down)
+
+    def to_state(self):
+        return {'window': self.window, 'prev_close': self.prev_close,
+                'avg_up': self.avg_up.to_state(), 'avg_down': self.avg_down.to_state()}
+
+    @classmethod
+    def from_state(cls, state):
+        rsi = cls(state['window'])
+        rsi.prev_close = state['prev_close']
+        rsi.avg_up = StreamingEMA.from_state(state['avg_up'])
+        rsi.avg_down = StreamingEMA.from_state(state['avg_down'])
+        return rsi
+
+
+class StreamingMACD:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = StreamingEMA(span=fast)
+        self.slow = StreamingEMA(span=slow)
+        self.signal = StreamingEMA(span=signal)
+
+    def update(self, close):
+        """Return (macd, signal, histogram)"""
+        line = self.fast.update(close) - self.slow.update(close)
+        signal = self.signal.update(line)
+        return line, signal, line - signal
+
+    def to_state(self):
+        return {'fast': self.fast.to_state(), 'slow': self.slow.to_state(), 'signal': self.signal.to_state()}
+
+    @classmethod
+    def from_state(cls, state):
+        macd = cls()
+        macd.fast = StreamingEMA.from_state(state['fast'])
+        macd.slow = StreamingEMA.from_state(state['slow'])
+        macd.signal = StreamingEMA.from_state(state['signal'])
+        return macd
+
+
+class StreamingBollinger:
+    def __init__(self, window=20, num_std=2):
+        self.num_std = num_std
+        self.window = RollingWindow(window)
+
+    def update(self, close):
+        """Return (upper, lower, mid)"""
+        self.window.update(close)
+        mid = self.window.mean()
+        std = self.window.std(ddof=0)
+        return mid + self.num_std * std, mid - self.num_std * std, mid
+
+    def to_state(self):
+        return {'num_std': self.num_std, 'window': self.window.to_state()}
+
+    @classmethod
+    def from_state(cls, state):
+        bollinger = cls(num_std=state['num_std'])
+        bollinger.window = RollingWindow.from_state(state['window'])
+        return bollinger
+
+
+class StreamingOBV:
+    def __init__(self):
+        self.prev_close = None
+        self.obv = 0.0
+
+    def update(self, close, volume):
+        if self.prev_close is not None and close < self.prev_close:
+            self.obv -= volume
+        else:
+            self.obv += volume
+        self.prev_close = close
+        return self.obv
+
+    def to_state(self):
+        return {'prev_close': self.prev_close, 'obv': self.obv}
+
+    @classmethod
+    def from_state(cls, state):
+        obv = cls()
+        obv.prev_close = state['prev_close']
+        obv.obv = state['obv']
+        return obv
+
+
+class StreamingADX:
+    """Simple-average ADX, the same construction as indicators.adx"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev = None  # (high, low, close) of the previous bar
+        self.tr = RollingWindow(period, min_periods=1)
+        self.plus_dm = RollingWindow(period, min_periods=1)
+        self.minus_dm = RollingWindow(period, min_periods=1)
+        self.dx = RollingWindow(period, min_periods=1)
+        self.last_dx = None
+
+    def update(self, high, low, close):
+        if self.prev is None:
+            # No previous bar: true range is undefined, directional moves are zero
+            self.plus_dm.update(0.0)
+            self.minus_dm.update(0.0)
+        else:
+            prev_high, prev_low, prev_close = self.prev
+            self.tr.update(max(high - low, abs(high - prev_close), abs(low - prev_close)))
+            up_move, down_move = high - prev_high, prev_low - low
+            self.plus_dm.update(max(up_move, 0.0) if up_move > down_move else 0.0)
+            self.minus_dm.update(max(down_move, 0.0) if down_move > up_move else 0.0)
+        self.prev = (high, low, close)
+
+        tr = self.tr.mean()
+        dx = NAN
+        if not math.isnan(tr) and tr != 0:
+            plus_di = 100 * self.plus_dm.mean() / tr
+            minus_di = 100 * self.minus_dm.mean() / tr
+            if plus_di + minus_di != 0:
+                dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+
+        # Carry the last DX forward over undefined bars, like the batch ffill
+        if math.isnan(dx):
+            dx = self.last_dx
+        else:
+            self.last_dx = dx
+        if dx is None:
+            return NAN
+        self.dx.update(dx)
+        return self.dx.mean()
+
+    def to_state(self):
+        return {'period': self.period, 'prev': self.prev, 'last_dx': self.last_dx,
+                'tr': self.tr.to_state(), 'plus_dm': self.plus_dm.to_state(),
+                'minus_dm': self.minus_dm.to_state(), 'dx': self.dx.to_state()}
+
+    @classmethod
+    def from_state(cls, state):
+        adx = cls(state['period'])
+        adx.prev = tuple(state['prev']) if state['prev'] is not None else None
+        adx.last_dx = state['last_dx']
+        adx.tr = RollingWindow.from_state(state['tr'])
+        adx.plus_dm = RollingWindow.from_state(state['plus_dm'])
+        adx.minus_dm = RollingWindow.from_state(state['minus_dm'])
+        adx.dx = RollingWindow.from_state(state['dx'])
+        return adx
+
+
+class IndicatorStream:
+    """
+    Live indicator set for one symbol, fed one OHLCV bar at a time.
+
+    Usage:
+        stream = IndicatorStream()
+        for bar in bars:
+            values = stream.update(bar['High'], bar['Low'], bar['Close'], bar['Volume'])
+        checkpoint = stream.to_state()
+    """
+
+    def __init__(self):
+        self.ema = StreamingEMA(span=20)
+        self.rsi = StreamingRSI()
+        self.macd = StreamingMACD()
+        self.bollinger = StreamingBollinger()
+        self.adx = StreamingADX()
+        self.obv = StreamingOBV()
+        self.bars_seen = 0
+        self.last_timestamp = None
+        self.values = {}
+
+    def update(self, high, low, close, volume, timestamp=None):
+        """Feed one completed bar and return the indicator values after it"""
+        high, low, close, volume = float(high), float(low), float(close), float(volume)
+        macd, macd_signal, macd_hist = self.macd.update(close)
+        upper, lower, mid = self.bollinger.update(close)
+        values = {
+            '20_EMA': self.ema.update(close),
+            'RSI': self.rsi.update(close),
+            'MACD': macd,
+            'MACD_Signal': macd_signal,
+            'MACD_Histogram': macd_hist,
+            'Bollinger_Upper': upper,
+            'Bollinger_Lower': lower,
+            'Bollinger_Mid': mid,
+            'ADX': self.adx.update(high, low, close),
+            'OBV': self.obv.update(close, volume),
+        }
+        self.bars_seen += 1
+        if timestamp is not None:
+            self.last_timestamp = str(timestamp)
+        self.values = values
+        return values
+
+    def snapshot(self):
+        """Latest values with NaN (still warming up) as None, ready for JSON"""
+        return {k: (None if math.isnan(v) else v) for k, v in self.values.items()}
+
+    def to_state(self):
+        return {
+            'ema': self.ema.to_state(),
+            'rsi': self.rsi.to_state(),
+            'macd': self.macd.to_state(),
+            'bollinger': self.bollinger.to_state(),
+            'adx': self.adx.to_state(),
+            'obv': self.obv.to_state(),
+            'bars_seen': self.bars_seen,
+            'last_timestamp': self.last_timestamp,
+            'values': self.values,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        stream = cls()
+        stream.ema = StreamingEMA.from_state(state['ema'])
+        stream.rsi = StreamingRSI.from_state(state['rsi'])
+        stream.macd = StreamingMACD.from_state(state['macd'])
+        stream.bollinger = StreamingBollinger.from_state(state['bollinger'])
+        stream.adx = StreamingADX.from_state(state['adx'])
+        stream.obv = StreamingOBV.from_state(state['obv'])
+        stream.bars_seen = state['bars_seen']
+        stream.last_timestamp = state['last_timestamp']
+        stream.values = dict(state['values'])
+        return stream
@@ -0,0 +1,224 @@
+# symbol_search.py
+
+import argparse
+import bisect
+import csv
+import io
+import os
+import re
+import threading
+from collections import defaultdict
+
+DEFAULT_SYMBOLS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'symbols.csv')
+
+# Rank bands: any hit in a higher band outranks every hit in a lower one
+SCORE_EXACT_SYMBOL = 100
+SCORE_SYMBOL_PREFIX = 80
+SCORE_NAME_PREFIX = 60
+SCORE_FUZZY = 40
+
+MAX_PREFIX_CANDIDATES = 500
+MIN_FUZZY_SIMILARITY = 0.3
+MAX_SEARCH_LIMIT = 50
+
+# Exchange listings the master list is refreshed from (see refresh_symbols)
+NSE_EQUITY_LIST = 'https://archives.nseindia.com/content/equities/EQUITY_L.csv'
+NASDAQ_LISTED = 'https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt'
+OTHER_LISTED = 'https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt'
+OTHER_LISTED_EXCHANGES = {'A': 'NYSE American', 'N': 'NYSE', 'P': 'NYSE Arca', 'Z': 'Cboe BZX', 'V': 'IEX'}
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolIndex:
+    """
+    In-memory autocomplete index over a symbol master list.
+
+    Lookups are a bisect over sorted symbol/name-word keys for prefix hits,
+    topped up with trigram-overlap matches for typos, so no query ever
+    touches the network.
+    """
+
+    def __init__(self, records=()):
+        """
+        Args:
+            records: Iterable of dicts with 'symbol', 'name' and 'exchange' keys
+        """
+        self.records = []
+        self._keys = []  # Sorted (key, rank, record index); rank 0 = symbol, 1 = name word
+        self._trigram_postings = defaultdict(list)
+
+        for record in records:
+            symbol = record.get('symbol', '').strip()
+            if not symbol:
+                continue
+            self.records.append({
+                'symbol': symbol,
+                'name': record.get('name', '').strip() or symbol,
+                'exchange': record.get('exchange', '').strip() or 'Unknown'
+            })
+
+        for idx, record in enumerate(self.records):
+            symbol = record['symbol'].lower()
+            base = re.split(r'[.\-]', symbol.lstrip('^'))[0]
+            for key in {symbol, base}:
+                self._keys.append((key, 0, idx))
+            for word in re.findall(r"[a-z0-9&']+", record['name'].lower()):
+                self._keys.append((word, 1, idx))
+            for gram in _trigrams(f"{symbol} {record['name'].lower()}"):
+                self._trigram_postings[gram].append(idx)
+
+        self._keys.sort()
+        self._key_strings = [key for key, _, _ in self._keys]
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, newline='', encoding='utf-8') as f:
+            return cls(csv.DictReader(f))
+
+    def __len__(self):
+        return len(self.records)
+
+    def search(self, query, limit=10):
+        """Return up to `limit` (at most MAX_SEARCH_LIMIT) records ranked by how well they match `query`"""
+        limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+        q = query.strip().lower()
+        if not q:
+            return []
+
+        scores = {}
+
+        def offer(idx, score):
+            if score > scores.get(idx, -1):
+                scores[idx] = score
+
+        # Prefix matches on symbols and on each word of the company name
+        start = bisect.bisect_left(self._key_strings, q)
+        for key, rank, idx in self._keys[start:start + MAX_PREFIX_CANDIDATES]:
+            if not key.startswith(q):
+                break
+            if rank == 0:
+                if key == q:
+                    offer(idx, SCORE_EXACT_SYMBOL)
+                else:
+                    # Shorter completions first: "TC" ranks TCS above TCSL
+                    offer(idx, SCORE_SYMBOL_PREFIX - min(len(key) - len(q), 10))
+            else:
+                offer(idx, SCORE_NAME_PREFIX - min(len(key) - len(q), 10))
+
+        # Fuzzy fill-in for typos ("relaince", "micrsoft")
+        if len(scores) < limit and len(q) >= 3:
+            query_grams = _trigrams(q)
+            overlap = defaultdict(int)
+            for gram in query_grams:
+                for idx in self._trigram_postings.get(gram, ()):
+                    overlap[idx] += 1
+            for idx, shared in overlap.items():
+                similarity = shared / len(query_grams)
+                if similarity >= MIN_FUZZY_SIMILARITY:
+                    offer(idx, SCORE_FUZZY * similarity)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.records[item[0]]['symbol']))
+        return [dict(self.records[idx]) for idx, _ in ranked[:limit]]
+
+
+_index = None
+_index_mtime = None
+_index_lock = threading.Lock()
+
+
+def get_index(path=None):
+    """
+    Return the process-wide index, reloading it when the CSV on disk has been
+    replaced (e.g. by an offline refresh of the symbol master list).
+    """
+    global _index, _index_mtime
+    path = path or os.environ.get('SYMBOLS_CSV', DEFAULT_SYMBOLS_CSV)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    with _index_lock:
+        if _index is None or mtime != _index_mtime:
+            _index = SymbolIndex.from_csv(path) if mtime is not None else SymbolIndex()
+            _index_mtime = mtime
+        return _index
+
+
+def parse_nse_equities(text):
+    """Records from NSE's EQUITY_L.csv, as Yahoo '.NS' symbols"""
+    records = []
+    for row in csv.DictReader(io.StringIO(text)):
+        row = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        if row.get('SYMBOL'):
+            records.append({'symbol': f"{row['SYMBOL']}.NS", 'name': row.get('NAME OF COMPANY', ''),
+                            'exchange': 'NSE'})
+    return records
+
+
+def parse_nasdaq_trader(text, listed_on_nasdaq=True):
+    """
+    Records from NASDAQ Trader's nasdaqlisted.txt or otherlisted.txt.
+
+    Test issues and the trailing file-creation line are skipped. Share
+    classes become Yahoo symbols (BRK.B -> BRK-B); preferreds and other
+    issues Yahoo spells differently ('$' symbols) are left out.
+    """
+    symbol_field = 'Symbol' if listed_on_nasdaq else 'ACT Symbol'
+    records = []
+    for row in csv.DictReader(io.StringIO(text), delimiter='|'):
+        symbol = (row.get(symbol_field) or '').strip()
+        if not symbol or row.get('Test Issue') == 'Y' or symbol.startswith('File Creation Time') or '$' in symbol:
+            continue
+        exchange = 'NASDAQ' if listed_on_nasdaq else OTHER_LISTED_EXCHANGES.get(row.get('Exchange'), 'Unknown')
+        records.append({'symbol': symbol.replace('.', '-'), 'name': (row.get('Security Name') or '').strip(),
+                        'exchange': exchange})
+    return records
+
+
+def refresh_symbols(path=None):
+    """
+    Rebuild the symbol master list from the NSE and NASDAQ Trader listings.
+
+    Rows already in the file (indices, hand-added symbols) are kept and
+    win over downloaded ones. The file is replaced atomically, and
+    get_index picks it up on its next call. Returns the number of records.
+    """
+    # Only this offline refresh needs HTTP
+    from clients import get_session
+
+    path = path or os.environ.get('SYMBOLS_CSV', DEFAULT_SYMBOLS_CSV)
+    session = get_session()
+
+    def download(url):
+        response = session.get(url, timeout=(5, 60))
+        response.raise_for_status()
+        return response.text
+
+    records = {}
+    if os.path.exists(path):
+        for record in SymbolIndex.from_csv(path).records:
+            records[record['symbol']] = record
+    for record in (parse_nse_equities(download(NSE_EQUITY_LIST)) +
+                   parse_nasdaq_trader(download(NASDAQ_LISTED)) +
+                   parse_nasdaq_trader(download(OTHER_LISTED), listed_on_nasdaq=False)):
+        records.setdefault(record['symbol'], record)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['symbol', 'name', 'exchange'])
+        writer.writeheader()
+        writer.writerows(records.values())
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the symbol master list from exchange listings")
+    parser.add_argument('--output', default=None, help="CSV to write (default: data/symbols.csv)")
+    args = parser.parse_args()
+    print(f"Wrote {refresh_symbols(args.output)} symbols")
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+import financial_narrative_generator as fng
+from backtesting import (TRADING_DAYS, parameter_sweep, return_metrics, strategy_returns, sweep_signals,
+                         walk_forward, window_metrics)
+from financial_narrative_generator import FinancialNarrativeGenerator
+from indicators import macd, rolling_mean, rolling_std, rsi, trading_signal
+from test_confidence import synthetic_history
+
+PRODUCTION = {'rsi_lower': (30,), 'rsi_upper': (70,), 'ma_short': (50,), 'ma_long': (200,), 'bb_std': (2.0,)}
+
+
+@pytest.fixture
+def historical_data(monkeypatch):
+    monkeypatch.setattr(fng, 'get_history', lambda symbol, period="1y": synthetic_history())
+    generator = FinancialNarrativeGenerator('TEST.NS', 'test-key')
+    return generator, generator.fetch_historical_data()
+
+
+def test_sweep_reproduces_backtest_strategy(historical_data):
+    generator, df = historical_data
+    sweep = parameter_sweep(df, grid=PRODUCTION)
+    expected, _ = generator.backtest_strategy(df.copy())
+
+    assert len(sweep) == 1
+    for key in ('Total_Return', 'Excess_Return', 'Sharpe_Ratio', 'Max_Drawdown', 'Win_Rate'):
+        assert sweep.loc[0, key] == pytest.approx(expected[key], rel=1e-9, abs=1e-12), key
+    assert sweep.loc[0, 'Trades'] == (df['Signal'].diff().fillna(0) != 0).sum()
+
+
+def test_sweep_signals_match_trading_signal_per_column():
+    close = synthetic_history()['Close'].to_numpy()
+    grid = {'rsi_lower': (30,), 'rsi_upper': (70,), 'ma_short': (20, 50), 'ma_long': (100, 200),
+            'bb_std': (1.5, 2.0, 2.5)}
+    signals, params = sweep_signals(close, grid)
+    assert signals.shape == (len(close), 12)
+
+    rsi_values = rsi(close)
+    line, signal_line, _ = macd(close)
+    mid, std = rolling_mean(close, 20), rolling_std(close, 20, ddof=0)
+    for column, row in params.iterrows():
+        expected = trading_signal(
+            close, rsi_values, line, signal_line,
+            rolling_mean(close, int(row['ma_short']), min_periods=1),
+            rolling_mean(close, int(row['ma_long']), min_periods=1),
+            mid + row['bb_std'] * std, mid - row['bb_std'] * std
+        )
+        np.testing.assert_array_equal(signals[:, column], expected, err_msg=str(dict(row)))
+
+
+def brute_force_window(returns, daily_return, start, length, risk_free_rate=0.02):
+    window = slice(start, start + length)
+    metrics = return_metrics(returns[window], daily_return[window], risk_free_rate * length / TRADING_DAYS)
+    growth = np.cumprod(np.r_[1.0, 1 + returns[window]])
+    metrics['Max_Drawdown'] = (growth / np.maximum.accumulate(growth) - 1).min()
+    return metrics
+
+
+def test_window_metrics_match_brute_force(historical_data):
+    _, df = historical_data
+    daily_return = df['Daily_Return'].to_numpy()
+    returns = strategy_returns(df['Signal'].to_numpy(), daily_return)
+    starts = np.arange(0, len(df) - 63, 5)
+    metrics = window_metrics(returns, daily_return, starts, 63)
+
+    for i, start in enumerate(starts):
+        expected = brute_force_window(returns, daily_return, start, 63)
+        for key, values in metrics.items():
+            assert values[i] == pytest.approx(expected[key], rel=1e-7, abs=1e-9, nan_ok=True), (key, start)
+
+
+def test_walk_forward_matches_brute_force(historical_data):
+    _, df = historical_data
+    result = walk_forward(df, train_days=126, test_days=21)
+    daily_return = df['Daily_Return'].to_numpy()
+    returns = strategy_returns(df['Signal'].to_numpy(), daily_return)
+
+    starts = df.index.get_indexer(result['test_start'])
+    assert list(np.diff(starts)) == [21] * (len(starts) - 1)
+    for i, start in enumerate(starts):
+        train = brute_force_window(returns, daily_return, start - 126, 126)
+        test = brute_force_window(returns, daily_return, start, 21)
+        for key in test:
+            assert result['train'][key][i] == pytest.approx(train[key], rel=1e-7, abs=1e-9, nan_ok=True), key
+            assert result['test'][key][i] == pytest.approx(test[key], rel=1e-7, abs=1e-9, nan_ok=True), key
+
+    tested = slice(starts[0], starts[-1] + 21)
+    out_of_sample = return_metrics(returns[tested], daily_return[tested])
+    assert result['out_of_sample']['Total_Return'] == pytest.approx(out_of_sample['Total_Return'])
+
+
+def test_walk_forward_grid_trades_the_best_train_combination(historical_data):
+    _, df = historical_data
+    grid = {'ma_short': (20, 50), 'ma_long': (100, 200), 'bb_std': (2.0,), 'rsi_lower': (30,), 'rsi_upper': (70,)}
+    result = walk_forward(df, train_days=126, test_days=21, grid=grid)
+    daily_return = df['Daily_Return'].to_numpy()
+    signals, params = sweep_signals(df['Close'].to_numpy(), grid)
+    returns = strategy_returns(signals, daily_return)
+
+    for i, start in enumerate(df.index.get_indexer(result['test_start'])):
+        sharpe = [brute_force_window(returns[:, c], daily_return, start - 126, 126)['Sharpe_Ratio']
+                  for c in range(len(params))]
+        # Combinations with identical signals tie, so check the score rather than the index
+        chosen = params.index[(params == result['params'].iloc[i]).all(axis=1)][0]
+        assert sharpe[chosen] == pytest.approx(np.nanmax(sharpe), rel=1e-7)
+        test = brute_force_window(returns[:, chosen], daily_return, start, 21)
+        assert result['test']['Sharpe_Ratio'][i] == pytest.approx(test['Sharpe_Ratio'], rel=1e-7, nan_ok=True)
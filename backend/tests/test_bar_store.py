@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore
+
+
+def make_bars(dates, closes):
+    index = pd.DatetimeIndex(pd.to_datetime(dates)).tz_localize('America/New_York')
+    closes = np.asarray(closes, dtype=np.float64)
+    return pd.DataFrame({'Open': closes, 'High': closes, 'Low': closes, 'Close': closes,
+                         'Volume': 1000.0, 'Dividends': 0.0, 'Stock Splits': 0.0}, index=index)
+
+
+class FakeUpstream:
+    """Stands in for BarStore._download, recording the (period, start) of each call"""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.calls = []
+
+    def __call__(self, symbol, period=None, start=None):
+        self.calls.append((period, start))
+        if start is None:
+            return self.frame
+        return self.frame[self.frame.index >= pd.Timestamp(start, tz=self.frame.index.tz)]
+
+
+def test_forming_bar_is_replaced_without_full_download(tmp_path):
+    dates = ['2024-06-25', '2024-06-26', '2024-06-27', '2024-06-28']
+    store = BarStore(root=str(tmp_path), min_sync_interval=0)
+    upstream = FakeUpstream(make_bars(dates, [10.0, 11.0, 12.0, 13.0]))
+    store._download = upstream
+    store.sync('TEST')
+
+    # Today's bar keeps moving during the session
+    for close in (13.5, 12.8, 14.2):
+        upstream.frame = make_bars(dates, [10.0, 11.0, 12.0, close])
+        upstream.calls.clear()
+        bars, _ = store.sync('TEST')
+        assert upstream.calls == [(None, '2024-06-27')]
+        assert bars['Close'][-1] == close
+        assert len(bars) == 4
+
+
+def test_adjusted_history_triggers_full_download(tmp_path):
+    dates = ['2024-06-25', '2024-06-26', '2024-06-27', '2024-06-28']
+    store = BarStore(root=str(tmp_path), min_sync_interval=0)
+    upstream = FakeUpstream(make_bars(dates, [10.0, 11.0, 12.0, 13.0]))
+    store._download = upstream
+    store.sync('TEST')
+
+    # A 2:1 split halves every completed close
+    upstream.frame = make_bars(dates, [5.0, 5.5, 6.0, 6.5])
+    upstream.calls.clear()
+    bars, _ = store.sync('TEST')
+    assert upstream.calls == [(None, '2024-06-27'), ('max', None)]
+    assert np.allclose(bars['Close'], [5.0, 5.5, 6.0, 6.5])
+
+
+def test_new_bars_are_appended(tmp_path):
+    dates = ['2024-06-25', '2024-06-26', '2024-06-27']
+    store = BarStore(root=str(tmp_path), min_sync_interval=0)
+    upstream = FakeUpstream(make_bars(dates, [10.0, 11.0, 12.0]))
+    store._download = upstream
+    store.sync('TEST')
+
+    upstream.frame = make_bars(dates + ['2024-06-28', '2024-07-01'], [10.0, 11.0, 12.3, 13.0, 14.0])
+    bars, _ = store.sync('TEST')
+    assert len(bars) == 5
+    assert np.allclose(bars['Close'], [10.0, 11.0, 12.3, 13.0, 14.0])
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+import financial_narrative_generator as fng
+from financial_narrative_generator import ConfidenceScorer, FinancialNarrativeGenerator, _skewtest_pvalue
+
+
+def synthetic_history(days=400, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.015, days)))
+    index = pd.bdate_range('2023-01-02', periods=days, tz='Asia/Kolkata')
+    spread = close * rng.uniform(0.002, 0.02, days)
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 0.3, days),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(100000, 900000, days).astype(np.float64),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0
+    }, index=index)
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    monkeypatch.setattr(fng, 'get_history', lambda symbol, period="1y": synthetic_history())
+    return FinancialNarrativeGenerator('TEST.NS', 'test-key')
+
+
+COMPONENTS = ('technical_confidence', 'market_confidence')
+
+
+def test_series_last_row_matches_point_score(generator):
+    historical_data = generator.fetch_historical_data()
+    sim_results, risk_metrics = generator.monte_carlo_simulation(historical_data)
+    backtest_metrics, historical_data = generator.backtest_strategy(historical_data)
+    report = generator.confidence_scorer.calculate_overall_confidence(
+        historical_data, risk_metrics, sim_results, backtest_metrics
+    )
+
+    last = generator.confidence_scorer.calculate_confidence_series(historical_data).iloc[-1]
+    for component in COMPONENTS:
+        assert last[component] == pytest.approx(report[component]['score'], abs=1e-9)
+        for key, value in report[component]['breakdown'].items():
+            assert last[key] == pytest.approx(value, abs=1e-9)
+
+    # The statistical score approximates the Monte Carlo one in closed form
+    point = report['statistical_confidence']['breakdown']
+    for key in ('volatility', 'var_confidence', 'interval_confidence'):
+        assert last[key] == pytest.approx(point[key], abs=0.05)
+
+
+def test_point_score_reads_the_simulation(generator):
+    historical_data = generator.fetch_historical_data()
+    sim_results, risk_metrics = generator.monte_carlo_simulation(historical_data)
+    scorer = generator.confidence_scorer
+
+    _, scores = scorer.calculate_statistical_confidence(risk_metrics, sim_results)
+    wider = dict(risk_metrics, Return_Volatility=risk_metrics['Return_Volatility'] + 0.1)
+    _, wider_scores = scorer.calculate_statistical_confidence(wider, sim_results)
+    assert wider_scores['volatility'] < scores['volatility']
+
+
+def test_series_rows_match_point_score_on_prefixes(generator):
+    historical_data = generator.fetch_historical_data()
+    series = generator.confidence_scorer.calculate_confidence_series(historical_data, lookback=60)
+    assert series.iloc[:59].isna().all().all()
+
+    # From row 252 on, when the 252-day volatility high is defined
+    scorer = generator.confidence_scorer
+    for end in (252, 300, 333):
+        prefix = historical_data.iloc[:end].copy()
+        backtest_metrics, prefix = generator.backtest_strategy(prefix)
+        technical, _ = scorer.calculate_technical_confidence(prefix)
+        market, _ = scorer.calculate_market_confidence(prefix, backtest_metrics)
+        assert series['technical_confidence'].iloc[end - 1] == pytest.approx(technical, abs=1e-9)
+        assert series['market_confidence'].iloc[end - 1] == pytest.approx(market, abs=1e-9)
+
+
+def test_skewtest_pvalue_matches_scipy():
+    x = np.random.default_rng(1).standard_gamma(2.0, 300)
+    assert _skewtest_pvalue(stats.skew(x), len(x)) == pytest.approx(stats.skewtest(x).pvalue, rel=1e-9)
+
+
+def test_lookback_below_minimum_is_rejected(generator):
+    historical_data = generator.fetch_historical_data()
+    with pytest.raises(ValueError):
+        generator.confidence_scorer.calculate_confidence_series(
+            historical_data, lookback=ConfidenceScorer.MIN_LOOKBACK - 1
+        )
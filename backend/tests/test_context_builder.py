@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from context_builder import build_context, count_tokens, document_passages
+
+WORDS = ("revenue grew strongly across segments while operating costs and interest expense rose "
+         "the board declared a dividend and raised guidance for the coming fiscal year").split()
+
+
+def report(paragraphs=120, seed=3):
+    rng = np.random.default_rng(seed)
+    blocks = []
+    for i in range(paragraphs):
+        words = rng.choice(WORDS, size=rng.integers(20, 400))
+        blocks.append(f"Note {i}: " + ' '.join(words) + f" Total {rng.integers(1, 10 ** 9):,}.")
+    blocks[77] += " The auditor flagged a going concern uncertainty."
+    return '\n\n'.join(blocks)
+
+
+def landing_analysis(text):
+    return {'data': {'chunks': [
+        {'text': block, 'chunk_type': 'text', 'chunk_id': f'id-{i}',
+         'grounding': [{'page': i // 4, 'box': {'l': 0.1, 't': 0.2, 'r': 0.9, 'b': 0.4}}]}
+        for i, block in enumerate(text.split('\n\n'))
+    ]}}
+
+
+@pytest.mark.parametrize('budget', [40, 150, 1000, 3000, 6000])
+@pytest.mark.parametrize('query', ['', 'going concern auditor'])
+def test_context_stays_within_budget(budget, query):
+    text = report()
+    for kwargs in ({'pdf_text': text}, {'document_analysis': landing_analysis(text)}):
+        context = build_context(query=query, budget=budget, **kwargs)
+        assert count_tokens(context) <= budget, kwargs.keys()
+
+
+def test_relevant_passage_is_kept_and_omissions_noted():
+    context = build_context(pdf_text=report(), query='going concern auditor', budget=300)
+    assert 'going concern' in context
+    assert context.endswith('less relevant passages omitted]')
+
+
+def test_small_document_is_sent_whole():
+    text = "Revenue was 10 crore.\n\nNet profit was 2 crore."
+    assert build_context(pdf_text=text, budget=3000) == '\n'.join(document_passages(pdf_text=text))
+    assert build_context(pdf_text=text, budget=0) == ''
+    assert build_context(budget=3000) == ''
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import compute_indicators, ewm_mean, rolling_max, rolling_mean, rolling_min, rolling_std
+
+
+def reference_frame(days=300, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, days)))
+    close[40:46] = close[39]  # Flat run: zero RSI losses, zero ranges
+    spread = close * rng.uniform(0.002, 0.02, days)
+    spread[40:46] = 0.0
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 0.3, days),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(100000, 900000, days).astype(np.float64)
+    }, index=pd.bdate_range('2023-01-02', periods=days))
+
+
+def ta_reference(df):
+    """The `ta` library's definitions (ta 0.11 defaults), written out in pandas"""
+    close, high, low, volume = df['Close'], df['High'], df['Low'], df['Volume']
+    ema = lambda s, n: s.ewm(span=n, min_periods=n, adjust=False).mean()
+
+    diff = close.diff(1)
+    up = diff.where(diff > 0, 0.0)
+    down = -diff.where(diff < 0, 0.0)
+    avg_up = up.ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    avg_down = down.ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    rsi = pd.Series(np.where(avg_down == 0, 100, 100 - 100 / (1 + avg_up / avg_down)), index=df.index)
+
+    macd = ema(close, 12) - ema(close, 26)
+    macd_signal = ema(macd, 9)
+
+    mid = close.rolling(20, min_periods=20).mean()
+    std = close.rolling(20, min_periods=20).std(ddof=0)
+
+    lowest = low.rolling(14, min_periods=14).min()
+    highest = high.rolling(14, min_periods=14).max()
+    stoch_k = 100 * (close - lowest) / (highest - lowest)
+
+    clv = (((close - low) - (high - close)) / (high - low)).fillna(0.0)
+
+    return pd.DataFrame({
+        'RSI': rsi,
+        'MACD': macd,
+        'MACD_Signal': macd_signal,
+        'MACD_Histogram': macd - macd_signal,
+        'Bollinger_Upper': mid + 2 * std,
+        'Bollinger_Lower': mid - 2 * std,
+        'Bollinger_Mid': mid,
+        'Stoch_K': stoch_k,
+        'Stoch_D': stoch_k.rolling(3, min_periods=3).mean(),
+        'OBV': pd.Series(np.where(close < close.shift(1), -volume, volume), index=df.index).cumsum(),
+        'ADI': (clv * volume).cumsum(),
+    })
+
+
+def test_indicators_match_ta_definitions():
+    df = reference_frame()
+    expected = ta_reference(df)
+    actual = compute_indicators(df, columns=list(expected.columns)).to_frame(list(expected.columns))
+
+    for column in expected.columns:
+        np.testing.assert_allclose(actual[column], expected[column], rtol=1e-9, atol=1e-6, err_msg=column)
+        # Warm-up rows are NaN in exactly the same places
+        np.testing.assert_array_equal(np.isnan(actual[column]), expected[column].isna(), err_msg=column)
+
+
+@pytest.mark.parametrize('window, min_periods', [(5, None), (20, 1), (20, 7)])
+def test_rolling_primitives_match_pandas(window, min_periods):
+    rng = np.random.default_rng(3)
+    x = rng.normal(0, 1, (120, 3))
+    x[rng.random(x.shape) < 0.1] = np.nan
+    frame = pd.DataFrame(x)
+    rolling = frame.rolling(window, min_periods=min_periods or window)
+
+    np.testing.assert_allclose(rolling_mean(x, window, min_periods), rolling.mean(), atol=1e-12)
+    np.testing.assert_allclose(rolling_std(x, window, min_periods), rolling.std(), atol=1e-9)
+    np.testing.assert_allclose(rolling_max(x, window, min_periods), rolling.max())
+    np.testing.assert_allclose(rolling_min(x, window, min_periods), rolling.min())
+
+
+def test_ewm_mean_skips_leading_nans_like_pandas():
+    x = np.r_[np.nan, np.nan, np.random.default_rng(5).normal(0, 1, 60)]
+    expected = pd.Series(x).ewm(span=10, min_periods=10, adjust=False).mean()
+    np.testing.assert_allclose(ewm_mean(x, span=10, min_periods=10), expected, atol=1e-12)
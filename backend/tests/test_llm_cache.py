@@ -0,0 +1,96 @@
+import sqlite3
+
+import pytest
+
+import llm_cache
+from llm_cache import CompletionCache
+
+
+@pytest.fixture
+def open_connections(monkeypatch):
+    """Count SQLite connections opened and not yet closed"""
+    live = set()
+    connect = sqlite3.connect
+
+    class Tracked(sqlite3.Connection):
+        def close(self):
+            live.discard(id(self))
+            super().close()
+
+    def tracked_connect(*args, **kwargs):
+        conn = connect(*args, factory=Tracked, **kwargs)
+        live.add(id(conn))
+        return conn
+
+    monkeypatch.setattr(llm_cache.sqlite3, 'connect', tracked_connect)
+    return live
+
+
+def test_connections_are_closed(tmp_path, open_connections):
+    cache = CompletionCache(db_path=str(tmp_path / 'cache.db'))
+    cache.put('k', 'value')
+    assert cache.get('k') == 'value'
+    assert cache.get('missing') is None
+    cache.clear()
+    assert not open_connections
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time for the cache"""
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_their_ttl(tmp_path, clock):
+    cache = CompletionCache(db_path=str(tmp_path / 'cache.db'))
+    cache.put('short', 'a', ttl=10)
+    cache.put('long', 'b', ttl=100)
+
+    clock[0] += 10
+    assert cache.get('short') == 'a'
+    clock[0] += 1
+    assert cache.get('short') is None
+    assert cache.get('long') == 'b'
+    clock[0] += 100
+    assert cache.get('long') is None
+
+
+def test_least_recently_used_are_evicted_by_bytes(tmp_path, clock):
+    # 'é' is two bytes in UTF-8, so each value below is 40 bytes
+    cache = CompletionCache(db_path=str(tmp_path / 'cache.db'), max_bytes=100)
+    for key in ('a', 'b'):
+        cache.put(key, 'é' * 20)
+        clock[0] += 1
+    assert cache.get('a') is not None  # 'a' is now more recently used than 'b'
+    clock[0] += 1
+
+    cache.put('c', 'é' * 20)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+
+    clock[0] += 1
+    cache.put('big', 'x' * 90)
+    assert [key for key in ('a', 'c', 'big') if cache.get(key) is not None] == ['big']
+
+
+def test_cached_completion_uses_call_site_ttl(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(llm_cache, '_cache', CompletionCache(db_path=str(tmp_path / 'cache.db')))
+    calls = []
+
+    class Completions:
+        def create(self, **kwargs):
+            calls.append(kwargs)
+            message = type('Message', (), {'content': f'answer {len(calls)}'})
+            return type('Completion', (), {'choices': [type('Choice', (), {'message': message})]})
+
+    client = type('Client', (), {'chat': type('Chat', (), {'completions': Completions()})})
+    ask = lambda: llm_cache.cached_completion(client, 'stock_insights', 'model', [{'role': 'user', 'content': 'q'}])
+
+    assert ask() == 'answer 1'
+    clock[0] += llm_cache.CACHE_TTLS['stock_insights']
+    assert ask() == 'answer 1'
+    clock[0] += 1
+    assert ask() == 'answer 2'
+    assert len(calls) == 2
@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+from llm_stream import ThinkFilter, filtered
+
+RESPONSES = [
+    "<think>plan the answer</think>\n\nThe stock looks <b>strong</b>.",
+    "No reasoning here, just < and <th and </think text.",
+    "<think>a</think>Visible<think>b < c</think> and more",
+    "<think></think>",
+    "  Leading space<think>x</thi</think>nk> tail",
+]
+
+
+def non_streaming(text):
+    """What the non-streaming path returns (financial_analyzer)"""
+    return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
+
+
+def splits(text):
+    """Every way of cutting the text in two, three-way cuts around each tag, and single characters"""
+    yield [text]
+    for i in range(len(text) + 1):
+        yield [text[:i], text[i:]]
+    for tag in ('<think>', '</think>'):
+        for start in (m.start() for m in re.finditer(re.escape(tag), text)):
+            for i in range(start, start + len(tag) + 1):
+                for j in range(i, start + len(tag) + 1):
+                    yield [text[:i], text[i:j], text[j:]]
+    yield list(text)
+
+
+@pytest.mark.parametrize('text', RESPONSES)
+def test_split_tags_match_non_streaming_output(text):
+    expected = non_streaming(text)
+    for chunks in splits(text):
+        assert ''.join(filtered(chunks)).rstrip() == expected, chunks
+
+
+def test_filtered_skips_empty_output():
+    assert list(filtered(['<thi', 'nk>hidden</th', 'ink>', '  ', 'Hi'])) == ['Hi']
+    assert list(filtered(['<think>a</think>'], strip_think=False)) == ['<think>a</think>']
+
+
+def test_unclosed_think_is_dropped():
+    think = ThinkFilter()
+    assert think.feed('Answer <think>still thin') == 'Answer '
+    assert think.feed('king </thi') == ''
+    assert think.flush() == ''
+
+
+def test_partial_tag_at_end_is_flushed():
+    think = ThinkFilter()
+    assert think.feed('a < b and c <thi') == 'a < b and c '
+    assert think.flush() == '<thi'
@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+import market_data
+from metadata_store import MetadataStore
+
+
+class FakeTicker:
+    def __init__(self, info, calls):
+        self._info = info
+        self._calls = calls
+
+    @property
+    def info(self):
+        self._calls.append(1)
+        if isinstance(self._info, Exception):
+            raise self._info
+        return self._info
+
+
+@pytest.fixture
+def fake_info(monkeypatch, tmp_path):
+    """Route Ticker.info to a canned value and count the lookups"""
+    calls = []
+    state = {}
+    monkeypatch.setattr(market_data.yf, 'Ticker', lambda symbol: FakeTicker(state['info'], calls))
+    monkeypatch.setattr(market_data, '_metadata_store', MetadataStore(db_path=str(tmp_path / 'meta.db')))
+    market_data.clear_cache()
+    yield state, calls
+    market_data.clear_cache()
+
+
+def test_empty_info_is_not_refetched(fake_info):
+    state, calls = fake_info
+    state['info'] = {'trailingPegRatio': None}
+
+    for _ in range(5):
+        assert market_data.get_info('NONAME', include_prices=False).get('longName', '') == ''
+    assert len(calls) == 1
+
+
+def test_failed_info_is_not_refetched(fake_info):
+    state, calls = fake_info
+    state['info'] = RuntimeError('rate limited')
+
+    with pytest.raises(RuntimeError):
+        market_data.get_info('BROKEN', include_prices=False)
+    assert market_data.get_info('BROKEN', include_prices=False) == {}
+    assert len(calls) == 1
+
+
+def test_failed_info_is_retried_after_ttl(fake_info, monkeypatch):
+    state, calls = fake_info
+    state['info'] = {}
+    market_data.get_info('LATER', include_prices=False)
+
+    monkeypatch.setattr(market_data.time, 'monotonic', lambda: 1e12)
+    state['info'] = {'longName': 'Later Inc.', 'sector': 'Technology'}
+    assert market_data.get_info('LATER', include_prices=False)['longName'] == 'Later Inc.'
+    assert len(calls) == 2
+
+
+def test_metadata_store_closes_connections(tmp_path, monkeypatch):
+    live = set()
+    connect = sqlite3.connect
+
+    class Tracked(sqlite3.Connection):
+        def close(self):
+            live.discard(id(self))
+            super().close()
+
+    def tracked_connect(*args, **kwargs):
+        conn = connect(*args, factory=Tracked, **kwargs)
+        live.add(id(conn))
+        return conn
+
+    monkeypatch.setattr(sqlite3, 'connect', tracked_connect)
+    store = MetadataStore(db_path=str(tmp_path / 'meta.db'))
+    store.put('AAA', {'longName': 'A'})
+    assert store.get('AAA') == {'longName': 'A'}
+    assert not live
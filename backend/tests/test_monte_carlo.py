@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from monte_carlo import PathSketch, simulate_paths, simulate_sketch, summarize_paths
+
+LAST_PRICE, MU, SIGMA, DAYS = 100.0, 0.0004, 0.018, 63
+
+
+@pytest.fixture(scope='module')
+def paths():
+    return simulate_paths(LAST_PRICE, MU, SIGMA, num_simulations=20000, forecast_days=DAYS, rng=42)
+
+
+def sketch_of(paths, chunk_size):
+    sketch = PathSketch(LAST_PRICE, MU, SIGMA, DAYS)
+    log_paths = np.log(paths[1:] / LAST_PRICE)
+    for start in range(0, log_paths.shape[1], chunk_size):
+        sketch.add(np.ascontiguousarray(log_paths[:, start:start + chunk_size]))
+    return sketch
+
+
+def test_sketch_matches_exact_statistics(paths):
+    exact_results, exact = summarize_paths(paths, LAST_PRICE)
+    sim_results, risk_metrics = sketch_of(paths, 20000).summarize()
+
+    # Quantiles are interpolated inside bins well under 1% of a std wide
+    tolerance = 0.01 * SIGMA * np.sqrt(DAYS)
+    for key in ('VaR_95', 'VaR_99', 'Expected_Shortfall'):
+        assert risk_metrics[key] == pytest.approx(exact[key], abs=tolerance), key
+    for key in ('Expected_Return', 'Return_Volatility'):
+        assert risk_metrics[key] == pytest.approx(exact[key], rel=1e-9), key
+    for key in ('lower_95', 'upper_95'):
+        np.testing.assert_allclose(sim_results[key], exact_results[key], rtol=tolerance, err_msg=key)
+    for key in ('mean_path', 'max_path', 'min_path'):
+        np.testing.assert_allclose(sim_results[key], exact_results[key], rtol=1e-9, err_msg=key)
+
+
+def test_horizon_expected_shortfall_matches_exact(paths):
+    sketch = sketch_of(paths, 20000)
+    horizons = np.array([1, 10, 21, 63])
+    risk = sketch.horizon_risk(horizons)
+    returns = paths[horizons] / LAST_PRICE - 1
+    for i, var in enumerate(risk['VaR_95']):
+        tail = returns[i][returns[i] <= var]
+        assert risk['Expected_Shortfall_95'][i] == pytest.approx(tail.mean(), abs=1e-3 * SIGMA * np.sqrt(horizons[i]))
+
+
+@pytest.mark.parametrize('chunk_size', [1000, 3000, 7777])
+def test_sketch_does_not_depend_on_chunking(paths, chunk_size):
+    whole = sketch_of(paths, 20000)
+    chunked = sketch_of(paths, chunk_size)
+    np.testing.assert_array_equal(chunked.hist, whole.hist)
+
+    results, metrics = chunked.summarize()
+    expected_results, expected = whole.summarize()
+    for key, value in metrics.items():
+        assert value == pytest.approx(expected[key], rel=1e-9), key
+    for key, series in results.items():
+        np.testing.assert_allclose(series, expected_results[key], rtol=1e-12, err_msg=key)
+
+def test_simulated_chunks_agree_within_noise():
+    exact = summarize_paths(simulate_paths(LAST_PRICE, MU, SIGMA, 40000, DAYS, rng=1), LAST_PRICE)[1]
+    # A dozen standard errors of the final return mean
+    noise = 12 * SIGMA * np.sqrt(DAYS) / np.sqrt(40000)
+    for chunk_size in (5000, 40000):
+        _, metrics = simulate_sketch(LAST_PRICE, MU, SIGMA, 40000, DAYS, rng=7, chunk_size=chunk_size).summarize()
+        for key in ('VaR_95', 'Expected_Shortfall', 'Expected_Return'):
+            assert metrics[key] == pytest.approx(exact[key], abs=noise), (chunk_size, key)
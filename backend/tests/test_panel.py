@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import market_data
+from indicators import INDICATOR_COLUMNS, compute_indicators, compute_panel
+
+
+def ohlcv(index, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(index))))
+    spread = close * rng.uniform(0.002, 0.02, len(index))
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 0.3, len(index)),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(100000, 900000, len(index)).astype(np.float64)
+    }, index=index)
+
+
+@pytest.fixture
+def histories():
+    days = pd.bdate_range('2023-01-02', periods=320)
+    # Different holidays, and one symbol listed partway through
+    return {
+        'AAA.NS': ohlcv(days.delete([10, 50, 51, 200]), 1),
+        'BBB.NS': ohlcv(days.delete([10, 50, 51, 200]), 2),
+        'CCC': ohlcv(days.delete([30, 150]), 3),
+        'DDD': ohlcv(days[120:], 4),
+    }
+
+
+def test_panel_matches_per_symbol_indicators(histories, monkeypatch):
+    monkeypatch.setattr(market_data, 'get_history', lambda symbol, period, interval: histories[symbol].copy())
+    index, symbols, fields = market_data.get_history_panel(list(histories))
+    panel = compute_panel(index, symbols, close=fields['Close'], high=fields['High'], low=fields['Low'],
+                          volume=fields['Volume'], open_=fields['Open'])
+
+    # Symbols with the same calendar are computed together
+    assert len(panel.groups) == 3
+    for symbol, df in histories.items():
+        expected = compute_indicators(df).to_frame()
+        bundle = panel.for_symbol(symbol)
+        assert list(bundle.index) == list(df.index)
+        for column in INDICATOR_COLUMNS:
+            np.testing.assert_allclose(bundle[column], expected[column], rtol=1e-9, atol=1e-9,
+                                       err_msg=f"{symbol} {column}")
+
+    latest = panel.latest()
+    assert list(latest.index) == list(histories)
+    for symbol, df in histories.items():
+        assert latest.loc[symbol, 'RSI'] == pytest.approx(compute_indicators(df)['RSI'][-1])
+
+
+def test_panel_skips_symbols_without_data(histories, monkeypatch):
+    def get_history(symbol, period, interval):
+        if symbol == 'BROKEN':
+            raise RuntimeError('upstream error')
+        return histories.get(symbol, pd.DataFrame()).copy()
+
+    monkeypatch.setattr(market_data, 'get_history', get_history)
+    _, symbols, fields = market_data.get_history_panel(['AAA.NS', 'BROKEN', 'EMPTY', 'CCC', 'AAA.NS'])
+    assert symbols == ['AAA.NS', 'CCC']
+    assert fields['Close'].shape[1] == 2
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import portfolio_risk
+
+
+def test_forward_fill_matches_pandas():
+    rng = np.random.default_rng(0)
+    close = rng.normal(100, 1, (300, 5))
+    close[rng.random(close.shape) < 0.2] = np.nan
+    close[:3, 2] = np.nan
+
+    filled = portfolio_risk.forward_fill(close)
+    np.testing.assert_array_equal(filled, pd.DataFrame(close).ffill().to_numpy())
+
+
+def test_chunked_simulation_matches_single_draw(monkeypatch):
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0.0005, 0.01, (250, 3))
+    last_prices = np.array([100.0, 50.0, 20.0])
+    quantities = np.array([1.0, 2.0, 3.0])
+
+    monkeypatch.setattr(portfolio_risk, 'SIMULATION_CHUNK', 700)
+    chunked, _ = portfolio_risk.simulate_portfolio(last_prices, quantities, returns, 10, 5000, rng=7)
+    monkeypatch.setattr(portfolio_risk, 'SIMULATION_CHUNK', 5000)
+    single, _ = portfolio_risk.simulate_portfolio(last_prices, quantities, returns, 10, 5000, rng=7)
+    np.testing.assert_allclose(chunked, single)
+
+
+@pytest.mark.parametrize('horizon_days, num_simulations, num_assets', [
+    (-5, 1000, 2),
+    (0, 1000, 2),
+    (21, 0, 2),
+    (21.0, 1000, 2),
+    (21, True, 2),
+    (21, portfolio_risk.MAX_SIMULATIONS + 1, 1),
+    (21, portfolio_risk.MAX_SIMULATIONS, 100),
+])
+def test_rejects_bad_sizes(horizon_days, num_simulations, num_assets):
+    with pytest.raises(ValueError):
+        portfolio_risk.check_simulation_size(horizon_days, num_simulations, num_assets)
+
+
+def test_portfolio_risk_validates_before_download(monkeypatch):
+    def download(*args, **kwargs):
+        raise AssertionError("history should not be fetched")
+
+    monkeypatch.setattr(portfolio_risk, 'get_history_panel', download)
+    with pytest.raises(ValueError, match='horizon_days'):
+        portfolio_risk.portfolio_risk({'AAA': 10}, horizon_days=-5)
+
+
+@pytest.fixture
+def fake_market(monkeypatch):
+    """Canned history panel and metadata for portfolio_risk"""
+    info = {}
+
+    def panel(symbols, period):
+        rng = np.random.default_rng(2)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (250, len(symbols))), axis=0))
+        return pd.bdate_range('2024-01-01', periods=250), list(symbols), {'Close': close}
+
+    monkeypatch.setattr(portfolio_risk, 'get_history_panel', panel)
+    monkeypatch.setattr(portfolio_risk, 'get_info', lambda symbol, include_prices: info.get(symbol, {}))
+    return info
+
+
+def test_mixed_currency_portfolio_is_rejected(fake_market):
+    fake_market.update({'RELIANCE.NS': {'currency': 'INR'}, 'AAPL': {'currency': 'USD'}})
+    with pytest.raises(ValueError, match='different currencies'):
+        portfolio_risk.portfolio_risk({'RELIANCE.NS': 10, 'AAPL': 5}, num_simulations=1000)
+
+
+def test_currency_falls_back_to_exchange_suffix(fake_market):
+    # No metadata at all: .NS and .BO listings are both rupees
+    result = portfolio_risk.portfolio_risk({'TCS.NS': 10, 'INFY.BO': 5}, num_simulations=1000, rng=0)
+    assert result['currency'] == 'INR'
+    with pytest.raises(ValueError, match='different currencies'):
+        portfolio_risk.portfolio_risk({'TCS.NS': 10, 'MSFT': 5}, num_simulations=1000)
+    with pytest.raises(ValueError, match='currency of VOD.L'):
+        portfolio_risk.portfolio_risk({'VOD.L': 10}, num_simulations=1000)
+
+
+def test_metadata_currency_wins_over_suffix(fake_market):
+    fake_market.update({'SAP': {'currency': 'eur'}, 'SAP.DE': {'currency': 'EUR'}})
+    result = portfolio_risk.portfolio_risk({'SAP': 1, 'SAP.DE': 2}, num_simulations=1000, rng=0)
+    assert result['currency'] == 'EUR'
+    assert result['portfolio_value'] == pytest.approx(sum(h['value'] for h in result['holdings']))
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from stage_graph import StageGraph, server_timing
+
+
+def test_stages_receive_dependency_results_in_order():
+    finished = []
+
+    def stage(name, value):
+        def run(*args):
+            finished.append(name)
+            return value + sum(args)
+        return run
+
+    graph = StageGraph()
+    graph.add('a', stage('a', 1))
+    graph.add('b', stage('b', 10), deps=['a'])
+    graph.add('c', stage('c', 100), deps=['a'])
+    graph.add('d', lambda b, c: (b, c), deps=['b', 'c'])
+    results, timings = graph.run()
+
+    assert results == {'a': 1, 'b': 11, 'c': 101, 'd': (11, 101)}
+    assert finished[0] == 'a'
+    assert timings['critical_path'][0] == 'a' and timings['critical_path'][-1] == 'd'
+    assert server_timing(timings).count('dur=') == 4
+
+
+def test_independent_stages_overlap():
+    barrier = threading.Barrier(2, timeout=5)
+    graph = StageGraph()
+    graph.add('left', barrier.wait)
+    graph.add('right', barrier.wait)
+    # Deadlocks (BrokenBarrierError) unless both stages run at once
+    graph.run()
+
+
+def test_unknown_and_duplicate_stages_are_rejected():
+    graph = StageGraph().add('a', lambda: 1)
+    with pytest.raises(ValueError):
+        graph.add('a', lambda: 2)
+    with pytest.raises(ValueError):
+        graph.add('b', lambda x: x, deps=['missing'])
+
+
+def test_failure_propagates_and_skips_dependents():
+    ran = []
+    graph = StageGraph()
+    graph.add('fail', lambda: 1 / 0)
+    graph.add('after', lambda x: ran.append(x), deps=['fail'])
+    with pytest.raises(ZeroDivisionError):
+        graph.run()
+    assert ran == []
+
+
+def test_runs_do_not_queue_behind_each_other():
+    # A run blocked on a slow stage must not delay another run's stages
+    release = threading.Event()
+    slow = StageGraph().add('llm', lambda: release.wait(5))
+    worker = threading.Thread(target=slow.run)
+    worker.start()
+    try:
+        fast = StageGraph()
+        for i in range(16):
+            fast.add(f'stage{i}', lambda: time.sleep(0.01))
+        started = time.perf_counter()
+        fast.run()
+        assert time.perf_counter() - started < 2
+    finally:
+        release.set()
+        worker.join()
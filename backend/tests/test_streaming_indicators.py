@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+import pytest
+
+from indicators import compute_indicators
+from streaming_indicators import IndicatorStream, RollingWindow
+from test_indicators import reference_frame
+
+COLUMNS = ['20_EMA', 'RSI', 'MACD', 'MACD_Signal', 'MACD_Histogram',
+           'Bollinger_Upper', 'Bollinger_Lower', 'Bollinger_Mid', 'OBV']
+
+
+def exact(values, min_periods, ddof):
+    """Mean and std of a window straight from math.fsum"""
+    n = len(values)
+    if n < max(min_periods, 1) or any(not math.isfinite(v) for v in values):
+        return math.nan, math.nan
+    mean = math.fsum(values) / n
+    if n - ddof <= 0:
+        return mean, math.nan
+    return mean, math.sqrt(math.fsum((v - mean) ** 2 for v in values) / (n - ddof))
+
+
+@pytest.mark.parametrize('size, min_periods', [(1, None), (5, 1), (20, None), (14, 3)])
+def test_rolling_window_matches_fsum(size, min_periods):
+    rng = np.random.default_rng(size)
+    # A large level with small moves is where running sums lose precision
+    values = 1e6 + np.cumsum(rng.normal(0, 0.01, 3000))
+    values[[100, 101, 900]] = np.nan
+    values[1500] = np.inf
+
+    window = RollingWindow(size, min_periods)
+    for i, value in enumerate(values):
+        window.update(float(value))
+        recent = [float(v) for v in values[max(0, i + 1 - size):i + 1]]
+        for ddof in (0, 1):
+            mean, std = exact(recent, window.min_periods, ddof)
+            assert window.mean() == pytest.approx(mean, rel=1e-12, nan_ok=True), i
+            # Rounding error is relative to the level of the values, not their spread
+            assert window.std(ddof) == pytest.approx(std, rel=1e-9, abs=1e-8, nan_ok=True), (i, ddof)
+
+
+def test_rolling_window_state_round_trip():
+    window = RollingWindow(5)
+    for value in (3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0):
+        window.update(value)
+    restored = RollingWindow.from_state(window.to_state())
+    for value in (6.0, 5.0, 3.0):
+        window.update(value)
+        restored.update(value)
+        assert restored.mean() == pytest.approx(window.mean())
+        assert restored.std(0) == pytest.approx(window.std(0))
+
+
+def test_stream_matches_batch_indicators():
+    df = reference_frame()
+    expected = compute_indicators(df, columns=COLUMNS).to_frame(COLUMNS)
+    stream = IndicatorStream()
+    rows = []
+    for i, (high, low, close, volume) in enumerate(df[['High', 'Low', 'Close', 'Volume']].itertuples(index=False)):
+        if i == 150:
+            stream = IndicatorStream.from_state(stream.to_state())
+        rows.append(stream.update(high, low, close, volume))
+
+    for column in COLUMNS:
+        actual = np.array([row[column] for row in rows])
+        np.testing.assert_allclose(actual, expected[column], rtol=1e-9, atol=1e-6, err_msg=column)
@@ -0,0 +1,42 @@
+from symbol_search import MAX_SEARCH_LIMIT, SymbolIndex, parse_nasdaq_trader, parse_nse_equities
+
+NSE_EQUITY_L = """SYMBOL,NAME OF COMPANY, SERIES, DATE OF LISTING, PAID UP VALUE, MARKET LOT, ISIN NUMBER, FACE VALUE
+RELIANCE,Reliance Industries Limited,EQ,29-NOV-1995,10,1,INE002A01018,10
+TCS,Tata Consultancy Services Limited,EQ,25-AUG-2004,1,1,INE467B01029,1
+"""
+
+NASDAQ_LISTED = """Symbol|Security Name|Market Category|Test Issue|Financial Status|Round Lot Size|ETF|NextShares
+AAPL|Apple Inc. - Common Stock|Q|N|N|100|N|N
+ZXZZT|NASDAQ TEST STOCK|G|Y|N|100|N|N
+File Creation Time: 0101202600:00|||||||
+"""
+
+OTHER_LISTED = """ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol
+BRK.B|Berkshire Hathaway Inc. Class B|N|BRK.B|N|100|N|BRK.B
+ABR$D|Arbor Realty Trust Preferred D|N|ABRpD|N|100|N|ABR-D
+SPY|SPDR S&P 500 ETF Trust|P|SPY|Y|100|N|SPY
+"""
+
+
+def test_parse_nse_equities():
+    assert parse_nse_equities(NSE_EQUITY_L) == [
+        {'symbol': 'RELIANCE.NS', 'name': 'Reliance Industries Limited', 'exchange': 'NSE'},
+        {'symbol': 'TCS.NS', 'name': 'Tata Consultancy Services Limited', 'exchange': 'NSE'},
+    ]
+
+
+def test_parse_nasdaq_trader():
+    assert parse_nasdaq_trader(NASDAQ_LISTED) == [
+        {'symbol': 'AAPL', 'name': 'Apple Inc. - Common Stock', 'exchange': 'NASDAQ'}
+    ]
+    assert parse_nasdaq_trader(OTHER_LISTED, listed_on_nasdaq=False) == [
+        {'symbol': 'BRK-B', 'name': 'Berkshire Hathaway Inc. Class B', 'exchange': 'NYSE'},
+        {'symbol': 'SPY', 'name': 'SPDR S&P 500 ETF Trust', 'exchange': 'NYSE Arca'},
+    ]
+
+
+def test_search_limit_is_clamped():
+    index = SymbolIndex({'symbol': f'AB{i:03d}', 'name': f'Company {i}', 'exchange': 'NSE'} for i in range(200))
+    assert len(index.search('ab', limit=1000)) == MAX_SEARCH_LIMIT
+    assert len(index.search('ab', limit=-5)) == 1
+    assert [r['symbol'] for r in index.search('ab', limit=3)] == ['AB000', 'AB001', 'AB002']